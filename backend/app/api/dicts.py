@@ -1,12 +1,24 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Path, Query
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Header, Path, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.auth import require_session
 from app.core.db import get_db
-from app.schemas.dicts import DictSearchResponse
-from app.services.dicts import DictService
+from app.schemas.dicts import (
+    DictManifestResponse,
+    DictResolveRequest,
+    DictResolveResponse,
+    DictSearchResponse,
+    DictSetItemsResponse,
+)
+from app.services.dicts import CachedPayload, DictService
+
+# 带版本参数（v=ETag）的整集下载内容不会再变化，可长期缓存；其余情况每次按 ETag 协商
+_IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+_REVALIDATE_CACHE = "private, no-cache"
 
 router = APIRouter(prefix="/dicts", tags=["dicts"])
 
@@ -15,10 +27,54 @@ def get_dict_service(db: Session = Depends(get_db)) -> DictService:
     return DictService(db=db)
 
 
+def _cached_response(payload: CachedPayload, response: Response, cache_control: str) -> Any:
+    headers = {"ETag": payload.etag, "Cache-Control": cache_control}
+    if payload.body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return payload.body
+
+
+@router.get("/manifest", response_model=DictManifestResponse)
+def dict_manifest(
+    response: Response,
+    set_codes: Optional[str] = Query(None, description="字典集编码，逗号分隔；为空时返回全部字典集"),
+    if_none_match: Optional[str] = Header(None),
+    _session=Depends(require_session),
+    service: DictService = Depends(get_dict_service),
+) -> Any:
+    codes = [code.strip() for code in (set_codes or "").split(",") if code.strip()]
+    payload = service.manifest(set_codes=codes or None, if_none_match=if_none_match)
+    return _cached_response(payload, response, _REVALIDATE_CACHE)
+
+
+@router.post("/resolve", response_model=DictResolveResponse)
+def resolve_dict_names(
+    payload: DictResolveRequest,
+    _session=Depends(require_session),
+    service: DictService = Depends(get_dict_service),
+) -> DictResolveResponse:
+    return service.resolve(payload)
+
+
+@router.get("/{set_code}/all", response_model=DictSetItemsResponse)
+def download_dict(
+    response: Response,
+    set_code: str = Path(..., description="字典集编码；条目数超过 DICT_DOWNLOAD_MAX_ITEMS 的字典集请使用分页检索"),
+    v: Optional[str] = Query(None, description="清单中的 etag；与当前版本一致时响应可长期缓存"),
+    if_none_match: Optional[str] = Header(None),
+    _session=Depends(require_session),
+    service: DictService = Depends(get_dict_service),
+) -> Any:
+    payload = service.download(set_code=set_code, if_none_match=if_none_match)
+    immutable = v is not None and v.strip('"') == payload.etag.strip('"')
+    return _cached_response(payload, response, _IMMUTABLE_CACHE if immutable else _REVALIDATE_CACHE)
+
+
 @router.get("/{set_code}/search", response_model=DictSearchResponse)
 def search_dict(
     set_code: str = Path(..., description="字典集编码，如 RC001/ICD10/ICD9CM3/TCM_DISEASE/TCM_SYNDROME/COUNTRY"),
-    q: str = Query("", description="关键字，支持按 code/name/merged_code/pinyin 模糊检索"),
+    q: str = Query("", description="关键字，支持按 code/name/merged_code/pinyin 模糊检索及拼音首字母检索，结果按相关度排序"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
     _session=Depends(require_session),
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 from datetime import date
+from pathlib import Path
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.auth import require_session
 from app.api.prefill import get_external_adapter
 from app.core.db import get_db
+from app.core.errors import AppError
+from app.models.export_log import ExportLog
 from app.schemas.auth import SessionPayload
-from app.services.export import ExportService
+from app.schemas.exports import ExportJobOut, ExportLineageItem, ExportPreflightResponse
+from app.services.export import EXPORT_MEDIA_TYPES, ExportResult, ExportService
+from app.services.export_jobs import ExportJobManager, get_export_job_manager
+from app.services.export_preflight import ExportPreflightQuery, ExportPreflightService
 from app.services.external import ExternalDataAdapter
 
 router = APIRouter(prefix="/mz_mfp", tags=["mz_mfp"])
@@ -23,20 +30,182 @@ def get_export_service(
     return ExportService(db=db, external=external)
 
 
+def get_export_preflight_service(
+    db: Session = Depends(get_db),
+    external: ExternalDataAdapter = Depends(get_external_adapter),
+) -> ExportPreflightService:
+    return ExportPreflightService(db=db, external=external)
+
+
+def _stream_response(result: ExportResult) -> StreamingResponse:
+    headers = {
+        "Content-Disposition": f'attachment; filename="{result.filename}"',
+    }
+    return StreamingResponse(result.chunks, media_type=result.media_type, headers=headers)
+
+
 @router.get("/exports/report.xlsx")
 def export_report(
     from_date: date = Query(..., alias="from", description="接诊开始日期（含）"),
     to_date: date = Query(..., alias="to", description="接诊结束日期（含）"),
     session: SessionPayload = Depends(require_session),
     service: ExportService = Depends(get_export_service),
-) -> Response:
+) -> StreamingResponse:
     result = service.export_report(from_date=from_date, to_date=to_date, session=session)
-    headers = {
-        "Content-Disposition": f'attachment; filename="{result.filename}"',
-    }
-    return Response(
-        content=result.content,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
+    return _stream_response(result)
+
+
+@router.get("/exports/report")
+def export_report_as(
+    from_date: date = Query(..., alias="from", description="接诊开始日期（含）"),
+    to_date: date = Query(..., alias="to", description="接诊结束日期（含）"),
+    export_format: str = Query("xlsx", alias="format", description="导出格式：xlsx/csv/parquet"),
+    bom: bool = Query(True, description="CSV 是否带 UTF-8 BOM（便于 Excel 识别中文）"),
+    since: Optional[int] = Query(None, description="增量导出：只输出该导出批次之后提交或变更的记录"),
+    session: SessionPayload = Depends(require_session),
+    service: ExportService = Depends(get_export_service),
+) -> StreamingResponse:
+    result = service.export_report(
+        from_date=from_date,
+        to_date=to_date,
+        session=session,
+        export_format=export_format,
+        csv_bom=bom,
+        since_export_id=since,
+    )
+    return _stream_response(result)
+
+
+@router.get("/exports/preflight", response_model=ExportPreflightResponse)
+def export_preflight(
+    from_date: date = Query(..., alias="from", description="接诊开始日期（含）"),
+    to_date: date = Query(..., alias="to", description="接诊结束日期（含）"),
+    dept_code: Optional[str] = Query(None, description="科室代码"),
+    doc_code: Optional[str] = Query(None, description="医生代码"),
+    kind: Optional[str] = Query(None, description="阻断项类型：missing/draft/invalid；为空时列出全部"),
+    include_invalid: bool = Query(False, description="是否统计校验不通过的已提交记录（未保存校验结果的记录需加载明细重新校验）"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+    session: SessionPayload = Depends(require_session),
+    service: ExportPreflightService = Depends(get_export_preflight_service),
+) -> ExportPreflightResponse:
+    query = ExportPreflightQuery(
+        from_date=from_date,
+        to_date=to_date,
+        dept_code=dept_code,
+        doc_code=doc_code,
+        kind=kind,
+        include_invalid=include_invalid,
+        page=page,
+        page_size=page_size,
     )
+    return service.preflight(session, query)
 
+
+@router.get("/exports/{export_id}/lineage", response_model=list[ExportLineageItem])
+def get_export_lineage(
+    export_id: int,
+    session: SessionPayload = Depends(require_session),
+    service: ExportService = Depends(get_export_service),
+) -> list[ExportLineageItem]:
+    """导出批次链：从指定批次回溯到全量批次（由新到旧），用于按顺序重放增量。"""
+    _ensure_export_role(session)
+    items: list[ExportLineageItem] = []
+    for log in service.export_lineage(export_id):
+        detail = log.detail or {}
+        items.append(
+            ExportLineageItem(
+                export_id=log.id,
+                export_type=log.export_type,
+                status=log.status,
+                file_name=log.file_name,
+                mode=detail.get("mode"),
+                from_date=detail.get("from"),
+                to_date=detail.get("to"),
+                rows=detail.get("rows"),
+                watermark=detail.get("watermark"),
+                base_export_id=detail.get("base_export_id"),
+                created_at=log.created_at,
+            )
+        )
+    return items
+
+
+def _ensure_export_role(session: SessionPayload) -> None:
+    if not any(role in {"admin", "qc"} for role in session.roles):
+        raise AppError(code="forbidden", message="无权执行批量导出", http_status=status.HTTP_403_FORBIDDEN)
+
+
+def _job_out(job: ExportLog) -> ExportJobOut:
+    return ExportJobOut(
+        job_id=job.id,
+        status=job.status,
+        file_name=job.file_name,
+        progress=job.progress or {},
+        detail=job.detail,
+        error_message=job.error_message,
+        created_by=job.created_by,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        download_url=f"/api/mz_mfp/exports/jobs/{job.id}/download" if job.status == "success" else None,
+    )
+
+
+def _get_job(manager: ExportJobManager, job_id: int) -> ExportLog:
+    job = manager.get(job_id)
+    if job is None:
+        raise AppError(code="not_found", message="导出任务不存在", http_status=status.HTTP_404_NOT_FOUND)
+    return job
+
+
+@router.post("/exports/jobs", response_model=ExportJobOut, status_code=status.HTTP_202_ACCEPTED)
+def submit_export_job(
+    from_date: date = Query(..., alias="from", description="接诊开始日期（含）"),
+    to_date: date = Query(..., alias="to", description="接诊结束日期（含）"),
+    export_format: str = Query("xlsx", alias="format", description="导出格式：xlsx/csv/parquet"),
+    bom: bool = Query(True, description="CSV 是否带 UTF-8 BOM（便于 Excel 识别中文）"),
+    since: Optional[int] = Query(None, description="增量导出：只输出该导出批次之后提交或变更的记录"),
+    session: SessionPayload = Depends(require_session),
+    manager: ExportJobManager = Depends(get_export_job_manager),
+) -> ExportJobOut:
+    job = manager.submit(
+        from_date=from_date,
+        to_date=to_date,
+        session=session,
+        export_format=export_format,
+        csv_bom=bom,
+        since_export_id=since,
+    )
+    return _job_out(job)
+
+
+@router.get("/exports/jobs/{job_id}", response_model=ExportJobOut)
+def get_export_job(
+    job_id: int,
+    session: SessionPayload = Depends(require_session),
+    manager: ExportJobManager = Depends(get_export_job_manager),
+) -> ExportJobOut:
+    _ensure_export_role(session)
+    return _job_out(_get_job(manager, job_id))
+
+
+@router.get("/exports/jobs/{job_id}/download")
+def download_export_job(
+    job_id: int,
+    session: SessionPayload = Depends(require_session),
+    manager: ExportJobManager = Depends(get_export_job_manager),
+) -> FileResponse:
+    _ensure_export_role(session)
+    job = _get_job(manager, job_id)
+    if job.status != "success" or not job.file_path:
+        raise AppError(code="conflict", message="导出任务尚未完成", http_status=status.HTTP_409_CONFLICT)
+    path = Path(job.file_path)
+    if not path.is_file():
+        raise AppError(code="not_found", message="导出文件不存在或已清理", http_status=status.HTTP_404_NOT_FOUND)
+    export_format = (job.detail or {}).get("format", "xlsx")
+    return FileResponse(
+        path,
+        media_type=EXPORT_MEDIA_TYPES.get(export_format, "application/octet-stream"),
+        filename=job.file_name or path.name,
+    )
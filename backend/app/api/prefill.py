@@ -1,21 +1,25 @@
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
 
 from app.api.auth import require_session
-from app.core.config import Settings, get_settings
+from app.core.db import get_db
 from app.schemas.auth import SessionPayload
 from app.schemas.prefill import PrefillResponse
-from app.services.external import ExternalDataAdapter
+from app.services.dict_cache import DictResolver
+from app.services.external import ExternalDataAdapter, get_shared_external_adapter
 from app.services.prefill import PrefillService
 
 
-def get_external_adapter(settings: Settings = Depends(get_settings)) -> ExternalDataAdapter:
-    return ExternalDataAdapter(settings)
+def get_external_adapter() -> ExternalDataAdapter:
+    return get_shared_external_adapter()
 
 
-def get_prefill_service(adapter: ExternalDataAdapter = Depends(get_external_adapter)) -> PrefillService:
-    return PrefillService(adapter)
+def get_prefill_service(
+    adapter: ExternalDataAdapter = Depends(get_external_adapter), db: Session = Depends(get_db)
+) -> PrefillService:
+    return PrefillService(adapter, resolver=DictResolver(db))
 
 
 router = APIRouter(prefix="/mz_mfp", tags=["mz_mfp"])
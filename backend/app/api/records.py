@@ -13,8 +13,10 @@ from app.core.db import get_db
 from app.schemas.auth import SessionPayload
 from app.schemas.qc import RecordQcResponse
 from app.schemas.records import RecordResponse, RecordSaveRequest
+from app.schemas.validation import PartialValidateRequest, PartialValidateResponse
 from app.schemas.visits import VisitListResponse
 from app.services.external import ExternalDataAdapter
+from app.services.partial_validation import PartialValidationService
 from app.services.qc import QcService
 from app.services.records import RecordService
 from app.services.visit_list import VisitListQuery, VisitListService
@@ -43,6 +45,10 @@ def get_qc_service(
     return QcService(db=db, external=external)
 
 
+def get_partial_validation_service(db: Session = Depends(get_db)) -> PartialValidationService:
+    return PartialValidationService(db=db)
+
+
 @router.get("/records", response_model=VisitListResponse)
 def list_records(
     from_date: date = Query(..., alias="from", description="接诊开始日期（含）"),
@@ -54,6 +60,7 @@ def list_records(
     status: Optional[str] = Query(None, description="draft/submitted/not_created"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
+    refresh: bool = Query(False, description="忽略同步水位，强制从外部视图重新同步所选范围（医务科/质控可用）"),
     session: SessionPayload = Depends(require_session),
     service: VisitListService = Depends(get_visit_list_service),
 ) -> VisitListResponse:
@@ -67,6 +74,7 @@ def list_records(
         status=status,
         page=page,
         page_size=page_size,
+        refresh=refresh,
     )
     return service.list_visits(session=session, query=query)
 
@@ -107,3 +115,13 @@ def record_qc(
     service: QcService = Depends(get_qc_service),
 ) -> RecordQcResponse:
     return service.get_record_qc(record_id=record_id, session=session)
+
+
+@router.post("/validate", response_model=PartialValidateResponse)
+def validate_partial(
+    request: PartialValidateRequest,
+    session: SessionPayload = Depends(require_session),
+    service: PartialValidationService = Depends(get_partial_validation_service),
+) -> PartialValidateResponse:
+    """表单实时校验：按传入片段执行相关规则，不保存任何数据。"""
+    return service.validate(request)
@@ -7,6 +7,7 @@ from app.api.exports import router as export_router
 from app.api.prefill import router as prefill_router
 from app.api.print import router as print_router
 from app.api.records import router as record_router
+from app.api.system import router as system_router
 
 router = APIRouter()
 
@@ -17,6 +18,7 @@ router.include_router(prefill_router)
 router.include_router(record_router)
 router.include_router(print_router)
 router.include_router(export_router)
+router.include_router(system_router)
 
 
 @router.get("/health", tags=["system"])
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.auth import require_session
+from app.core.db import get_db
+from app.core.errors import AppError
+from app.models.record import Record
+from app.schemas.auth import SessionPayload
+from app.schemas.system import (
+    CacheStats,
+    CacheStatsResponse,
+    DictSearchIndexStats,
+    DictSnapshotStatsResponse,
+    ExternalPoolStats,
+    ExternalPoolStatsResponse,
+    ValidationProfileResponse,
+    ValidationRuleStats,
+    ValidationStatsResponse,
+)
+from app.services.dict_cache import get_dict_store
+from app.services.dict_search import get_dict_search_store
+from app.services.external import get_external_registry, get_shared_external_adapter
+from app.services.record_loading import record_load_options
+from app.services.validation import ValidationService
+from app.services.validation_rules import RulePlan, get_rule_plan
+from app.services.validation_stats import RULE_STATS_SORTS, get_rule_stats
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+def require_admin(session: SessionPayload = Depends(require_session)) -> SessionPayload:
+    if not any(role in {"admin"} for role in session.roles):
+        raise AppError(code="forbidden", message="仅管理员可查看运行状态", http_status=status.HTTP_403_FORBIDDEN)
+    return session
+
+
+@router.get("/external-pools", response_model=ExternalPoolStatsResponse)
+def external_pool_stats(_session: SessionPayload = Depends(require_admin)) -> ExternalPoolStatsResponse:
+    stats = get_external_registry().pool_stats()
+    return ExternalPoolStatsResponse(pools=[ExternalPoolStats(**item) for item in stats])
+
+
+@router.get("/external-cache", response_model=CacheStatsResponse)
+def external_cache_stats(_session: SessionPayload = Depends(require_admin)) -> CacheStatsResponse:
+    stats = get_shared_external_adapter().cache_stats()
+    return CacheStatsResponse(caches=[CacheStats(**item) for item in stats])
+
+
+@router.delete("/external-cache", response_model=CacheStatsResponse)
+def invalidate_external_cache(
+    patient_no: Optional[str] = Query(None, description="患者唯一号（blh）；为空时清空全部缓存"),
+    _session: SessionPayload = Depends(require_admin),
+) -> CacheStatsResponse:
+    adapter = get_shared_external_adapter()
+    adapter.invalidate_patient(patient_no.strip() if patient_no and patient_no.strip() else None)
+    return CacheStatsResponse(caches=[CacheStats(**item) for item in adapter.cache_stats()])
+
+
+def _dict_cache_response() -> DictSnapshotStatsResponse:
+    search_store = get_dict_search_store()
+    return DictSnapshotStatsResponse(
+        **get_dict_store().stats(),
+        search_index=DictSearchIndexStats(enabled=search_store.enabled, **search_store.stats()),
+    )
+
+
+@router.get("/dict-cache", response_model=DictSnapshotStatsResponse)
+def dict_cache_stats(_session: SessionPayload = Depends(require_admin)) -> DictSnapshotStatsResponse:
+    return _dict_cache_response()
+
+
+@router.delete("/dict-cache", response_model=DictSnapshotStatsResponse)
+def invalidate_dict_cache(
+    set_code: Optional[str] = Query(None, description="字典集编码；为空时清空全部字典快照与检索索引"),
+    _session: SessionPayload = Depends(require_admin),
+) -> DictSnapshotStatsResponse:
+    target = set_code.strip() if set_code and set_code.strip() else None
+    get_dict_store().invalidate(target)
+    get_dict_search_store().invalidate(target)
+    return _dict_cache_response()
+
+
+def _rule_stats_items(plan: RulePlan, rules: list[dict]) -> list[ValidationRuleStats]:
+    items: list[ValidationRuleStats] = []
+    for item in rules:
+        meta = plan.rule_meta.get(item["rule_id"])
+        items.append(
+            ValidationRuleStats(**item, section=meta.section if meta else None, kind=meta.kind if meta else None)
+        )
+    return items
+
+
+def _validation_stats_response(sort: str, limit: int) -> ValidationStatsResponse:
+    if sort not in RULE_STATS_SORTS:
+        raise AppError(
+            code="validation_failed",
+            message="sort 参数不合法",
+            http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"sort": sort, "allowed": list(RULE_STATS_SORTS)},
+        )
+    plan = get_rule_plan()
+    snapshot = get_rule_stats().snapshot(sort=sort, limit=limit)
+    return ValidationStatsResponse(
+        enabled=plan.stats is not None,
+        rules_version=plan.version,
+        disabled_rules=list(plan.disabled),
+        calls=snapshot["calls"],
+        total_ms=snapshot["total_ms"],
+        rules=_rule_stats_items(plan, snapshot["rules"]),
+    )
+
+
+@router.get("/validation-stats", response_model=ValidationStatsResponse)
+def validation_stats(
+    sort: str = Query("total", description="排序：total（总耗时）/failures（错误数）/evaluations（执行次数）"),
+    limit: int = Query(100, ge=1, le=1000),
+    _session: SessionPayload = Depends(require_admin),
+) -> ValidationStatsResponse:
+    return _validation_stats_response(sort, limit)
+
+
+@router.delete("/validation-stats", response_model=ValidationStatsResponse)
+def reset_validation_stats(_session: SessionPayload = Depends(require_admin)) -> ValidationStatsResponse:
+    get_rule_stats().reset()
+    return _validation_stats_response("total", 100)
+
+
+@router.get("/validation-profile/{record_id}", response_model=ValidationProfileResponse)
+def validation_profile(
+    record_id: int,
+    db: Session = Depends(get_db),
+    _session: SessionPayload = Depends(require_admin),
+) -> ValidationProfileResponse:
+    """对单条记录执行一次提交校验并返回逐规则耗时（不受 VALIDATION_PROFILE_ENABLED 影响）。"""
+    record = db.execute(
+        select(Record).where(Record.id == record_id).options(*record_load_options())
+    ).scalar_one_or_none()
+    if record is None:
+        raise AppError(code="not_found", message="记录不存在", http_status=status.HTTP_404_NOT_FOUND)
+    validator = ValidationService(db)
+    errors, stats = validator.profile_for_submit(record)
+    snapshot = stats.snapshot()
+    return ValidationProfileResponse(
+        record_id=record.id,
+        total_ms=snapshot["total_ms"],
+        errors=errors,
+        rules=_rule_stats_items(validator.plan, snapshot["rules"]),
+    )
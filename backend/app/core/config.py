@@ -22,6 +22,60 @@ class Settings(BaseSettings):
     external_oracle_dsn: Optional[str] = Field(
         default=None, description="HIS 视图 Oracle 只读 DSN（可选）"
     )
+    external_pool_size: int = Field(default=5, description="HIS 连接池常驻连接数（每个 DSN）")
+    external_max_overflow: int = Field(default=10, description="HIS 连接池高峰期允许额外创建的连接数")
+    external_pool_recycle_seconds: int = Field(default=1800, description="HIS 连接最大存活秒数（超时回收重建）")
+    external_pool_timeout_seconds: int = Field(default=10, description="从 HIS 连接池获取连接的等待超时秒数")
+    external_pool_warmup: int = Field(default=1, description="启动时预热的 HIS 连接数（0 表示不预热）")
+    external_cache_ttl_seconds: int = Field(default=60, description="患者基础信息/费用查询结果缓存秒数（0 表示不缓存）")
+    external_cache_max_entries: int = Field(default=2000, description="患者查询结果缓存最大条数（超出按 LRU 淘汰）")
+
+    visit_sync_overlap_minutes: int = Field(default=30, description="增量同步时向前重叠拉取的分钟数（兜底外部视图延迟写入）")
+    visit_sync_close_after_minutes: int = Field(
+        default=120, description="自然日结束后超过该分钟数再做一次最终同步，之后该日不再重复查询"
+    )
+    visit_sync_background: bool = Field(
+        default=False, description="启用应用内后台同步线程；启用后列表接口直接读取本地索引"
+    )
+    visit_sync_interval_seconds: int = Field(default=60, description="后台同步间隔秒数")
+    visit_sync_recent_days: int = Field(default=1, description="后台同步覆盖的天数（今天之外再向前 N 天）")
+
+    dict_cache_enabled: bool = Field(default=True, description="校验时使用进程内字典快照（关闭后逐条查询 dict_item）")
+    dict_cache_check_seconds: int = Field(
+        default=30, description="字典快照比对 dict_set.version/updated_at 的最小间隔秒数"
+    )
+    dict_cache_max_age_seconds: int = Field(
+        default=3600, description="字典快照最长存活秒数，超过后无论版本是否变化都重新加载（0 表示不限制）"
+    )
+    dict_search_index_enabled: bool = Field(
+        default=True, description="字典检索使用进程内索引（关闭后按 LIKE 查询 dict_item），版本比对间隔同字典快照"
+    )
+    dict_download_max_items: int = Field(
+        default=5000, description="整集下载（/dicts/{set_code}/all）允许的最大条目数，超过的字典集只能分页检索"
+    )
+
+    validation_state_enabled: bool = Field(
+        default=True, description="保存提交校验结果，记录/规则/字典版本均未变化时直接复用"
+    )
+    validation_disabled_rules: str = Field(
+        default="", description="停用的校验规则 ID，逗号分隔；按前缀匹配（如 fee_summary 停用全部费用规则）"
+    )
+    validation_profile_enabled: bool = Field(
+        default=False, description="按规则统计校验耗时与错误次数（逐条计时有额外开销，排查时开启）"
+    )
+
+    export_job_workers: int = Field(default=2, description="异步导出任务并发数（每个进程）")
+    export_job_dir: str = Field(default="tmp/exports", description="异步导出文件存放目录（相对路径以 backend 目录为基准）")
+    export_job_stale_seconds: int = Field(
+        default=300, description="运行中任务超过该秒数无心跳视为中断（服务重启/进程退出）"
+    )
+    export_job_max_attempts: int = Field(default=2, description="中断任务最多执行次数，超过后置为失败")
+
+    export_parallel_workers: int = Field(
+        default=0, description="导出校验/行构造并行进程数（0 或 1 表示串行，默认关闭）"
+    )
+    export_parallel_min_records: int = Field(default=2000, description="记录数达到该值才启用并行模式")
+    export_parallel_chunk_size: int = Field(default=500, description="并行模式下每个任务分片的记录数")
 
     signature_secret: str = Field(default="change-me", description="HIS 直跳验签密钥")
     signature_algo: Literal["hmac_sha256", "sha256_concat"] = "hmac_sha256"
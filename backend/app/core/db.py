@@ -26,6 +26,10 @@ def reset_db_cache() -> None:
     get_engine.cache_clear()
 
 
+def create_session() -> Session:
+    return _get_sessionmaker()()
+
+
 def get_db() -> Generator[Session, None, None]:
     db = _get_sessionmaker()()
     try:
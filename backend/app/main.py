@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,15 +9,37 @@ from app.api.routes import router as api_router
 from app.core.config import get_settings
 from app.core.errors import AppError, default_error_mapping, error_response
 from app.core.logging import setup_logging
+from app.services.export_jobs import get_export_job_manager
+from app.services.external import get_external_registry, reset_external_cache
+from app.services.visit_sync import VisitSyncScheduler
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # HIS 连接池随应用启动创建并预热，关闭时统一释放
+    get_external_registry().warmup()
+    scheduler = VisitSyncScheduler() if get_settings().visit_sync_background else None
+    if scheduler is not None:
+        scheduler.start()
+    # 接管上次运行中断的导出任务并启动心跳
+    get_export_job_manager().start()
+    try:
+        yield
+    finally:
+        get_export_job_manager().stop()
+        get_export_job_manager.cache_clear()
+        if scheduler is not None:
+            scheduler.stop()
+        reset_external_cache()
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
     setup_logging()
 
-    app = FastAPI(title="门诊病案首页填写系统", version="0.1.0")
+    app = FastAPI(title="门诊病案首页填写系统", version="0.1.0", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -24,6 +47,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag"],
     )
 
     @app.exception_handler(AppError)
@@ -13,7 +13,9 @@ from app.models.record import Record
 from app.models.surgery import Surgery
 from app.models.tcm_operation import TcmOperation
 from app.models.user import AppRole, AppUser, AppUserDept, AppUserRole
+from app.models.validation_state import ValidationState
 from app.models.visit_index import VisitIndex
+from app.models.visit_sync_state import VisitSyncState
 
 __all__ = [
     "AppConfig",
@@ -35,5 +37,7 @@ __all__ = [
     "Record",
     "Surgery",
     "TcmOperation",
+    "ValidationState",
     "VisitIndex",
+    "VisitSyncState",
 ]
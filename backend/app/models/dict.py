@@ -33,6 +33,7 @@ class DictItem(Base):
     extra_code: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     merged_code: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     pinyin: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    pinyin_abbr: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     status: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("1"))
     sort_no: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
 
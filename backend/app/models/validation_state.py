@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import ForeignKey, Integer, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import ID_TYPE, Base, TimestampMixin
+
+
+class ValidationState(TimestampMixin, Base):
+    """
+    记录的最近一次提交校验结果：
+    - 仅当记录版本、规则版本、字典版本均与保存时一致才复用，否则重新校验并覆盖
+    - errors 为序列化后的 FieldError 列表
+    """
+
+    __tablename__ = "mz_mfp_validation_state"
+
+    record_id: Mapped[int] = mapped_column(ID_TYPE, ForeignKey("mz_mfp_record.id"), primary_key=True)
+    record_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    rules_version: Mapped[str] = mapped_column(String(40), nullable=False)
+    dict_version: Mapped[str] = mapped_column(String(40), nullable=False)
+    error_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    errors: Mapped[Optional[list[dict[str, Any]]]] = mapped_column(JSON, nullable=True)
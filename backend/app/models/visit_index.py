@@ -12,7 +12,7 @@ from app.models.base import Base, TimestampMixin
 class VisitIndex(TimestampMixin, Base):
     """
     本地“就诊索引”表：
-    - 列表查询时按时间范围从外部视图同步（增量 upsert）
+    - 列表查询时按时间范围从外部视图同步（增量 upsert；row_hash 未变化的行不重复写入）
     - 本地联表 `mz_mfp_record` 得到状态（not_created/draft/submitted）
     """
 
@@ -25,4 +25,5 @@ class VisitIndex(TimestampMixin, Base):
     xm: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     jzks: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     jzys: Mapped[Optional[str]] = mapped_column(String(40), nullable=True)
+    row_hash: Mapped[Optional[str]] = mapped_column(String(40), nullable=True)
 
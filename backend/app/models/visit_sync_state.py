@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Boolean, Date, DateTime, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+class VisitSyncState(TimestampMixin, Base):
+    """
+    就诊索引同步水位（按自然日）：
+    - synced_through：该日已从外部视图同步到的时间点（不含）
+    - is_closed：该日已结束且超过宽限期并完成最终同步，后续不再重新拉取（除非显式刷新）
+    """
+
+    __tablename__ = "mz_mfp_visit_sync_state"
+
+    sync_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    synced_through: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    is_closed: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("0"))
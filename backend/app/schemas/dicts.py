@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import List, Optional
 
 from pydantic import BaseModel, Field
@@ -20,3 +21,49 @@ class DictSearchResponse(BaseModel):
     total: int
     items: List[DictItemOut]
 
+
+DICT_ITEM_FIELDS = ["code", "name", "extra_code", "merged_code"]
+
+
+class DictSetItemsResponse(BaseModel):
+    set_code: str
+    version: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    etag: str
+    fields: List[str] = Field(default_factory=lambda: list(DICT_ITEM_FIELDS), description="items 中各列的含义")
+    items: List[List[Optional[str]]] = Field(description="启用条目，按 sort_no/code 排序，每行按 fields 顺序")
+
+
+class DictManifestItem(BaseModel):
+    set_code: str
+    set_name: str
+    version: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    etag: str
+    items: int = Field(description="启用条目数")
+    downloadable: bool = Field(description="条目数未超过整集下载上限，可通过 /dicts/{set_code}/all 一次取回")
+
+
+class DictManifestResponse(BaseModel):
+    etag: str
+    max_items: int = Field(description="整集下载的条目数上限")
+    sets: List[DictManifestItem]
+
+
+class DictResolveItem(BaseModel):
+    set_code: str
+    code: str
+
+
+class DictResolveRequest(BaseModel):
+    items: List[DictResolveItem] = Field(max_length=2000, description="待解析的 (字典集, 编码)，单次最多 2000 条")
+
+
+class DictResolvedItem(BaseModel):
+    set_code: str
+    code: str
+    name: Optional[str] = Field(default=None, description="启用条目的名称；字典集或编码不存在时为空")
+
+
+class DictResolveResponse(BaseModel):
+    items: List[DictResolvedItem] = Field(description="与请求顺序一致")
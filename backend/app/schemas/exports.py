@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ExportJobOut(BaseModel):
+    job_id: int
+    status: str = Field(description="queued/running/success/failed")
+    file_name: Optional[str] = None
+    progress: Dict[str, int] = Field(default_factory=dict, description="各阶段计数：total/loaded/validated/written")
+    detail: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+    created_by: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+
+class ExportLineageItem(BaseModel):
+    export_id: int
+    export_type: str
+    status: str
+    file_name: Optional[str] = None
+    mode: Optional[str] = Field(default=None, description="full/incremental；早于增量导出功能的批次为空")
+    from_date: Optional[str] = None
+    to_date: Optional[str] = None
+    rows: Optional[int] = None
+    watermark: Optional[str] = Field(default=None, description="该批次导出后的水位（记录最后变更时间）")
+    base_export_id: Optional[int] = None
+    created_at: datetime
+
+
+class ExportPreflightGroup(BaseModel):
+    dept_code: Optional[str] = None
+    dept_name: Optional[str] = None
+    doc_code: Optional[str] = None
+    doc_name: Optional[str] = None
+    total: int = Field(description="就诊索引中的就诊数")
+    submitted: int
+    missing: int = Field(description="未生成记录")
+    draft: int = Field(description="未提交（草稿）")
+    invalid: Optional[int] = Field(default=None, description="已提交但校验不通过；未执行校验时为空")
+
+
+class ExportPreflightItem(BaseModel):
+    kind: str = Field(description="missing/draft/invalid")
+    patient_no: str
+    visit_time: datetime
+    xm: Optional[str] = None
+    dept_code: Optional[str] = None
+    doc_code: Optional[str] = None
+    dept_name: Optional[str] = None
+    doc_name: Optional[str] = None
+    record_id: Optional[int] = None
+    error_count: Optional[int] = None
+
+
+class ExportPreflightResponse(BaseModel):
+    ready: bool = Field(description="索引已同步且不存在阻断项（未执行校验时不含校验结果）")
+    total: int
+    submitted: int
+    missing: int
+    draft: int
+    invalid: Optional[int] = None
+    synced_through: Optional[datetime] = Field(default=None, description="本地就诊索引已同步到的时间点；为空表示范围内存在未同步日期")
+    groups: List[ExportPreflightGroup] = Field(default_factory=list)
+    page: int = Field(ge=1)
+    page_size: int = Field(ge=1, le=500)
+    items_total: int
+    items: List[ExportPreflightItem] = Field(default_factory=list)
@@ -8,6 +8,7 @@ class FieldValue(BaseModel):
     value: Any
     source: str = "prefill"
     readonly: bool = False
+    label: Optional[str] = Field(default=None, description="字典字段对应的名称（字典中不存在时为空）")
 
 
 class PrefillResponse(BaseModel):
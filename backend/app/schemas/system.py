@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.validation import FieldError
+
+
+class ExternalPoolStats(BaseModel):
+    name: str
+    pool_size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    connects: int = 0
+    checkouts: int = 0
+
+
+class ExternalPoolStatsResponse(BaseModel):
+    pools: List[ExternalPoolStats] = Field(default_factory=list)
+
+
+class CacheStats(BaseModel):
+    name: str
+    size: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+
+
+class CacheStatsResponse(BaseModel):
+    caches: List[CacheStats] = Field(default_factory=list)
+
+
+class DictSnapshotSetStats(BaseModel):
+    set_code: str
+    version: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    items: int
+    merged_codes: int
+
+
+class DictSearchIndexSetStats(BaseModel):
+    set_code: str
+    version: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    items: int
+    grams: int = Field(description="索引中的双字符片段数")
+
+
+class DictSearchIndexStats(BaseModel):
+    enabled: bool
+    sets: List[DictSearchIndexSetStats] = Field(default_factory=list)
+    loads: int
+    checks: int
+
+
+class DictSnapshotStatsResponse(BaseModel):
+    sets: List[DictSnapshotSetStats] = Field(default_factory=list)
+    loads: int
+    checks: int
+    search_index: Optional[DictSearchIndexStats] = None
+
+
+class ValidationRuleStats(BaseModel):
+    rule_id: str
+    section: Optional[str] = None
+    kind: Optional[str] = None
+    evaluations: int
+    failures: int = Field(description="产生的错误数")
+    total_ms: float
+    avg_us: float
+    max_us: float
+
+
+class ValidationStatsResponse(BaseModel):
+    enabled: bool = Field(description="是否正在累计统计（VALIDATION_PROFILE_ENABLED）")
+    rules_version: str
+    disabled_rules: List[str] = Field(default_factory=list)
+    calls: int = Field(description="累计校验记录次数")
+    total_ms: float
+    rules: List[ValidationRuleStats] = Field(default_factory=list)
+
+
+class ValidationProfileResponse(BaseModel):
+    record_id: int
+    total_ms: float
+    errors: List[FieldError] = Field(default_factory=list)
+    rules: List[ValidationRuleStats] = Field(default_factory=list)
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.records import (
+    DiagnosisItem,
+    HerbDetailItem,
+    MedicationSummaryReadOnly,
+    SurgeryItem,
+    TcmOperationItem,
+)
 
 
 class FieldError(BaseModel):
@@ -12,3 +21,67 @@ class FieldError(BaseModel):
     section: Optional[str] = None
     seq_no: Optional[int] = None
 
+
+class BaseInfoPatch(BaseModel):
+    """基础信息片段：字段均可省略，只校验实际传入的字段。"""
+
+    model_config = ConfigDict(extra="forbid")
+
+    username: Optional[str] = None
+    jzkh: Optional[str] = None
+    xm: Optional[str] = None
+    xb: Optional[str] = None
+    csrq: Optional[date] = None
+    hy: Optional[str] = None
+    gj: Optional[str] = None
+    mz: Optional[str] = None
+    zjlb: Optional[str] = None
+    zjhm: Optional[str] = None
+    xzz: Optional[str] = None
+    lxdh: Optional[str] = None
+    ywgms: Optional[str] = None
+    gmyw: Optional[str] = None
+    qtgms: Optional[str] = None
+    qtgmy: Optional[str] = None
+    ghsj: Optional[datetime] = None
+    bdsj: Optional[datetime] = None
+    jzsj: Optional[datetime] = None
+    jzks: Optional[str] = None
+    jzksdm: Optional[str] = None
+    jzys: Optional[str] = None
+    jzyszc: Optional[str] = None
+    jzlx: Optional[str] = None
+    fz: Optional[str] = None
+    sy: Optional[str] = None
+    mzmtbhz: Optional[str] = None
+    jzhzfj: Optional[str] = None
+    jzhzqx: Optional[str] = None
+    zyzkjsj: Optional[datetime] = None
+    hzzs: Optional[str] = None
+
+
+class RecordPayloadPatch(BaseModel):
+    """RecordPayload 的片段：未传入（null）的分区不校验；明细分区需整体传入。"""
+
+    model_config = ConfigDict(extra="forbid")
+
+    base_info: Optional[BaseInfoPatch] = None
+    diagnoses: Optional[List[DiagnosisItem]] = None
+    tcm_operations: Optional[List[TcmOperationItem]] = None
+    surgeries: Optional[List[SurgeryItem]] = None
+    herb_details: Optional[List[HerbDetailItem]] = None
+
+
+class PartialValidateRequest(BaseModel):
+    payload: RecordPayloadPatch
+    fields: Optional[List[str]] = Field(
+        default=None, description="只返回这些字段路径（如 base_info.zjhm、diagnosis.wm_main）及其子路径的错误"
+    )
+    medication_summary: Optional[MedicationSummaryReadOnly] = Field(
+        default=None, description="用药标识（只读数据）；校验中草药明细的条件必填时需要"
+    )
+
+
+class PartialValidateResponse(BaseModel):
+    sections: List[str] = Field(default_factory=list, description="本次执行校验的分区")
+    errors: List[FieldError] = Field(default_factory=list)
@@ -24,3 +24,4 @@ class VisitListResponse(BaseModel):
     page_size: int = Field(ge=1, le=200)
     total: int
     items: List[VisitListItem]
+    synced_through: Optional[datetime] = Field(default=None, description="本地就诊索引已同步到的时间点；为空表示范围内存在未同步日期")
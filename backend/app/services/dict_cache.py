@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Generic, Iterable, Optional, TypeVar
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, get_settings
+from app.models.dict import DictItem, DictSet
+
+logger = logging.getLogger(__name__)
+
+# (dict_set.version, dict_set.updated_at)；字典集不存在时为 None
+VersionToken = Optional[tuple[Optional[str], Optional[datetime]]]
+
+T = TypeVar("T")
+
+
+def token_etag(set_code: str, token: VersionToken) -> str:
+    """由字典集版本信息生成强 ETag（带引号）；版本或更新时间变化即变化。"""
+    version, updated_at = token if token is not None else (None, None)
+    raw = f"{set_code}:{version or ''}@{updated_at.isoformat() if updated_at else ''}"
+    return f'"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+
+
+def read_set_token(db: Session, set_code: str) -> VersionToken:
+    row = db.execute(select(DictSet.version, DictSet.updated_at).where(DictSet.set_code == set_code)).first()
+    return (row[0], row[1]) if row is not None else None
+
+
+def _norm(code: str) -> str:
+    # 与业务库 utf8mb4_general_ci 的比较语义保持一致：不区分大小写、忽略尾部空格
+    return str(code).rstrip(" ").casefold()
+
+
+@dataclass(frozen=True)
+class DictSetSnapshot:
+    """单个字典集的只读快照（仅包含启用状态的条目）。"""
+
+    set_code: str
+    token: VersionToken
+    names: dict[str, str] = field(default_factory=dict)
+    merged_codes: frozenset[str] = frozenset()
+
+    def exists(self, code: str, *, allow_merged: bool = False) -> bool:
+        key = _norm(code)
+        return key in self.names or (allow_merged and key in self.merged_codes)
+
+    def name(self, code: str) -> Optional[str]:
+        return self.names.get(_norm(code))
+
+
+class DictSnapshot:
+    """按 set_code 组织的快照集合；固定后不再访问数据库，可在线程/进程间共享。"""
+
+    def __init__(self, sets: Optional[dict[str, DictSetSnapshot]] = None) -> None:
+        self.sets: dict[str, DictSetSnapshot] = dict(sets or {})
+
+    def _get(self, set_code: str) -> Optional[DictSetSnapshot]:
+        return self.sets.get(set_code)
+
+    def exists(self, set_code: str, code: str, *, allow_merged: bool = False) -> bool:
+        snap = self._get(set_code)
+        return snap is not None and snap.exists(code, allow_merged=allow_merged)
+
+    def name(self, set_code: str, code: str) -> Optional[str]:
+        snap = self._get(set_code)
+        return snap.name(code) if snap is not None else None
+
+    def version(self) -> str:
+        """快照整体版本标识（用于校验结果缓存等场景）。"""
+        parts = []
+        for set_code in sorted(self.sets):
+            token = self.sets[set_code].token
+            if token is None:
+                parts.append(f"{set_code}:-")
+            else:
+                version, updated_at = token
+                parts.append(f"{set_code}:{version or ''}@{updated_at.isoformat() if updated_at else ''}")
+        return ";".join(parts)
+
+
+class VersionedSetStore(ABC, Generic[T]):
+    """按字典集懒加载的进程级缓存：定期比对 dict_set 的 version/updated_at，版本变化时调用 _load 重建。
+
+    不存在的字典集不缓存（返回 _empty 的结果），避免任意 set_code 的请求使缓存无限增长。
+    """
+
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self.settings = settings or get_settings()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._sets: dict[str, T] = {}
+        # set_code -> 上次比对版本的时间 / 加载时间（monotonic）
+        self._checked_at: dict[str, float] = {}
+        self._loaded_at: dict[str, float] = {}
+        self._loads = 0
+        self._checks = 0
+
+    def get(self, db: Session, set_code: str) -> T:
+        now = time.monotonic()
+        snap = self._sets.get(set_code)
+        if snap is not None and not self._is_due(set_code, now):
+            return snap
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(set_code, threading.Lock())
+        # 同一字典集同时只有一个请求做版本比对/重载，其余等待后复用结果
+        with load_lock:
+            now = time.monotonic()
+            snap = self._sets.get(set_code)
+            if snap is not None and not self._is_due(set_code, now):
+                return snap
+
+            token = self._read_token(db, set_code)
+            self._checks += 1
+            if token is None:
+                # 字典集不存在（或已删除）：丢弃旧条目，不缓存空结果
+                self.invalidate(set_code)
+                return self._empty(set_code)
+            max_age = self.settings.dict_cache_max_age_seconds
+            expired = max_age > 0 and now - self._loaded_at.get(set_code, now) >= max_age
+            if snap is None or snap.token != token or expired:
+                snap = self._load(db, set_code, token)
+                with self._lock:
+                    self._sets[set_code] = snap
+                    self._loaded_at[set_code] = now
+                    self._loads += 1
+            self._checked_at[set_code] = now
+            return snap
+
+    def invalidate(self, set_code: Optional[str] = None) -> None:
+        # 正在使用的加载锁由持有方保留引用，这里移除后下次请求重新创建
+        with self._lock:
+            if set_code is None:
+                self._sets.clear()
+                self._checked_at.clear()
+                self._loaded_at.clear()
+                self._load_locks.clear()
+            else:
+                self._sets.pop(set_code, None)
+                self._checked_at.pop(set_code, None)
+                self._loaded_at.pop(set_code, None)
+                self._load_locks.pop(set_code, None)
+
+    def _is_due(self, set_code: str, now: float) -> bool:
+        checked_at = self._checked_at.get(set_code)
+        return checked_at is None or now - checked_at >= self.settings.dict_cache_check_seconds
+
+    @staticmethod
+    def _read_token(db: Session, set_code: str) -> VersionToken:
+        return read_set_token(db, set_code)
+
+    @abstractmethod
+    def _load(self, db: Session, set_code: str, token: VersionToken) -> T:
+        """加载已存在字典集（token 不为 None）的启用条目。"""
+
+    @abstractmethod
+    def _empty(self, set_code: str) -> T:
+        """不存在的字典集对应的空结果（不缓存）。"""
+
+
+class DictSnapshotStore(VersionedSetStore[DictSetSnapshot]):
+    """进程级字典快照：按字典集懒加载，定期比对 dict_set 的 version/updated_at 决定是否重载。"""
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.dict_cache_enabled
+
+    def pin(self, db: Session, set_codes: Iterable[str]) -> DictSnapshot:
+        """取一组字典集的当前快照，之后的查找不再访问数据库。"""
+        return DictSnapshot({code: self.get(db, code) for code in set_codes})
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "sets": [
+                    {
+                        "set_code": code,
+                        "version": snap.token[0] if snap.token else None,
+                        "updated_at": snap.token[1] if snap.token else None,
+                        "items": len(snap.names),
+                        "merged_codes": len(snap.merged_codes),
+                    }
+                    for code, snap in sorted(self._sets.items())
+                ],
+                "loads": self._loads,
+                "checks": self._checks,
+            }
+
+    def _load(self, db: Session, set_code: str, token: VersionToken) -> DictSetSnapshot:
+        names: dict[str, str] = {}
+        merged: set[str] = set()
+        stmt = (
+            select(DictItem.code, DictItem.name, DictItem.merged_code)
+            .where(DictItem.set_code == set_code, DictItem.status == 1)
+            .order_by(DictItem.sort_no.asc(), DictItem.id.asc())
+        )
+        for code, name, merged_code in db.execute(stmt):
+            names.setdefault(_norm(code), name)
+            if merged_code:
+                merged.add(_norm(merged_code))
+        logger.info("Dict snapshot loaded: set=%s items=%s token=%s", set_code, len(names), token)
+        return DictSetSnapshot(set_code=set_code, token=token, names=names, merged_codes=frozenset(merged))
+
+    def _empty(self, set_code: str) -> DictSetSnapshot:
+        return DictSetSnapshot(set_code=set_code, token=None)
+
+
+def load_dict_subset(db: Session, set_code: str, codes: Iterable[str], *, chunk_size: int = 500) -> DictSetSnapshot:
+    """只加载指定编码（按 code 或 merged_code 命中）的启用条目，供关闭快照时的批量校验使用。"""
+    names: dict[str, str] = {}
+    merged: set[str] = set()
+    code_list = sorted(set(codes))
+    for offset in range(0, len(code_list), chunk_size):
+        chunk = code_list[offset : offset + chunk_size]
+        stmt = (
+            select(DictItem.code, DictItem.name, DictItem.merged_code)
+            .where(
+                DictItem.set_code == set_code,
+                DictItem.status == 1,
+                or_(DictItem.code.in_(chunk), DictItem.merged_code.in_(chunk)),
+            )
+            .order_by(DictItem.sort_no.asc(), DictItem.id.asc())
+        )
+        for code, name, merged_code in db.execute(stmt):
+            names.setdefault(_norm(code), name)
+            if merged_code:
+                merged.add(_norm(merged_code))
+    return DictSetSnapshot(set_code=set_code, token=None, names=names, merged_codes=frozenset(merged))
+
+
+def read_dict_version(db: Session, set_codes: Iterable[str]) -> str:
+    """直接读取 dict_set 的版本信息，格式与 DictSnapshot.version() 一致（不加载字典条目）。"""
+    set_codes = list(set_codes)
+    rows = db.execute(
+        select(DictSet.set_code, DictSet.version, DictSet.updated_at).where(DictSet.set_code.in_(set_codes))
+    ).all()
+    tokens = {set_code: (version, updated_at) for set_code, version, updated_at in rows}
+    return DictSnapshot({code: DictSetSnapshot(set_code=code, token=tokens.get(code)) for code in set_codes}).version()
+
+
+class DictLookup:
+    """ValidationService 使用的字典查找：默认走进程级快照，关闭缓存时逐条查询数据库。"""
+
+    def __init__(self, db: Session, store: Optional[DictSnapshotStore] = None) -> None:
+        self.db = db
+        self.store = store or get_dict_store()
+
+    def exists(self, set_code: str, code: str, *, allow_merged: bool = False) -> bool:
+        if self.store.enabled:
+            return self.store.get(self.db, set_code).exists(code, allow_merged=allow_merged)
+        stmt = select(DictItem.id).where(DictItem.set_code == set_code, DictItem.status == 1)
+        if allow_merged:
+            stmt = stmt.where(or_(DictItem.code == code, DictItem.merged_code == code))
+        else:
+            stmt = stmt.where(DictItem.code == code)
+        return self.db.execute(stmt.limit(1)).first() is not None
+
+    def name(self, set_code: str, code: str) -> Optional[str]:
+        if self.store.enabled:
+            return self.store.get(self.db, set_code).name(code)
+        stmt = select(DictItem.name).where(DictItem.set_code == set_code, DictItem.status == 1, DictItem.code == code)
+        return self.db.execute(stmt.limit(1)).scalar_one_or_none()
+
+
+class DictResolver:
+    """批量解析 (字典集, 编码) -> 名称：按字典集分组，默认走进程级快照，关闭缓存时每个字典集一次批量查询。"""
+
+    def __init__(self, db: Session, store: Optional[DictSnapshotStore] = None) -> None:
+        self.db = db
+        self.store = store or get_dict_store()
+
+    def resolve(self, pairs: Iterable[tuple[str, Any]]) -> dict[tuple[str, str], Optional[str]]:
+        """返回 {(set_code, code): name}；空编码不参与解析，字典中不存在的编码名称为 None。"""
+        wanted: dict[str, set[str]] = {}
+        for set_code, code in pairs:
+            if set_code and code is not None and str(code).strip():
+                wanted.setdefault(set_code, set()).add(str(code))
+        names: dict[tuple[str, str], Optional[str]] = {}
+        if not wanted:
+            return names
+        # 请求中的 set_code 由客户端提供：先一次查询过滤掉不存在的字典集，其编码名称均为 None
+        known = set(self.db.execute(select(DictSet.set_code).where(DictSet.set_code.in_(list(wanted)))).scalars())
+        for set_code, codes in wanted.items():
+            if set_code not in known:
+                names.update(((set_code, code), None) for code in codes)
+                continue
+            if self.store.enabled:
+                snap = self.store.get(self.db, set_code)
+            else:
+                snap = load_dict_subset(self.db, set_code, codes)
+            for code in codes:
+                names[(set_code, code)] = snap.name(code)
+        return names
+
+
+@lru_cache(maxsize=1)
+def get_dict_store() -> DictSnapshotStore:
+    return DictSnapshotStore(get_settings())
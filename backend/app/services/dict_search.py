@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import logging
+import re
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.dict import DictItem
+from app.schemas.dicts import DictItemOut
+from app.services.dict_cache import VersionedSetStore, VersionToken
+
+logger = logging.getLogger(__name__)
+
+# 各检索字段在拼接串中的分隔符（不参与 n-gram）；相关度：编码完全一致 > 编码前缀 > 名称/拼音/首字母前缀 > 其余子串
+_SEP = "\x00"
+_MAX_CHAR = chr(0x10FFFF)
+_PINYIN_SPLIT = re.compile(r"[\s'’,，;；/|-]+")
+
+
+def _fold(value: Optional[str]) -> str:
+    # 与业务库 utf8mb4_general_ci 的 LIKE 语义保持一致：不区分大小写
+    return (value or "").strip().casefold()
+
+
+def pinyin_initials(pinyin: Optional[str]) -> str:
+    """由分隔的拼音取首字母（如 "gan mao" -> "gm"）；未分隔的拼音无法切分，返回空串。"""
+    parts = [part for part in _PINYIN_SPLIT.split(_fold(pinyin)) if part]
+    return "".join(part[0] for part in parts) if len(parts) > 1 else ""
+
+
+def _grams(*texts: str) -> set[str]:
+    """单字与双字符片段：单字查询直接取倒排表，多字查询取最短的双字符倒排表再核对子串。"""
+    grams: set[str] = set()
+    for text in texts:
+        grams.update(text)
+        grams.update(map(str.__add__, text, text[1:]))
+    return grams
+
+
+@dataclass(frozen=True)
+class _PrefixTable:
+    """按值排序的 (值, 条目下标) 表，二分查找前缀区间。"""
+
+    keys: tuple[str, ...] = ()
+    positions: tuple[int, ...] = ()
+
+    @classmethod
+    def build(cls, pairs: list[tuple[str, int]]) -> "_PrefixTable":
+        pairs = sorted(pair for pair in pairs if pair[0])
+        return cls(keys=tuple(key for key, _ in pairs), positions=tuple(pos for _, pos in pairs))
+
+    def lookup(self, prefix: str) -> list[int]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _MAX_CHAR, lo)
+        return list(self.positions[lo:hi])
+
+
+@dataclass(frozen=True)
+class DictSearchIndex:
+    """单个字典集的检索索引（仅启用条目，按 sort_no/code 排序）；构建后只读，可在线程间共享。"""
+
+    set_code: str
+    token: VersionToken
+    items: tuple[DictItemOut, ...] = ()
+    # 规范化后的编码 / 合并编码（小写）
+    codes: tuple[str, ...] = ()
+    merged_codes: tuple[str, ...] = ()
+    # "编码\0合并编码\0名称\0拼音\0首字母"，用于核对子串
+    haystacks: tuple[str, ...] = ()
+    # 单字/双字符 -> 含该片段的条目下标（升序）
+    grams: dict[str, array] = field(default_factory=dict)
+    # 编码与合并编码的前缀表；名称、拼音、拼音首字母的前缀表
+    code_prefixes: _PrefixTable = _PrefixTable()
+    text_prefixes: _PrefixTable = _PrefixTable()
+
+    @classmethod
+    def build(cls, set_code: str, token: VersionToken, rows: list[Any]) -> "DictSearchIndex":
+        items: list[DictItemOut] = []
+        codes: list[str] = []
+        merged_codes: list[str] = []
+        haystacks: list[str] = []
+        code_pairs: list[tuple[str, int]] = []
+        text_pairs: list[tuple[str, int]] = []
+        postings: defaultdict[str, list[int]] = defaultdict(list)
+        for pos, (code, name, extra_code, merged_code, pinyin, pinyin_abbr) in enumerate(rows):
+            items.append(DictItemOut(code=code, name=name, extra_code=extra_code, merged_code=merged_code))
+            # 导入时已生成首字母（pinyin_abbr）的条目直接使用，历史数据回退为由分隔拼音推导
+            initials = _fold(pinyin_abbr) or pinyin_initials(pinyin)
+            fields = (_fold(code), _fold(merged_code), _fold(name), _fold(pinyin), initials)
+            codes.append(fields[0])
+            merged_codes.append(fields[1])
+            haystacks.append(_SEP.join(fields))
+            code_pairs.extend((value, pos) for value in fields[:2])
+            text_pairs.extend((value, pos) for value in fields[2:])
+            for gram in _grams(*fields):
+                postings[gram].append(pos)
+        return cls(
+            set_code=set_code,
+            token=token,
+            items=tuple(items),
+            codes=tuple(codes),
+            merged_codes=tuple(merged_codes),
+            haystacks=tuple(haystacks),
+            grams={gram: array("I", hits) for gram, hits in postings.items()},
+            code_prefixes=_PrefixTable.build(code_pairs),
+            text_prefixes=_PrefixTable.build(text_pairs),
+        )
+
+    def _matches(self, query: str) -> Sequence[int]:
+        if len(query) == 1:
+            return self.grams.get(query, ())
+        postings = []
+        for gram in set(map(str.__add__, query, query[1:])):
+            hits = self.grams.get(gram)
+            if hits is None:
+                return ()
+            postings.append(hits)
+        # 取最短的倒排表逐条核对子串，避免多表求交
+        haystacks = self.haystacks
+        return [pos for pos in min(postings, key=len) if query in haystacks[pos]]
+
+    def search(self, query: str, *, offset: int = 0, limit: int = 20) -> tuple[int, list[DictItemOut]]:
+        """返回 (命中总数, 当前页条目)；关键字为空时按原顺序分页。"""
+        query = _fold(query)
+        end = offset + limit
+        if not query:
+            return len(self.items), list(self.items[offset:end])
+        matched = self._matches(query)
+        if not matched:
+            return 0, []
+
+        # 各档内按下标升序（即 sort_no/code 顺序）；前面的档位已够当前页时不再计算后续档位
+        code_hits = sorted(set(self.code_prefixes.lookup(query)))
+        exact = {pos for pos in code_hits if self.codes[pos] == query or self.merged_codes[pos] == query}
+        ranked = sorted(exact) + [pos for pos in code_hits if pos not in exact] if exact else code_hits
+        if len(ranked) < end:
+            taken = set(code_hits)
+            prefix_hits = sorted({pos for pos in self.text_prefixes.lookup(query) if pos not in taken})
+            ranked = ranked + prefix_hits
+            if len(ranked) < end:
+                taken.update(prefix_hits)
+                ranked += [pos for pos in matched if pos not in taken]
+        return len(matched), [self.items[pos] for pos in ranked[offset:end]]
+
+
+class DictSearchStore(VersionedSetStore[DictSearchIndex]):
+    """进程级字典检索索引：与字典快照相同的版本比对策略，dict_set 版本变化后重建。"""
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.dict_search_index_enabled
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "sets": [
+                    {
+                        "set_code": code,
+                        "version": index.token[0] if index.token else None,
+                        "updated_at": index.token[1] if index.token else None,
+                        "items": len(index.items),
+                        "grams": len(index.grams),
+                    }
+                    for code, index in sorted(self._sets.items())
+                ],
+                "loads": self._loads,
+                "checks": self._checks,
+            }
+
+    def _load(self, db: Session, set_code: str, token: VersionToken) -> DictSearchIndex:
+        stmt = (
+            select(
+                DictItem.code,
+                DictItem.name,
+                DictItem.extra_code,
+                DictItem.merged_code,
+                DictItem.pinyin,
+                DictItem.pinyin_abbr,
+            )
+            .where(DictItem.set_code == set_code, DictItem.status == 1)
+            .order_by(DictItem.sort_no.asc(), DictItem.code.asc(), DictItem.id.asc())
+        )
+        index = DictSearchIndex.build(set_code, token, db.execute(stmt).all())
+        logger.info("Dict search index built: set=%s items=%s token=%s", set_code, len(index.items), token)
+        return index
+
+    def _empty(self, set_code: str) -> DictSearchIndex:
+        return DictSearchIndex(set_code=set_code, token=None)
+
+
+@lru_cache(maxsize=1)
+def get_dict_search_store() -> DictSearchStore:
+    return DictSearchStore(get_settings())
@@ -1,19 +1,56 @@
 from __future__ import annotations
 
-from typing import Optional
+import hashlib
+from dataclasses import dataclass
+from typing import Optional, Union
 
 from fastapi import status
 from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
 
+from app.core.config import Settings, get_settings
 from app.core.errors import AppError
 from app.models.dict import DictItem, DictSet
-from app.schemas.dicts import DictItemOut, DictSearchResponse
+from app.schemas.dicts import (
+    DictItemOut,
+    DictManifestItem,
+    DictManifestResponse,
+    DictResolvedItem,
+    DictResolveRequest,
+    DictResolveResponse,
+    DictSearchResponse,
+    DictSetItemsResponse,
+)
+from app.services.dict_cache import DictResolver, VersionToken, read_set_token, token_etag
+from app.services.dict_search import DictSearchStore, get_dict_search_store
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中当前 ETag（支持多个值、"*" 与弱校验前缀 W/）。"""
+    if not if_none_match:
+        return False
+    for value in if_none_match.split(","):
+        value = value.strip()
+        if value == "*" or value.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """带 ETag 的响应内容；body 为 None 表示客户端缓存仍然有效（304）。"""
+
+    etag: str
+    body: Optional[Union[DictSetItemsResponse, DictManifestResponse]] = None
 
 
 class DictService:
-    def __init__(self, db: Session) -> None:
+    def __init__(
+        self, db: Session, search_store: Optional[DictSearchStore] = None, settings: Optional[Settings] = None
+    ) -> None:
         self.db = db
+        self.search_store = search_store or get_dict_search_store()
+        self.settings = settings or get_settings()
 
     def search(
         self, *, set_code: str, query: str = "", page: int = 1, page_size: int = 20
@@ -21,21 +58,26 @@ class DictService:
         set_code = set_code.strip()
         if not set_code:
             raise AppError(code="validation_failed", message="set_code 不能为空", http_status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        query = (query or "").strip()
+        if self.search_store.enabled:
+            return self._search_index(set_code=set_code, query=query, page=page, page_size=page_size)
 
         exists = self.db.execute(select(DictSet.set_code).where(DictSet.set_code == set_code)).first()
         if not exists:
             raise AppError(code="not_found", message="字典集不存在", http_status=status.HTTP_404_NOT_FOUND)
 
-        query = (query or "").strip()
         conditions = [DictItem.set_code == set_code, DictItem.status == 1]
         if query:
             like = f"%{query}%"
+            # 全拼/首字母只做前缀匹配，可走 (set_code, pinyin) / (set_code, pinyin_abbr) 索引
+            prefix = f"{query}%"
             conditions.append(
                 or_(
                     DictItem.code.like(like),
                     DictItem.name.like(like),
                     DictItem.merged_code.like(like),
-                    DictItem.pinyin.like(like),
+                    DictItem.pinyin.like(prefix),
+                    DictItem.pinyin_abbr.like(prefix),
                 )
             )
 
@@ -60,3 +102,106 @@ class DictService:
             ],
         )
 
+    def _search_index(self, *, set_code: str, query: str, page: int, page_size: int) -> DictSearchResponse:
+        """走进程内检索索引：按相关度排序（编码完全一致 > 前缀 > 子串），同档内保持 sort_no/code 顺序。"""
+        index = self.search_store.get(self.db, set_code)
+        if index.token is None:
+            raise AppError(code="not_found", message="字典集不存在", http_status=status.HTTP_404_NOT_FOUND)
+        total, items = index.search(query, offset=(page - 1) * page_size, limit=page_size)
+        return DictSearchResponse(
+            set_code=set_code, query=query, page=page, page_size=page_size, total=total, items=items
+        )
+
+    def download(self, *, set_code: str, if_none_match: Optional[str] = None) -> CachedPayload:
+        """整集下载：ETag 只依赖 dict_set 的版本信息，命中时不读取字典条目。"""
+        set_code = set_code.strip()
+        token = read_set_token(self.db, set_code)
+        if token is None:
+            raise AppError(code="not_found", message="字典集不存在", http_status=status.HTTP_404_NOT_FOUND)
+        etag = token_etag(set_code, token)
+        if etag_matches(if_none_match, etag):
+            return CachedPayload(etag=etag)
+
+        max_items = self.settings.dict_download_max_items
+        items = self._download_items(set_code, token, max_items)
+        if len(items) > max_items:
+            raise AppError(
+                code="validation_failed",
+                message="字典集条目过多，请使用分页检索",
+                http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"set_code": set_code, "max_items": max_items},
+            )
+        return CachedPayload(
+            etag=etag,
+            body=DictSetItemsResponse(
+                set_code=set_code,
+                version=token[0],
+                updated_at=token[1],
+                etag=etag,
+                items=[[item.code, item.name, item.extra_code, item.merged_code] for item in items],
+            ),
+        )
+
+    def _download_items(self, set_code: str, token: VersionToken, max_items: int) -> list[DictItemOut]:
+        # 检索索引与当前版本一致时直接复用其条目，否则查库（多取一条用于判断是否超限）
+        if self.search_store.enabled:
+            index = self.search_store.get(self.db, set_code)
+            if index.token == token:
+                return list(index.items[: max_items + 1])
+        stmt = (
+            select(DictItem.code, DictItem.name, DictItem.extra_code, DictItem.merged_code)
+            .where(DictItem.set_code == set_code, DictItem.status == 1)
+            .order_by(DictItem.sort_no.asc(), DictItem.code.asc())
+            .limit(max_items + 1)
+        )
+        return [
+            DictItemOut(code=code, name=name, extra_code=extra_code, merged_code=merged_code)
+            for code, name, extra_code, merged_code in self.db.execute(stmt)
+        ]
+
+    def manifest(self, *, set_codes: Optional[list[str]] = None, if_none_match: Optional[str] = None) -> CachedPayload:
+        """字典集清单：各集版本与 ETag，前端据此只重新下载版本变化的字典集。"""
+        stmt = select(DictSet.set_code, DictSet.set_name, DictSet.version, DictSet.updated_at).order_by(DictSet.set_code)
+        if set_codes:
+            stmt = stmt.where(DictSet.set_code.in_(set_codes))
+        rows = self.db.execute(stmt).all()
+        max_items = self.settings.dict_download_max_items
+        etags = {row.set_code: token_etag(row.set_code, (row.version, row.updated_at)) for row in rows}
+        raw = ";".join(f"{code}={etag}" for code, etag in etags.items()) + f";max={max_items}"
+        etag = f'"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+        if etag_matches(if_none_match, etag):
+            return CachedPayload(etag=etag)
+
+        count_stmt = select(DictItem.set_code, func.count()).where(DictItem.status == 1).group_by(DictItem.set_code)
+        if set_codes:
+            count_stmt = count_stmt.where(DictItem.set_code.in_(set_codes))
+        counts = {code: int(count) for code, count in self.db.execute(count_stmt)}
+        return CachedPayload(
+            etag=etag,
+            body=DictManifestResponse(
+                etag=etag,
+                max_items=max_items,
+                sets=[
+                    DictManifestItem(
+                        set_code=row.set_code,
+                        set_name=row.set_name,
+                        version=row.version,
+                        updated_at=row.updated_at,
+                        etag=etags[row.set_code],
+                        items=counts.get(row.set_code, 0),
+                        downloadable=counts.get(row.set_code, 0) <= max_items,
+                    )
+                    for row in rows
+                ],
+            ),
+        )
+
+    def resolve(self, request: DictResolveRequest) -> DictResolveResponse:
+        pairs = [(item.set_code.strip(), item.code.strip()) for item in request.items]
+        names = DictResolver(self.db).resolve(pairs)
+        return DictResolveResponse(
+            items=[
+                DictResolvedItem(set_code=set_code, code=code, name=names.get((set_code, code)))
+                for set_code, code in pairs
+            ]
+        )
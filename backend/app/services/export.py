@@ -1,24 +1,41 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import logging
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
-from decimal import Decimal
 from pathlib import Path
-from tempfile import NamedTemporaryFile
-from typing import Any, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from fastapi import status
-from openpyxl import Workbook, load_workbook
 from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
+from app.core.config import Settings, get_settings
 from app.core.errors import AppError
 from app.models.export_log import ExportLog
 from app.models.record import Record
 from app.schemas.auth import SessionPayload
+from app.services.export_parallel import validate_and_build_parallel
+from app.services.export_rows import ExportColumnPlan
+from app.services.export_template import TEMPLATE_SHEET, default_template_path, get_template_headers
 from app.services.external import ExternalDataAdapter
+from app.services.record_loading import record_load_options
 from app.services.utils import clean_value, first_value
+from app.services.tabular_stream import iter_csv, iter_parquet
 from app.services.validation import ValidationService
+from app.services.xlsx_stream import iter_xlsx
+
+logger = logging.getLogger(__name__)
+
+# 异步导出任务在导出日志中的类型（与文件格式无关，格式记录在 detail.format）
+JOB_EXPORT_TYPE = "xlsx_job"
+
+# 导出格式 -> 响应 Content-Type
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
 
 
 def _date_range_to_window(from_date: date, to_date: date) -> tuple[datetime, datetime]:
@@ -29,27 +46,6 @@ def _date_range_to_window(from_date: date, to_date: date) -> tuple[datetime, dat
     return from_dt, to_dt
 
 
-def _fmt_date(value: Any) -> Optional[str]:
-    if value is None:
-        return None
-    if isinstance(value, datetime):
-        return value.strftime("%Y-%m-%d %H:%M:%S")
-    if isinstance(value, date):
-        return value.strftime("%Y-%m-%d")
-    return str(value)
-
-
-def _quote_en(value: Any) -> Optional[str]:
-    text = clean_value(value)
-    if text is None:
-        return None
-    s = str(text)
-    if s.startswith('"') and s.endswith('"') and len(s) >= 2:
-        return s
-    s = s.replace('"', '""')
-    return f"\"{s}\""
-
-
 def _unique_preserve_order(values: list[str]) -> list[str]:
     seen: set[str] = set()
     result: list[str] = []
@@ -66,116 +62,171 @@ def _get_patient_no(row: dict[str, Any]) -> Optional[str]:
     return clean_value(value)
 
 
-def _fee_attr_for_code(code: str) -> str:
-    # 兼容历史字段命名：BDBLZPF/QDBLZPF 在业务侧字段名为 bdbblzpf/qdbblzpf
-    if code == "ZYL_ZYZD":
-        return "zyl_zyzd"
-    if code == "BDBLZPF":
-        return "bdbblzpf"
-    if code == "QDBLZPF":
-        return "qdbblzpf"
-    return code.lower()
+def report_file_name(
+    from_date: date, to_date: date, export_format: str = "xlsx", since_export_id: Optional[int] = None
+) -> str:
+    suffix = f"_since{since_export_id}" if since_export_id is not None else ""
+    return f"mz_mfp_report_{from_date.isoformat()}_{to_date.isoformat()}{suffix}.{export_format}"
+
+
+def ensure_export_format(export_format: str) -> str:
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise AppError(
+            code="validation_failed",
+            message="不支持的导出格式",
+            http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"format": export_format, "allowed": list(EXPORT_MEDIA_TYPES)},
+        )
+    return export_format
+
+
+# 报表类导出（同步导出按格式记录，异步任务统一为 JOB_EXPORT_TYPE），可作为增量导出的基准
+_REPORT_EXPORT_TYPES = frozenset({*EXPORT_MEDIA_TYPES, JOB_EXPORT_TYPE})
+
+
+class ExportBlocked(Exception):
+    """范围内数据不满足导出条件（缺失/未提交/校验失败）。"""
+
+    def __init__(self, *, log_message: str, log_detail: dict[str, Any], error: AppError) -> None:
+        super().__init__(log_message)
+        self.log_message = log_message
+        self.log_detail = log_detail
+        self.error = error
+
+
+def _change_time(updated_at: Optional[datetime], submitted_at: Optional[datetime]) -> Optional[datetime]:
+    # 记录最后变更时间：保存/提交都会更新 updated_at，submitted_at 兜底
+    values = [v for v in (updated_at, submitted_at) if v is not None]
+    return max(values) if values else None
+
+
+@dataclass(frozen=True)
+class IncrementalBase:
+    """增量导出的基准批次：水位为该批次覆盖到的记录最后变更时间，boundary 为恰在水位时刻已导出的记录版本。"""
+
+    export_id: int
+    root_export_id: int
+    watermark: Optional[datetime]
+    boundary: dict[int, int] = field(default_factory=dict)
+
+    def covers(self, record_id: int, version: int, changed_at: Optional[datetime]) -> bool:
+        """该记录的当前版本是否已包含在基准批次（及其之前的批次）中。"""
+        if self.watermark is None or changed_at is None:
+            return False
+        if changed_at < self.watermark:
+            return True
+        return changed_at == self.watermark and self.boundary.get(record_id) == version
+
+
+def _advance_watermark(states: list[Any], base: Optional[IncrementalBase]) -> tuple[Optional[datetime], dict[int, int]]:
+    """本批次导出后的水位：范围内记录最后变更时间的最大值（不低于基准水位），及恰在该时刻的记录版本。"""
+    watermark = base.watermark if base is not None else None
+    boundary = dict(base.boundary) if base is not None else {}
+    for state in states:
+        changed_at = _change_time(state.updated_at, state.submitted_at)
+        if changed_at is None:
+            continue
+        if watermark is None or changed_at > watermark:
+            watermark = changed_at
+            boundary = {state.id: state.version}
+        elif changed_at == watermark:
+            boundary[state.id] = state.version
+    return watermark, boundary
+
+
+@dataclass(frozen=True)
+class PreparedExport:
+    """通过准入检查、待写出的记录（按外部就诊顺序）；并行模式下 rows 为已构造好的行。
+
+    watermark/boundary 为本批次导出后的水位，写入导出日志供下一次增量导出使用。
+    """
+
+    records: list[Record]
+    rows: Optional[list[list[Any]]] = None
+    watermark: Optional[datetime] = None
+    boundary: dict[int, int] = field(default_factory=dict)
+    base: Optional[IncrementalBase] = None
+
+    def lineage(self) -> dict[str, Any]:
+        return {
+            "mode": "incremental" if self.base is not None else "full",
+            "base_export_id": self.base.export_id if self.base is not None else None,
+            "root_export_id": self.base.root_export_id if self.base is not None else None,
+            "watermark": self.watermark.isoformat() if self.watermark is not None else None,
+            "boundary": {str(record_id): version for record_id, version in self.boundary.items()},
+        }
 
 
 @dataclass(frozen=True)
 class ExportResult:
     filename: str
-    content: bytes
+    media_type: str
+    # 文件内容分段迭代器：校验全部通过后才构造，迭代时逐行生成
+    chunks: Iterator[bytes]
 
 
 class ExportService:
-    def __init__(self, db: Session, external: ExternalDataAdapter) -> None:
+    def __init__(self, db: Session, external: ExternalDataAdapter, settings: Optional[Settings] = None) -> None:
         self.db = db
         self.external = external
-        project_root = Path(__file__).resolve().parents[3]
-        self._template_path = project_root / "3、中医门（急）诊诊疗信息页数据上传模板.xlsx"
-        self._template_sheet = "门（急）诊诊疗数据上传表头"
+        self.settings = settings or get_settings()
+        self._template_path = default_template_path()
+        self._template_sheet = TEMPLATE_SHEET
 
-    def export_report(self, *, from_date: date, to_date: date, session: SessionPayload) -> ExportResult:
+    def export_report(
+        self,
+        *,
+        from_date: date,
+        to_date: date,
+        session: SessionPayload,
+        export_format: str = "xlsx",
+        csv_bom: bool = True,
+        since_export_id: Optional[int] = None,
+    ) -> ExportResult:
         self._ensure_export_role(session)
+        ensure_export_format(export_format)
+        base = (
+            self.resolve_incremental_base(since_export_id, from_date=from_date, to_date=to_date)
+            if since_export_id is not None
+            else None
+        )
 
         operator = session.doc_code or session.login_name
-        from_dt, to_dt = _date_range_to_window(from_date, to_date)
-        file_name = f"mz_mfp_report_{from_date.isoformat()}_{to_date.isoformat()}.xlsx"
+        file_name = report_file_name(from_date, to_date, export_format, since_export_id)
+        period = {"from": from_date.isoformat(), "to": to_date.isoformat()}
+        if since_export_id is not None:
+            period["since"] = since_export_id
 
         try:
-            expected_patient_nos = self._fetch_patient_nos(from_dt=from_dt, to_dt=to_dt)
-            if not expected_patient_nos:
-                content = self._build_xlsx_bytes([], file_name=file_name)
-                self._log_export(
-                    status_="success",
-                    created_by=operator,
-                    file_name=file_name,
-                    detail={"from": from_date.isoformat(), "to": to_date.isoformat(), "rows": 0},
-                )
-                self.db.commit()
-                return ExportResult(filename=file_name, content=content)
-
-            records = self._load_records(expected_patient_nos)
-            by_patient = {r.patient_no: r for r in records}
-            missing = [pn for pn in expected_patient_nos if pn not in by_patient]
-            not_submitted = [pn for pn in expected_patient_nos if pn in by_patient and by_patient[pn].status != "submitted"]
-            if missing or not_submitted:
-                self._log_export(
-                    status_="failed",
-                    created_by=operator,
-                    file_name=file_name,
-                    error_message="存在未提交或未生成记录，阻断导出",
-                    detail={"from": from_date.isoformat(), "to": to_date.isoformat(), "missing": len(missing), "not_submitted": len(not_submitted)},
-                )
-                self.db.commit()
-                raise AppError(
-                    code="validation_failed",
-                    message="导出阻断：范围内存在未提交/缺失记录",
-                    http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail={"missing": missing, "not_submitted": not_submitted},
-                )
-
-            # 再次执行全量校验（规则可能迭代）
-            validator = ValidationService(self.db)
-            bad: list[dict[str, Any]] = []
-            for pn in expected_patient_nos:
-                rec = by_patient[pn]
-                errs = validator.validate_for_submit(rec)
-                if errs:
-                    bad.append(
-                        {
-                            "patient_no": pn,
-                            "record_id": rec.id,
-                            "errors": [e.model_dump() for e in errs],
-                        }
-                    )
-            if bad:
-                self._log_export(
-                    status_="failed",
-                    created_by=operator,
-                    file_name=file_name,
-                    error_message="校验失败，阻断导出",
-                    detail={"from": from_date.isoformat(), "to": to_date.isoformat(), "bad_records": len(bad)},
-                )
-                self.db.commit()
-                raise AppError(
-                    code="validation_failed",
-                    message="导出阻断：存在校验错误",
-                    http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail={"errors": bad},
-                )
-
-            ordered_records = [by_patient[pn] for pn in expected_patient_nos]
-            content = self._build_xlsx_bytes(ordered_records, file_name=file_name)
+            prepared = self.prepare_records(from_date=from_date, to_date=to_date, since=base)
+            chunks = self._build_stream(prepared, export_format=export_format, csv_bom=csv_bom)
+            # 内容在响应阶段边生成边发送，导出日志在最后一段发送后（或中断时）写入
+            chunks = self._logged_stream(
+                chunks,
+                export_type=export_format,
+                created_by=operator,
+                file_name=file_name,
+                detail={**period, "rows": len(prepared.records)},
+                lineage=prepared.lineage(),
+            )
+            return ExportResult(filename=file_name, media_type=EXPORT_MEDIA_TYPES[export_format], chunks=chunks)
+        except ExportBlocked as blocked:
             self._log_export(
-                status_="success",
+                status_="failed",
+                export_type=export_format,
                 created_by=operator,
                 file_name=file_name,
-                detail={"from": from_date.isoformat(), "to": to_date.isoformat(), "rows": len(ordered_records)},
+                error_message=blocked.log_message,
+                detail={**period, **blocked.log_detail},
             )
             self.db.commit()
-            return ExportResult(filename=file_name, content=content)
+            raise blocked.error
         except AppError:
             raise
         except Exception as exc:
             self._log_export(
                 status_="failed",
+                export_type=export_format,
                 created_by=operator,
                 file_name=file_name,
                 error_message="导出异常",
@@ -184,6 +235,163 @@ class ExportService:
             self.db.commit()
             raise AppError(code="internal_error", message="导出失败，请稍后重试", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR) from exc
 
+    def prepare_records(
+        self,
+        *,
+        from_date: date,
+        to_date: date,
+        progress: Optional[Callable[[str, int], None]] = None,
+        since: Optional[IncrementalBase] = None,
+    ) -> PreparedExport:
+        """取范围内应导出的记录（按外部就诊顺序）并做准入检查；不满足导出条件时抛出 ExportBlocked。
+
+        since 不为空时为增量导出：准入检查仍覆盖整个范围，但只校验、输出基准批次之后提交或变更过的记录。
+        progress(stage, count) 在各阶段结束时回调：total/loaded/validated。
+        """
+        from_dt, to_dt = _date_range_to_window(from_date, to_date)
+        expected_patient_nos = self._fetch_patient_nos(from_dt=from_dt, to_dt=to_dt)
+        if progress:
+            progress("total", len(expected_patient_nos))
+        if not expected_patient_nos:
+            return PreparedExport(
+                records=[],
+                watermark=since.watermark if since is not None else None,
+                boundary=dict(since.boundary) if since is not None else {},
+                base=since,
+            )
+
+        # 准入检查只需状态与变更时间，完整聚合仅对需要输出的记录加载
+        states = self._load_record_states(expected_patient_nos)
+        by_patient = {r.patient_no: r for r in states}
+        missing = [pn for pn in expected_patient_nos if pn not in by_patient]
+        not_submitted = [pn for pn in expected_patient_nos if pn in by_patient and by_patient[pn].status != "submitted"]
+        if missing or not_submitted:
+            raise ExportBlocked(
+                log_message="存在未提交或未生成记录，阻断导出",
+                log_detail={"missing": len(missing), "not_submitted": len(not_submitted)},
+                error=AppError(
+                    code="validation_failed",
+                    message="导出阻断：范围内存在未提交/缺失记录",
+                    http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail={"missing": missing, "not_submitted": not_submitted},
+                ),
+            )
+
+        ordered_states = [by_patient[pn] for pn in expected_patient_nos]
+        watermark, boundary = _advance_watermark(ordered_states, since)
+        selected_ids = [
+            r.id
+            for r in ordered_states
+            if since is None or not since.covers(r.id, r.version, _change_time(r.updated_at, r.submitted_at))
+        ]
+        ordered_records = self._load_records(selected_ids)
+        if progress:
+            progress("loaded", len(ordered_records))
+
+        # 再次执行全量校验（规则可能迭代）
+        prebuilt_rows: Optional[list[list[Any]]] = None
+        if self._use_parallel(len(ordered_records)):
+            # 并行模式：校验与行构造在子进程中一并完成；已保存且仍有效的校验结果直接复用，只校验其余记录
+            validator = ValidationService(self.db)
+            state = validator.state_store()
+            known = state.load(ordered_records) if state is not None else {}
+            pending = [rec for rec in ordered_records if rec.id not in known]
+            results, prebuilt_rows = validate_and_build_parallel(
+                ordered_records,
+                headers=self._load_template_headers(),
+                dicts=validator.batch_dicts(pending),
+                workers=self.settings.export_parallel_workers,
+                chunk_size=self.settings.export_parallel_chunk_size,
+                known=known,
+            )
+            if state is not None and pending:
+                state.save(pending, results)
+        else:
+            results = ValidationService(self.db).validate_many(ordered_records)
+        if progress:
+            progress("validated", len(results))
+        bad: list[dict[str, Any]] = []
+        for rec in ordered_records:
+            errs = results.get(rec.id)
+            if errs:
+                bad.append(
+                    {
+                        "patient_no": rec.patient_no,
+                        "record_id": rec.id,
+                        "errors": [e.model_dump() for e in errs],
+                    }
+                )
+        if bad:
+            raise ExportBlocked(
+                log_message="校验失败，阻断导出",
+                log_detail={"bad_records": len(bad)},
+                error=AppError(
+                    code="validation_failed",
+                    message="导出阻断：存在校验错误",
+                    http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail={"errors": bad},
+                ),
+            )
+
+        return PreparedExport(
+            records=ordered_records, rows=prebuilt_rows, watermark=watermark, boundary=boundary, base=since
+        )
+
+    def resolve_incremental_base(self, export_id: int, *, from_date: date, to_date: date) -> IncrementalBase:
+        """读取基准导出批次；增量导出须与基准批次的时间范围一致，且基准批次已成功并记录了水位。"""
+        log = self.db.get(ExportLog, export_id)
+        if log is None or log.export_type not in _REPORT_EXPORT_TYPES:
+            raise AppError(code="not_found", message="基准导出不存在", http_status=status.HTTP_404_NOT_FOUND)
+        detail = log.detail or {}
+        if log.status != "success":
+            raise AppError(
+                code="validation_failed",
+                message="基准导出未成功，不能作为增量起点",
+                http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"export_id": export_id, "status": log.status},
+            )
+        if detail.get("from") != from_date.isoformat() or detail.get("to") != to_date.isoformat():
+            raise AppError(
+                code="validation_failed",
+                message="增量导出的时间范围须与基准导出一致",
+                http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"export_id": export_id, "from": detail.get("from"), "to": detail.get("to")},
+            )
+        if "mode" not in detail:
+            # 早于增量导出功能的批次没有记录水位
+            raise AppError(
+                code="validation_failed",
+                message="基准导出未记录增量水位，请先执行一次全量导出",
+                http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"export_id": export_id},
+            )
+        watermark = detail.get("watermark")
+        return IncrementalBase(
+            export_id=log.id,
+            root_export_id=int(detail.get("root_export_id") or log.id),
+            watermark=datetime.fromisoformat(watermark) if watermark else None,
+            boundary={int(record_id): int(version) for record_id, version in (detail.get("boundary") or {}).items()},
+        )
+
+    def export_lineage(self, export_id: int) -> list[ExportLog]:
+        """从指定批次沿 base_export_id 回溯到全量批次，返回顺序为由新到旧。"""
+        chain: list[ExportLog] = []
+        seen: set[int] = set()
+        current: Optional[int] = export_id
+        while current is not None and current not in seen:
+            log = self.db.get(ExportLog, current)
+            if log is None or log.export_type not in _REPORT_EXPORT_TYPES:
+                break
+            chain.append(log)
+            seen.add(current)
+            current = (log.detail or {}).get("base_export_id")
+        if not chain:
+            raise AppError(code="not_found", message="导出批次不存在", http_status=status.HTTP_404_NOT_FOUND)
+        return chain
+
+    def _use_parallel(self, count: int) -> bool:
+        return self.settings.export_parallel_workers > 1 and count >= self.settings.export_parallel_min_records
+
     def _ensure_export_role(self, session: SessionPayload) -> None:
         if not any(role in {"admin", "qc"} for role in session.roles):
             raise AppError(code="forbidden", message="无权执行批量导出", http_status=status.HTTP_403_FORBIDDEN)
@@ -197,241 +405,125 @@ class ExportService:
                 patient_nos.append(pn)
         return _unique_preserve_order(patient_nos)
 
-    def _load_records(self, patient_nos: list[str]) -> list[Record]:
-        if not patient_nos:
+    def _load_record_states(self, patient_nos: list[str]) -> list[Any]:
+        stmt = select(
+            Record.id, Record.patient_no, Record.status, Record.version, Record.updated_at, Record.submitted_at
+        ).where(Record.patient_no.in_(patient_nos))
+        return list(self.db.execute(stmt).all())
+
+    def _load_records(self, record_ids: list[int]) -> list[Record]:
+        """按 record_ids 的顺序返回完整记录聚合。"""
+        if not record_ids:
             return []
-        stmt = (
-            select(Record)
-            .where(Record.patient_no.in_(patient_nos))
-            .options(
-                joinedload(Record.org),
-                joinedload(Record.base_info),
-                joinedload(Record.diagnoses),
-                joinedload(Record.tcm_operations),
-                joinedload(Record.surgeries),
-                joinedload(Record.medication_summary),
-                joinedload(Record.herb_details),
-                joinedload(Record.fee_summary),
-            )
-        )
-        return list(self.db.execute(stmt).unique().scalars().all())
+        stmt = select(Record).where(Record.id.in_(record_ids)).options(*record_load_options(include_org=True))
+        by_id = {r.id: r for r in self.db.execute(stmt).scalars().all()}
+        return [by_id[record_id] for record_id in record_ids if record_id in by_id]
 
     def _load_template_headers(self) -> list[str]:
-        if not self._template_path.exists():
-            raise AppError(code="internal_error", message="导出模板文件不存在", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        wb = load_workbook(self._template_path, read_only=True, data_only=True)
-        if self._template_sheet in wb.sheetnames:
-            ws = wb[self._template_sheet]
-        else:
-            ws = wb.worksheets[0]
-        headers = [str(v).strip() for v in list(ws.iter_rows(min_row=1, max_row=1, values_only=True))[0] if v is not None]
-        if not headers:
-            raise AppError(code="internal_error", message="导出模板表头为空", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return headers
+        return get_template_headers(self._template_path, self._template_sheet)
 
-    def _build_xlsx_bytes(self, records: list[Record], *, file_name: str) -> bytes:
+    def _build_stream(
+        self,
+        prepared: PreparedExport,
+        *,
+        export_format: str = "xlsx",
+        csv_bom: bool = True,
+        on_row: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[bytes]:
+        """按格式构造内容流；各格式共用同一列计划，列顺序与模板表头一致。"""
+        # 表头在返回前读取，模板缺失等错误仍以 AppError 返回，而不是在传输中途中断
         headers = self._load_template_headers()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = self._template_sheet
+        plan = ExportColumnPlan(headers)
+        if prepared.rows is not None:
+            source: Iterable[list[Any]] = prepared.rows
+        else:
+            source = (plan.build_row(record) for record in prepared.records)
 
-        ws.append(headers)
-        for record in records:
-            row_map = self._record_to_row(record, headers)
-            ws.append([row_map.get(h) for h in headers])
+        def _rows() -> Iterator[list[Any]]:
+            for index, row in enumerate(source, start=1):
+                yield row
+                if on_row:
+                    on_row(index)
 
-        tmp_path = None
+        if export_format == "csv":
+            return iter_csv(headers=headers, rows=_rows(), bom=csv_bom)
+        if export_format == "parquet":
+            return iter_parquet(headers=headers, kinds=plan.kinds, rows=_rows())
+        return iter_xlsx(sheet_name=self._template_sheet, headers=headers, rows=_rows())
+
+    def _logged_stream(
+        self,
+        chunks: Iterator[bytes],
+        *,
+        export_type: str,
+        created_by: str,
+        file_name: str,
+        detail: dict[str, Any],
+        lineage: dict[str, Any],
+    ) -> Iterator[bytes]:
+        """转发内容流：最后一段发出后记为导出成功；客户端断开或生成过程出错时记为失败。
+
+        增量水位（lineage）只写入成功日志：未完整送达的文件不能作为后续增量导出的基准。
+        日志使用独立会话写入：响应阶段请求内的会话可能已关闭。
+        """
+        completed = False
+        error_message = "导出中断：下载未完成"
+        error_detail: dict[str, Any] = {}
         try:
-            tmp = NamedTemporaryFile(delete=False, suffix=".xlsx")
-            tmp_path = tmp.name
-            tmp.close()
-            wb.save(tmp_path)
-            return Path(tmp_path).read_bytes()
+            yield from chunks
+            completed = True
+        except Exception as exc:
+            logger.exception("Report export stream failed: %s", file_name)
+            error_message = "导出异常"
+            error_detail = {"type": type(exc).__name__}
+            raise
         finally:
-            if tmp_path:
-                try:
-                    Path(tmp_path).unlink(missing_ok=True)
-                except Exception:
-                    pass
-
-    def _record_to_row(self, record: Record, headers: list[str]) -> dict[str, Any]:
-        base = record.base_info
-        org = record.org
-        if base is None or org is None:
-            raise AppError(code="internal_error", message="记录数据不完整", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        data: dict[str, Any] = {h: None for h in headers}
-
-        # 基础/就诊过程
-        data["JGMC"] = clean_value(org.jgmc)
-        data["ZZJGDM"] = clean_value(org.zzjgdm)
-        data["USERNAME"] = clean_value(base.username)
-        data["JZKH"] = clean_value(base.jzkh)
-        data["XM"] = clean_value(base.xm)
-        data["JZSJ"] = _fmt_date(base.jzsj)
-        data["XB"] = clean_value(base.xb)
-        data["CSRQ"] = _fmt_date(base.csrq)
-        data["HY"] = clean_value(base.hy)
-        data["GJ"] = clean_value(base.gj)
-        data["MZ"] = clean_value(base.mz)
-        data["ZJLB"] = clean_value(base.zjlb)
-        data["ZJHM"] = clean_value(base.zjhm)
-        data["XZZ"] = clean_value(base.xzz)
-        data["LXDH"] = clean_value(base.lxdh)
-        data["YWGMS"] = clean_value(base.ywgms)
-        data["GMYW"] = _quote_en(base.gmyw)
-        data["QTGMS"] = clean_value(base.qtgms)
-        data["QTGMY"] = _quote_en(base.qtgmy)
-        data["GHSJ"] = _fmt_date(base.ghsj)
-        data["BDSJ"] = _fmt_date(base.bdsj)
-        data["JZKS"] = clean_value(base.jzks)
-        data["JZKSDM"] = clean_value(base.jzksdm)
-        data["JZYS"] = clean_value(base.jzys)
-        data["JZYSZC"] = clean_value(base.jzyszc)
-        data["JZLX"] = clean_value(base.jzlx)
-        data["FZ"] = clean_value(base.fz)
-        data["SY"] = clean_value(base.sy)
-        data["MZMTBHZ"] = clean_value(base.mzmtbhz)
-        data["JZHZFJ"] = clean_value(base.jzhzfj)
-        data["JZHZQX"] = clean_value(base.jzhzqx)
-        data["ZYZKJSJ"] = _fmt_date(base.zyzkjsj)
-        data["HZZS"] = _quote_en(base.hzzs)
-
-        # 诊断映射
-        diags = record.diagnoses or []
-        def _diag(diag_type: str) -> list[Any]:
-            return sorted([d for d in diags if d.diag_type == diag_type], key=lambda d: int(d.seq_no))
-
-        tcm_dis = _diag("tcm_disease_main")
-        if tcm_dis:
-            data["MZD_ZB"] = clean_value(tcm_dis[0].diag_name)
-            data["JBDM_ZB"] = clean_value(tcm_dis[0].diag_code)
-
-        tcm_syn = _diag("tcm_syndrome")
-        for idx in range(1, 3):
-            item = tcm_syn[idx - 1] if idx - 1 < len(tcm_syn) else None
-            data[f"MZD_ZZ{idx}"] = clean_value(item.diag_name) if item else None
-            data[f"JBDM_ZZ{idx}"] = clean_value(item.diag_code) if item else None
-
-        wm_main = _diag("wm_main")
-        if wm_main:
-            data["MZZD_ZYZD"] = clean_value(wm_main[0].diag_name)
-            data["MZZD_JBBM"] = clean_value(wm_main[0].diag_code)
-
-        wm_other = _diag("wm_other")
-        for idx in range(1, 11):
-            item = wm_other[idx - 1] if idx - 1 < len(wm_other) else None
-            data[f"MZZD_QTZD{idx}"] = clean_value(item.diag_name) if item else None
-            data[f"MZZD_JBBM{idx}"] = clean_value(item.diag_code) if item else None
-
-        # 中医治疗性操作（≤10）
-        ops = sorted(record.tcm_operations or [], key=lambda o: int(o.seq_no))
-        for idx in range(1, 11):
-            op = ops[idx - 1] if idx - 1 < len(ops) else None
-            data[f"ZYZLCZMC{idx}"] = clean_value(op.op_name) if op else None
-            data[f"ZYZLCZBM{idx}"] = clean_value(op.op_code) if op else None
-            data[f"ZYZLCZCS{idx}"] = int(op.op_times) if op and op.op_times is not None else None
-            data[f"ZYZLCZTS{idx}"] = int(op.op_days) if op and op.op_days is not None else None
-
-        # 手术/操作（≤5）
-        surgeries = sorted(record.surgeries or [], key=lambda s: int(s.seq_no))
-        for idx in range(1, 6):
-            s = surgeries[idx - 1] if idx - 1 < len(surgeries) else None
-            data[f"SSCZMC{idx}"] = clean_value(s.op_name) if s else None
-            data[f"SSCZBM{idx}"] = clean_value(s.op_code) if s else None
-            data[f"SSCZRQ{idx}"] = _fmt_date(s.op_time) if s else None
-            data[f"SSCZZ{idx}"] = clean_value(s.operator_name) if s else None
-            data[f"MZFS{idx}"] = clean_value(s.anesthesia_method) if s else None
-            data[f"MZYS{idx}"] = clean_value(s.anesthesia_doctor) if s else None
-            data[f"SHJB{idx}"] = int(s.surgery_level) if s else None
-
-        # 用药标识
-        med = record.medication_summary
-        data["XYSY"] = clean_value(getattr(med, "xysy", None))
-        data["ZCYSY"] = clean_value(getattr(med, "zcysy", None))
-        data["ZYZJSY"] = clean_value(getattr(med, "zyzjsy", None))
-        data["CTYPSY"] = clean_value(getattr(med, "ctypsy", None))
-        data["PFKLSY"] = clean_value(getattr(med, "pfklsy", None))
-
-        herbs = sorted(record.herb_details or [], key=lambda h: int(h.seq_no))
-        for idx in range(1, 41):
-            h = herbs[idx - 1] if idx - 1 < len(herbs) else None
-            data[f"ZCYLB{idx}"] = clean_value(h.herb_type) if h else None
-            data[f"YYTJDM{idx}"] = clean_value(h.route_code) if h else None
-            data[f"YYTJMC{idx}"] = clean_value(h.route_name) if h else None
-            data[f"YYJS{idx}"] = int(h.dose_count) if h else None
-
-        # 费用
-        fee = record.fee_summary
-        if fee is not None:
-            for code in [
-                "ZFY",
-                "ZFJE",
-                "YLFWF",
-                "ZLCZF",
-                "HLF",
-                "QTFY",
-                "BLZDF",
-                "ZDF",
-                "YXXZDF",
-                "LCZDXMF",
-                "FSSZLXMF",
-                "ZLF",
-                "SSZLF",
-                "MZF",
-                "SSF",
-                "KFF",
-                "ZYL_ZYZD",
-                "ZYZL",
-                "ZYWZ",
-                "ZYGS",
-                "ZCYJF",
-                "ZYTNZL",
-                "ZYGCZL",
-                "ZYTSZL",
-                "ZYQT",
-                "ZYTSTPJG",
-                "BZSS",
-                "XYF",
-                "KJYWF",
-                "ZCYF",
-                "ZYZJF",
-                "ZCYF1",
-                "PFKLF",
-                "XF",
-                "BDBLZPF",
-                "QDBLZPF",
-                "NXYZLZPF",
-                "XBYZLZPF",
-                "JCYYCLF",
-                "YYCLF",
-                "SSYCXCLF",
-                "QTF",
-            ]:
-                attr = _fee_attr_for_code(code)
-                value = getattr(fee, attr, None)
-                if value is None:
-                    data[code] = None
-                elif isinstance(value, Decimal):
-                    data[code] = float(value)
-                else:
-                    data[code] = value
-
-        return data
+            try:
+                with Session(bind=self.db.get_bind()) as log_db:
+                    self._log_export(
+                        status_="success" if completed else "failed",
+                        export_type=export_type,
+                        created_by=created_by,
+                        file_name=file_name,
+                        error_message=None if completed else error_message,
+                        detail={**detail, **lineage} if completed else {**detail, **error_detail},
+                        db=log_db,
+                    )
+                    log_db.commit()
+            except Exception:
+                logger.warning("Export log not written: %s", file_name, exc_info=True)
+
+    def write_file(
+        self,
+        prepared: PreparedExport,
+        path: Path,
+        *,
+        export_format: str = "xlsx",
+        csv_bom: bool = True,
+        on_row: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """将导出内容写入文件（先写临时文件再改名，避免下载到半成品）。"""
+        tmp_path = path.with_name(path.name + ".part")
+        with tmp_path.open("wb") as fh:
+            for chunk in self._build_stream(prepared, export_format=export_format, csv_bom=csv_bom, on_row=on_row):
+                fh.write(chunk)
+        tmp_path.replace(path)
 
     def _log_export(
         self,
         *,
         status_: str,
+        export_type: str,
         created_by: str,
         file_name: str,
         error_message: Optional[str] = None,
         detail: Optional[dict[str, Any]] = None,
+        db: Optional[Session] = None,
     ) -> None:
-        self.db.add(
+        (db or self.db).add(
             ExportLog(
                 record_id=None,
-                export_type="xlsx",
+                export_type=export_type,
                 file_name=file_name,
                 file_path=None,
                 status=status_,
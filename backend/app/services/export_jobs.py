@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import status
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, get_settings
+from app.core.db import create_session
+from app.core.errors import AppError
+from app.models.export_log import ExportLog
+from app.schemas.auth import SessionPayload
+from app.services.export import (
+    JOB_EXPORT_TYPE,
+    ExportBlocked,
+    ExportService,
+    ensure_export_format,
+    report_file_name,
+)
+from app.services.external import get_shared_external_adapter
+from app.services.utils import local_now
+
+logger = logging.getLogger(__name__)
+
+# 进度写库的最小间隔（秒），避免逐行 UPDATE
+_PROGRESS_FLUSH_SECONDS = 2.0
+
+
+def _backend_root() -> Path:
+    return Path(__file__).resolve().parents[2]
+
+
+class ExportJobManager:
+    """异步导出任务：任务状态保存在 mz_mfp_export_log，由进程内有界线程池执行。
+
+    - 提交后状态为 queued；执行时通过条件 UPDATE 抢占（queued -> running），多进程部署下同一任务只会被执行一次。
+    - 运行中定期写 heartbeat_at；各进程定期检查，心跳超时的任务（执行进程已退出）重新排队，超过最大次数则置为失败。
+    """
+
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self.settings = settings or get_settings()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        job_dir = Path(self.settings.export_job_dir)
+        self.job_dir = job_dir if job_dir.is_absolute() else _backend_root() / job_dir
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, self.settings.export_job_workers), thread_name_prefix="export-job"
+        )
+        self._lock = threading.Lock()
+        self._running: set[int] = set()
+        self._stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            self.recover()
+        except Exception:
+            logger.warning("Export job recovery failed", exc_info=True)
+        if self._heartbeat_thread is None:
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="export-job-heartbeat", daemon=True)
+            self._heartbeat_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        # 不等待运行中的任务：进程退出后心跳超时，由存活进程的定期检查（reclaim_stale）接管
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(timeout=5)
+            self._heartbeat_thread = None
+
+    def submit(
+        self,
+        *,
+        from_date: date,
+        to_date: date,
+        session: SessionPayload,
+        export_format: str = "xlsx",
+        csv_bom: bool = True,
+        since_export_id: Optional[int] = None,
+    ) -> ExportLog:
+        if not any(role in {"admin", "qc"} for role in session.roles):
+            raise AppError(code="forbidden", message="无权执行批量导出", http_status=status.HTTP_403_FORBIDDEN)
+        if to_date < from_date:
+            raise AppError(code="validation_failed", message="时间范围不合法（to < from）", http_status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        ensure_export_format(export_format)
+
+        db = create_session()
+        try:
+            if since_export_id is not None:
+                # 提交时即检查基准批次，避免排队后才失败
+                service = ExportService(db=db, external=get_shared_external_adapter(), settings=self.settings)
+                service.resolve_incremental_base(since_export_id, from_date=from_date, to_date=to_date)
+            job = ExportLog(
+                record_id=None,
+                export_type=JOB_EXPORT_TYPE,
+                file_name=report_file_name(from_date, to_date, export_format, since_export_id),
+                file_path=None,
+                status="queued",
+                detail={
+                    "from": from_date.isoformat(),
+                    "to": to_date.isoformat(),
+                    "format": export_format,
+                    "csv_bom": csv_bom,
+                    "since": since_export_id,
+                    "attempts": 0,
+                },
+                progress={},
+                created_by=session.doc_code or session.login_name,
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+        finally:
+            db.close()
+        self._enqueue(job.id)
+        return job
+
+    def get(self, job_id: int) -> Optional[ExportLog]:
+        db = create_session()
+        try:
+            return db.execute(
+                select(ExportLog).where(ExportLog.id == job_id, ExportLog.export_type == JOB_EXPORT_TYPE)
+            ).scalar_one_or_none()
+        finally:
+            db.close()
+
+    def recover(self) -> None:
+        """启动时接管未完成任务：排队中的重新入队，心跳超时的运行中任务重新排队或置为失败。"""
+        db = create_session()
+        try:
+            queued = db.execute(
+                select(ExportLog.id).where(ExportLog.export_type == JOB_EXPORT_TYPE, ExportLog.status == "queued")
+            ).scalars().all()
+        finally:
+            db.close()
+        for job_id in queued:
+            self._enqueue(job_id)
+        self.reclaim_stale()
+
+    def reclaim_stale(self) -> None:
+        """接管心跳超时的运行中任务（启动时及心跳线程中定期执行）。
+
+        重启或发布后，被中断任务的心跳在超时前仍是新的，启动时无法判定；由定期检查在超时后接管。
+        """
+        now = local_now(self.settings)
+        stale_before = now - timedelta(seconds=self.settings.export_job_stale_seconds)
+        db = create_session()
+        try:
+            jobs = db.execute(
+                select(ExportLog).where(
+                    ExportLog.export_type == JOB_EXPORT_TYPE,
+                    ExportLog.status == "running",
+                    or_(ExportLog.heartbeat_at.is_(None), ExportLog.heartbeat_at < stale_before),
+                )
+            ).scalars().all()
+            requeue: list[int] = []
+            for job in jobs:
+                owner = job.worker_id
+                attempts = int((job.detail or {}).get("attempts", 0))
+                if attempts >= self.settings.export_job_max_attempts:
+                    values: dict[str, Any] = {
+                        "status": "failed",
+                        "error_message": "任务中断且已达最大重试次数",
+                        "finished_at": now,
+                    }
+                else:
+                    values = {"status": "queued", "worker_id": None}
+                # 以读取时的心跳为条件：期间其他进程刷新了心跳或已接管时不处理
+                result = db.execute(
+                    update(ExportLog)
+                    .where(ExportLog.id == job.id, ExportLog.status == "running", ExportLog.heartbeat_at == job.heartbeat_at)
+                    .values(**values)
+                )
+                if result.rowcount == 1 and values["status"] == "queued":
+                    requeue.append(job.id)
+                    logger.warning("Export job %s interrupted on %s, requeued", job.id, owner)
+            db.commit()
+        finally:
+            db.close()
+        for job_id in requeue:
+            self._enqueue(job_id)
+
+    def _enqueue(self, job_id: int) -> None:
+        try:
+            self._executor.submit(self._run, job_id)
+        except RuntimeError:
+            logger.warning("Export job %s not scheduled: executor is shut down", job_id)
+
+    def _claim(self, db: Session, job_id: int) -> Optional[ExportLog]:
+        now = local_now(self.settings)
+        result = db.execute(
+            update(ExportLog)
+            .where(ExportLog.id == job_id, ExportLog.status == "queued")
+            .values(status="running", worker_id=self.worker_id, started_at=now, heartbeat_at=now, progress={})
+        )
+        db.commit()
+        if result.rowcount != 1:
+            return None
+        job = db.get(ExportLog, job_id)
+        detail = dict(job.detail or {})
+        detail["attempts"] = int(detail.get("attempts", 0)) + 1
+        job.detail = detail
+        db.commit()
+        return job
+
+    def _run(self, job_id: int) -> None:
+        db = create_session()
+        try:
+            job = self._claim(db, job_id)
+            if job is None:
+                return
+            with self._lock:
+                self._running.add(job_id)
+            try:
+                self._execute(db, job)
+            finally:
+                with self._lock:
+                    self._running.discard(job_id)
+        except Exception:
+            logger.exception("Export job %s crashed", job_id)
+        finally:
+            db.close()
+
+    def _execute(self, db: Session, job: ExportLog) -> None:
+        detail = dict(job.detail or {})
+        from_date = date.fromisoformat(detail["from"])
+        to_date = date.fromisoformat(detail["to"])
+        progress: dict[str, int] = {}
+        last_flush = [0.0]
+
+        def _flush(force: bool = False) -> None:
+            now = time.monotonic()
+            if not force and now - last_flush[0] < _PROGRESS_FLUSH_SECONDS:
+                return
+            last_flush[0] = now
+            db.execute(
+                update(ExportLog)
+                .where(ExportLog.id == job.id)
+                .values(progress=dict(progress), heartbeat_at=local_now(self.settings))
+            )
+            db.commit()
+
+        def _on_stage(stage: str, count: int) -> None:
+            progress[stage] = count
+            _flush(force=True)
+
+        def _on_row(count: int) -> None:
+            progress["written"] = count
+            _flush()
+
+        service = ExportService(db=db, external=get_shared_external_adapter(), settings=self.settings)
+        path = self.job_dir / f"{job.id}_{job.file_name}"
+        try:
+            since_export_id = detail.get("since")
+            base = (
+                service.resolve_incremental_base(since_export_id, from_date=from_date, to_date=to_date)
+                if since_export_id is not None
+                else None
+            )
+            prepared = service.prepare_records(from_date=from_date, to_date=to_date, progress=_on_stage, since=base)
+            self.job_dir.mkdir(parents=True, exist_ok=True)
+            service.write_file(
+                prepared,
+                path,
+                export_format=detail.get("format", "xlsx"),
+                csv_bom=detail.get("csv_bom", True),
+                on_row=_on_row,
+            )
+            rows = len(prepared.records)
+            progress["written"] = rows
+            self._finish(
+                db,
+                job,
+                status_="success",
+                progress=progress,
+                file_path=str(path),
+                detail={**detail, "rows": rows, **prepared.lineage()},
+            )
+        except ExportBlocked as blocked:
+            self._finish(
+                db,
+                job,
+                status_="failed",
+                progress=progress,
+                error_message=blocked.log_message,
+                detail={**detail, **blocked.log_detail},
+            )
+        except AppError as exc:
+            self._finish(db, job, status_="failed", progress=progress, error_message=exc.message, detail=detail)
+        except Exception as exc:
+            logger.exception("Export job %s failed", job.id)
+            self._finish(
+                db,
+                job,
+                status_="failed",
+                progress=progress,
+                error_message="导出异常",
+                detail={**detail, "type": type(exc).__name__},
+            )
+
+    def _finish(
+        self,
+        db: Session,
+        job: ExportLog,
+        *,
+        status_: str,
+        progress: dict[str, int],
+        detail: dict[str, Any],
+        file_path: Optional[str] = None,
+        error_message: Optional[str] = None,
+    ) -> None:
+        db.rollback()
+        now = local_now(self.settings)
+        db.execute(
+            update(ExportLog)
+            .where(ExportLog.id == job.id)
+            .values(
+                status=status_,
+                progress=dict(progress),
+                detail=detail,
+                file_path=file_path,
+                error_message=error_message,
+                finished_at=now,
+                heartbeat_at=now,
+            )
+        )
+        db.commit()
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(5, self.settings.export_job_stale_seconds // 4)
+        while not self._stop.wait(interval):
+            with self._lock:
+                running = list(self._running)
+            if running:
+                db = create_session()
+                try:
+                    db.execute(
+                        update(ExportLog)
+                        .where(ExportLog.id.in_(running), ExportLog.status == "running")
+                        .values(heartbeat_at=local_now(self.settings))
+                    )
+                    db.commit()
+                except Exception:
+                    logger.warning("Export job heartbeat failed", exc_info=True)
+                finally:
+                    db.close()
+            # 本进程的任务已先刷新心跳，不会被误判为超时
+            try:
+                self.reclaim_stale()
+            except Exception:
+                logger.warning("Export job stale check failed", exc_info=True)
+
+
+@lru_cache(maxsize=1)
+def get_export_job_manager() -> ExportJobManager:
+    return ExportJobManager(get_settings())
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import inspect
+
+from app.models.record import Record
+from app.schemas.validation import FieldError
+from app.services.dict_cache import DictSnapshot
+from app.services.export_rows import ExportColumnPlan
+from app.services.validation import ValidationService
+
+_SCALAR_RELATIONS = ("org", "base_info", "medication_summary", "fee_summary")
+_LIST_RELATIONS = ("diagnoses", "tcm_operations", "surgeries", "herb_details")
+
+# 子进程内的校验器与列计划（由 _init_worker 设置，每个进程只构造一次）
+_worker_validator: Optional[ValidationService] = None
+_worker_plan: Optional[ExportColumnPlan] = None
+
+
+def _plain(obj: Any) -> Optional[SimpleNamespace]:
+    if obj is None:
+        return None
+    mapper = inspect(obj).mapper
+    return SimpleNamespace(**{attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+
+
+def snapshot_record(record: Record) -> SimpleNamespace:
+    """将已加载的记录聚合转为只含列值的普通对象（可 pickle，发送给子进程）。"""
+    data = _plain(record)
+    for name in _SCALAR_RELATIONS:
+        setattr(data, name, _plain(getattr(record, name)))
+    for name in _LIST_RELATIONS:
+        setattr(data, name, [_plain(item) for item in getattr(record, name) or []])
+    return data
+
+
+def _init_worker(dicts: DictSnapshot, headers: Sequence[str]) -> None:
+    global _worker_validator, _worker_plan
+    _worker_validator = ValidationService(None, dicts)
+    _worker_plan = ExportColumnPlan(headers)
+
+
+def _process_chunk(
+    chunk: list[tuple[SimpleNamespace, Optional[list[FieldError]]]],
+) -> list[tuple[int, list[FieldError], Optional[list[Any]]]]:
+    assert _worker_validator is not None and _worker_plan is not None
+    results: list[tuple[int, list[FieldError], Optional[list[Any]]]] = []
+    for record, known_errors in chunk:
+        errors = known_errors if known_errors is not None else _worker_validator.validate_for_submit(record)
+        # 有校验错误的记录会阻断导出，无需构造行
+        row = None if errors else _worker_plan.build_row(record)
+        results.append((record.id, errors, row))
+    return results
+
+
+def validate_and_build_parallel(
+    records: Sequence[Record],
+    *,
+    headers: Sequence[str],
+    dicts: DictSnapshot,
+    workers: int,
+    chunk_size: int,
+    known: Optional[dict[int, list[FieldError]]] = None,
+) -> tuple[dict[int, list[FieldError]], list[list[Any]]]:
+    """多进程执行校验与行构造，结果按 records 原顺序合并（与串行模式逐行一致）。
+
+    known 为已保存且仍有效的校验结果 {record_id: 错误列表}，这些记录在子进程中不再校验、只构造行。
+    """
+    known = known or {}
+    snapshots = [(snapshot_record(record), known.get(record.id)) for record in records]
+    chunks = [snapshots[i : i + chunk_size] for i in range(0, len(snapshots), chunk_size)]
+    errors: dict[int, list[FieldError]] = {}
+    rows: list[list[Any]] = []
+    # spawn：避免 fork 继承父进程中的数据库连接与线程状态
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(dicts, tuple(headers)),
+    ) as pool:
+        for chunk_result in pool.map(_process_chunk, chunks):
+            for record_id, record_errors, row in chunk_result:
+                errors[record_id] = record_errors
+                if row is not None:
+                    rows.append(row)
+    return errors, rows
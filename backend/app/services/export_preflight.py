@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import status
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, get_settings
+from app.core.errors import AppError
+from app.models.record import Record
+from app.models.visit_index import VisitIndex
+from app.schemas.auth import SessionPayload
+from app.schemas.exports import ExportPreflightGroup, ExportPreflightItem, ExportPreflightResponse
+from app.services.external import ExternalDataAdapter
+from app.services.record_loading import record_load_options
+from app.services.validation import ValidationService
+from app.services.visit_sync import VisitIndexSyncer
+
+PREFLIGHT_KINDS = ("missing", "draft", "invalid")
+# 校验时每批加载的记录数
+_VALIDATE_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class ExportPreflightQuery:
+    from_date: date
+    to_date: date
+    dept_code: Optional[str] = None
+    doc_code: Optional[str] = None
+    kind: Optional[str] = None  # missing/draft/invalid，为空时列出全部阻断项
+    include_invalid: bool = False  # 是否统计校验不通过的已提交记录（优先使用已保存的校验结果）
+    page: int = 1
+    page_size: int = 50
+
+
+class ExportPreflightService:
+    """导出前检查：只查本地就诊索引与记录状态，按科室/医生统计缺失、未提交（及校验不通过）的记录。
+
+    不访问外部视图；索引新鲜度以 synced_through 返回，为空表示范围内存在未同步日期，结果可能不完整。
+    """
+
+    def __init__(self, db: Session, external: ExternalDataAdapter, settings: Optional[Settings] = None) -> None:
+        self.db = db
+        self.settings = settings or get_settings()
+        self.syncer = VisitIndexSyncer(db, external, self.settings)
+
+    def preflight(self, session: SessionPayload, query: ExportPreflightQuery) -> ExportPreflightResponse:
+        if not any(role in {"admin", "qc"} for role in session.roles):
+            raise AppError(code="forbidden", message="无权执行批量导出", http_status=status.HTTP_403_FORBIDDEN)
+        if query.to_date < query.from_date:
+            raise AppError(code="validation_failed", message="时间范围不合法（to < from）", http_status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if query.kind is not None and query.kind not in PREFLIGHT_KINDS:
+            raise AppError(code="validation_failed", message="kind 参数不合法", http_status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if query.kind == "invalid" and not query.include_invalid:
+            raise AppError(
+                code="validation_failed",
+                message="查询校验不通过的记录需同时指定 include_invalid",
+                http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        from_dt = datetime(query.from_date.year, query.from_date.month, query.from_date.day)
+        to_dt = datetime(query.to_date.year, query.to_date.month, query.to_date.day) + timedelta(days=1)
+        conds = [VisitIndex.visit_time >= from_dt, VisitIndex.visit_time < to_dt]
+        if query.dept_code and query.dept_code.strip():
+            conds.append(VisitIndex.dept_code == query.dept_code.strip())
+        if query.doc_code and query.doc_code.strip():
+            conds.append(VisitIndex.doc_code == query.doc_code.strip())
+        scope = and_(*conds)
+
+        groups = self._count_groups(scope)
+        invalid: Optional[dict[int, int]] = None
+        if query.include_invalid:
+            invalid = self._find_invalid(scope)
+            self._count_invalid(groups, scope, invalid)
+
+        items_total, items = self._list_blockers(scope, query, invalid or {})
+        group_list = [groups[key] for key in sorted(groups, key=lambda k: (k[0] or "", k[1] or ""))]
+        missing = sum(g.missing for g in group_list)
+        draft = sum(g.draft for g in group_list)
+        invalid_count = len(invalid) if invalid is not None else None
+        synced_through = self.syncer.synced_through(query.from_date, query.to_date)
+        return ExportPreflightResponse(
+            ready=synced_through is not None and missing == 0 and draft == 0 and not invalid_count,
+            total=sum(g.total for g in group_list),
+            submitted=sum(g.submitted for g in group_list),
+            missing=missing,
+            draft=draft,
+            invalid=invalid_count,
+            synced_through=synced_through,
+            groups=group_list,
+            page=query.page,
+            page_size=query.page_size,
+            items_total=items_total,
+            items=items,
+        )
+
+    def _count_groups(self, scope: Any) -> dict[tuple[Optional[str], Optional[str]], ExportPreflightGroup]:
+        stmt = (
+            select(
+                VisitIndex.dept_code,
+                VisitIndex.doc_code,
+                func.max(VisitIndex.jzks).label("dept_name"),
+                func.max(VisitIndex.jzys).label("doc_name"),
+                func.count().label("total"),
+                func.sum(case((Record.id.is_(None), 1), else_=0)).label("missing"),
+                func.sum(case((and_(Record.id.is_not(None), Record.status != "submitted"), 1), else_=0)).label("draft"),
+            )
+            .select_from(VisitIndex)
+            .outerjoin(Record, Record.patient_no == VisitIndex.patient_no)
+            .where(scope)
+            .group_by(VisitIndex.dept_code, VisitIndex.doc_code)
+        )
+        groups: dict[tuple[Optional[str], Optional[str]], ExportPreflightGroup] = {}
+        for row in self.db.execute(stmt):
+            total, missing, draft = int(row.total), int(row.missing or 0), int(row.draft or 0)
+            groups[(row.dept_code, row.doc_code)] = ExportPreflightGroup(
+                dept_code=row.dept_code,
+                dept_name=row.dept_name,
+                doc_code=row.doc_code,
+                doc_name=row.doc_name,
+                total=total,
+                submitted=total - missing - draft,
+                missing=missing,
+                draft=draft,
+            )
+        return groups
+
+    def _find_invalid(self, scope: Any) -> dict[int, int]:
+        """范围内已提交记录的校验结果，返回 record_id -> 错误数。
+
+        优先使用已保存的校验结果（只需记录 id/版本），仅对未命中的记录加载明细重新校验。
+        """
+        stmt = (
+            select(Record.id, Record.version)
+            .join(VisitIndex, VisitIndex.patient_no == Record.patient_no)
+            .where(scope, Record.status == "submitted")
+            .order_by(Record.id)
+        )
+        rows = self.db.execute(stmt).all()
+        validator = ValidationService(self.db)
+        state = validator.state_store()
+        results = state.load(rows) if state is not None else {}
+        invalid = {record_id: len(errors) for record_id, errors in results.items() if errors}
+
+        pending_ids = [row.id for row in rows if row.id not in results]
+        for offset in range(0, len(pending_ids), _VALIDATE_CHUNK_SIZE):
+            chunk = pending_ids[offset : offset + _VALIDATE_CHUNK_SIZE]
+            records = self.db.execute(
+                select(Record).where(Record.id.in_(chunk)).options(*record_load_options())
+            ).scalars().all()
+            fresh = validator.validate_many(records, use_state=False)
+            if state is not None:
+                state.save(records, fresh)
+            for record_id, errors in fresh.items():
+                if errors:
+                    invalid[record_id] = len(errors)
+            # 已校验的明细不再需要，避免大范围检查时会话中对象持续累积
+            self.db.expunge_all()
+        return invalid
+
+    def _count_invalid(
+        self,
+        groups: dict[tuple[Optional[str], Optional[str]], ExportPreflightGroup],
+        scope: Any,
+        invalid: dict[int, int],
+    ) -> None:
+        for group in groups.values():
+            group.invalid = 0
+        if not invalid:
+            return
+        stmt = (
+            select(VisitIndex.dept_code, VisitIndex.doc_code, func.count().label("invalid"))
+            .join(Record, Record.patient_no == VisitIndex.patient_no)
+            .where(scope, Record.id.in_(list(invalid)))
+            .group_by(VisitIndex.dept_code, VisitIndex.doc_code)
+        )
+        for row in self.db.execute(stmt):
+            group = groups.get((row.dept_code, row.doc_code))
+            if group is not None:
+                group.invalid = int(row.invalid)
+
+    def _list_blockers(
+        self, scope: Any, query: ExportPreflightQuery, invalid: dict[int, int]
+    ) -> tuple[int, list[ExportPreflightItem]]:
+        kind_conds = {
+            "missing": Record.id.is_(None),
+            "draft": and_(Record.id.is_not(None), Record.status != "submitted"),
+        }
+        if invalid:
+            kind_conds["invalid"] = Record.id.in_(list(invalid))
+        if query.kind is not None:
+            if query.kind not in kind_conds:
+                return 0, []
+            blocker = kind_conds[query.kind]
+        else:
+            blocker = or_(*kind_conds.values())
+
+        stmt = (
+            select(
+                VisitIndex.patient_no,
+                VisitIndex.visit_time,
+                VisitIndex.xm,
+                VisitIndex.dept_code,
+                VisitIndex.doc_code,
+                VisitIndex.jzks.label("dept_name"),
+                VisitIndex.jzys.label("doc_name"),
+                Record.id.label("record_id"),
+                Record.status.label("record_status"),
+            )
+            .select_from(VisitIndex)
+            .outerjoin(Record, Record.patient_no == VisitIndex.patient_no)
+            .where(scope, blocker)
+        )
+        total = int(self.db.execute(select(func.count()).select_from(stmt.subquery())).scalar_one())
+        stmt = (
+            stmt.order_by(VisitIndex.dept_code, VisitIndex.doc_code, VisitIndex.visit_time, VisitIndex.patient_no)
+            .offset((query.page - 1) * query.page_size)
+            .limit(query.page_size)
+        )
+        items: list[ExportPreflightItem] = []
+        for row in self.db.execute(stmt):
+            if row.record_id is None:
+                kind = "missing"
+            elif row.record_status != "submitted":
+                kind = "draft"
+            else:
+                kind = "invalid"
+            items.append(
+                ExportPreflightItem(
+                    kind=kind,
+                    patient_no=row.patient_no,
+                    visit_time=row.visit_time,
+                    xm=row.xm,
+                    dept_code=row.dept_code,
+                    doc_code=row.doc_code,
+                    dept_name=row.dept_name,
+                    doc_name=row.doc_name,
+                    record_id=row.record_id,
+                    error_count=invalid.get(row.record_id) if kind == "invalid" else None,
+                )
+            )
+        return total, items
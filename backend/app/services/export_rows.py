@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import status
+
+from app.core.errors import AppError
+from app.models.record import Record
+from app.services.utils import clean_value
+
+FEE_CODES = (
+    "ZFY",
+    "ZFJE",
+    "YLFWF",
+    "ZLCZF",
+    "HLF",
+    "QTFY",
+    "BLZDF",
+    "ZDF",
+    "YXXZDF",
+    "LCZDXMF",
+    "FSSZLXMF",
+    "ZLF",
+    "SSZLF",
+    "MZF",
+    "SSF",
+    "KFF",
+    "ZYL_ZYZD",
+    "ZYZL",
+    "ZYWZ",
+    "ZYGS",
+    "ZCYJF",
+    "ZYTNZL",
+    "ZYGCZL",
+    "ZYTSZL",
+    "ZYQT",
+    "ZYTSTPJG",
+    "BZSS",
+    "XYF",
+    "KJYWF",
+    "ZCYF",
+    "ZYZJF",
+    "ZCYF1",
+    "PFKLF",
+    "XF",
+    "BDBLZPF",
+    "QDBLZPF",
+    "NXYZLZPF",
+    "XBYZLZPF",
+    "JCYYCLF",
+    "YYCLF",
+    "SSYCXCLF",
+    "QTF",
+)
+
+
+def _fmt_date(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _quote_en(value: Any) -> Optional[str]:
+    text = clean_value(value)
+    if text is None:
+        return None
+    s = str(text)
+    if s.startswith('"') and s.endswith('"') and len(s) >= 2:
+        return s
+    s = s.replace('"', '""')
+    return f"\"{s}\""
+
+
+def _to_int(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _fee_value(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _fee_attr_for_code(code: str) -> str:
+    # 兼容历史字段命名：BDBLZPF/QDBLZPF 在业务侧字段名为 bdbblzpf/qdbblzpf
+    if code == "ZYL_ZYZD":
+        return "zyl_zyzd"
+    if code == "BDBLZPF":
+        return "bdbblzpf"
+    if code == "QDBLZPF":
+        return "qdbblzpf"
+    return code.lower()
+
+
+# 列来源：(来源, 明细序号（从 0 开始；标量来源为 None）, 属性名, 取值转换)
+_ColumnSpec = tuple[str, Optional[int], str, Callable[[Any], Any]]
+
+_DIAG_GROUPS = ("tcm_disease_main", "tcm_syndrome", "wm_main", "wm_other")
+
+
+def _build_column_specs() -> dict[str, _ColumnSpec]:
+    specs: dict[str, _ColumnSpec] = {
+        "JGMC": ("org", None, "jgmc", clean_value),
+        "ZZJGDM": ("org", None, "zzjgdm", clean_value),
+    }
+    # 基础/就诊过程
+    for header in [
+        "USERNAME", "JZKH", "XM", "XB", "HY", "GJ", "MZ", "ZJLB", "ZJHM", "XZZ", "LXDH", "YWGMS", "QTGMS",
+        "JZKS", "JZKSDM", "JZYS", "JZYSZC", "JZLX", "FZ", "SY", "MZMTBHZ", "JZHZFJ", "JZHZQX",
+    ]:
+        specs[header] = ("base", None, header.lower(), clean_value)
+    for header in ["JZSJ", "CSRQ", "GHSJ", "BDSJ", "ZYZKJSJ"]:
+        specs[header] = ("base", None, header.lower(), _fmt_date)
+    for header in ["GMYW", "QTGMY", "HZZS"]:
+        specs[header] = ("base", None, header.lower(), _quote_en)
+
+    # 诊断映射
+    specs["MZD_ZB"] = ("tcm_disease_main", 0, "diag_name", clean_value)
+    specs["JBDM_ZB"] = ("tcm_disease_main", 0, "diag_code", clean_value)
+    for idx in range(1, 3):
+        specs[f"MZD_ZZ{idx}"] = ("tcm_syndrome", idx - 1, "diag_name", clean_value)
+        specs[f"JBDM_ZZ{idx}"] = ("tcm_syndrome", idx - 1, "diag_code", clean_value)
+    specs["MZZD_ZYZD"] = ("wm_main", 0, "diag_name", clean_value)
+    specs["MZZD_JBBM"] = ("wm_main", 0, "diag_code", clean_value)
+    for idx in range(1, 11):
+        specs[f"MZZD_QTZD{idx}"] = ("wm_other", idx - 1, "diag_name", clean_value)
+        specs[f"MZZD_JBBM{idx}"] = ("wm_other", idx - 1, "diag_code", clean_value)
+
+    # 中医治疗性操作（≤10）
+    for idx in range(1, 11):
+        specs[f"ZYZLCZMC{idx}"] = ("tcm_op", idx - 1, "op_name", clean_value)
+        specs[f"ZYZLCZBM{idx}"] = ("tcm_op", idx - 1, "op_code", clean_value)
+        specs[f"ZYZLCZCS{idx}"] = ("tcm_op", idx - 1, "op_times", _to_int)
+        specs[f"ZYZLCZTS{idx}"] = ("tcm_op", idx - 1, "op_days", _to_int)
+
+    # 手术/操作（≤5）
+    for idx in range(1, 6):
+        specs[f"SSCZMC{idx}"] = ("surgery", idx - 1, "op_name", clean_value)
+        specs[f"SSCZBM{idx}"] = ("surgery", idx - 1, "op_code", clean_value)
+        specs[f"SSCZRQ{idx}"] = ("surgery", idx - 1, "op_time", _fmt_date)
+        specs[f"SSCZZ{idx}"] = ("surgery", idx - 1, "operator_name", clean_value)
+        specs[f"MZFS{idx}"] = ("surgery", idx - 1, "anesthesia_method", clean_value)
+        specs[f"MZYS{idx}"] = ("surgery", idx - 1, "anesthesia_doctor", clean_value)
+        specs[f"SHJB{idx}"] = ("surgery", idx - 1, "surgery_level", _to_int)
+
+    # 用药标识与中草药明细（≤40）
+    for header in ["XYSY", "ZCYSY", "ZYZJSY", "CTYPSY", "PFKLSY"]:
+        specs[header] = ("med", None, header.lower(), clean_value)
+    for idx in range(1, 41):
+        specs[f"ZCYLB{idx}"] = ("herb", idx - 1, "herb_type", clean_value)
+        specs[f"YYTJDM{idx}"] = ("herb", idx - 1, "route_code", clean_value)
+        specs[f"YYTJMC{idx}"] = ("herb", idx - 1, "route_name", clean_value)
+        specs[f"YYJS{idx}"] = ("herb", idx - 1, "dose_count", _to_int)
+
+    # 费用
+    for code in FEE_CODES:
+        specs[code] = ("fee", None, _fee_attr_for_code(code), _fee_value)
+    return specs
+
+
+_COLUMN_SPECS = _build_column_specs()
+
+# 列的取值类型（用于 Parquet 等带类型的格式）：计数列为整数、费用列为浮点，其余（含未映射列）为字符串
+_CONV_KINDS: dict[Callable[[Any], Any], str] = {_to_int: "int", _fee_value: "float"}
+
+
+def _column_kind(header: str) -> str:
+    spec = _COLUMN_SPECS.get(header)
+    return _CONV_KINDS.get(spec[3], "str") if spec is not None else "str"
+
+
+# (列序号, 属性名, 取值转换)
+_Slot = tuple[int, str, Callable[[Any], Any]]
+
+
+class ExportColumnPlan:
+    """由模板表头编译出的列计划：按来源分组的 (列序号, 属性, 转换)，模板中未映射的列固定为空。
+
+    每条记录只需分组排序一次明细，然后按计划直接写入预分配的行；缺少的明细项不产生任何写入。
+    """
+
+    def __init__(self, headers: Sequence[str]) -> None:
+        self.headers = tuple(headers)
+        self.width = len(self.headers)
+        self.kinds = tuple(_column_kind(header) for header in self.headers)
+        scalars: dict[str, list[_Slot]] = {"org": [], "base": [], "med": [], "fee": []}
+        items: dict[str, dict[int, list[_Slot]]] = {}
+        for index, header in enumerate(self.headers):
+            spec = _COLUMN_SPECS.get(header)
+            if spec is None:
+                continue
+            source, item_index, attr, conv = spec
+            if item_index is None:
+                scalars[source].append((index, attr, conv))
+            else:
+                items.setdefault(source, {}).setdefault(item_index, []).append((index, attr, conv))
+        self._scalars = {source: tuple(slots) for source, slots in scalars.items() if slots}
+        # 明细来源 -> 按明细序号排列的列组（序号超出模板列数的明细不输出）
+        self._items = {
+            source: tuple(tuple(by_index.get(i, ())) for i in range(max(by_index) + 1))
+            for source, by_index in items.items()
+        }
+
+    def build_row(self, record: Record) -> list[Any]:
+        base = record.base_info
+        org = record.org
+        if base is None or org is None:
+            raise AppError(code="internal_error", message="记录数据不完整", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        row: list[Any] = [None] * self.width
+        for source, slots in self._scalars.items():
+            if source == "org":
+                obj: Any = org
+            elif source == "base":
+                obj = base
+            elif source == "med":
+                obj = record.medication_summary
+            else:
+                obj = record.fee_summary
+                if obj is None:
+                    continue
+            for index, attr, conv in slots:
+                row[index] = conv(getattr(obj, attr, None))
+
+        if self._items:
+            for source, item_slots in self._items.items():
+                for item, slots in zip(self._sorted_items(record, source), item_slots):
+                    for index, attr, conv in slots:
+                        row[index] = conv(getattr(item, attr))
+        return row
+
+    @staticmethod
+    def _sorted_items(record: Record, source: str) -> list[Any]:
+        if source in _DIAG_GROUPS:
+            items = [d for d in record.diagnoses or [] if d.diag_type == source]
+        elif source == "tcm_op":
+            items = list(record.tcm_operations or [])
+        elif source == "surgery":
+            items = list(record.surgeries or [])
+        else:
+            items = list(record.herb_details or [])
+        items.sort(key=lambda item: int(item.seq_no))
+        return items
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import status
+from openpyxl import load_workbook
+
+from app.core.errors import AppError
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FILE_NAME = "3、中医门（急）诊诊疗信息页数据上传模板.xlsx"
+TEMPLATE_SHEET = "门（急）诊诊疗数据上传表头"
+
+_cache_lock = threading.Lock()
+# (模板路径, 工作表) -> (mtime_ns, size, 表头)
+_header_cache: dict[tuple[str, str], tuple[int, int, tuple[str, ...]]] = {}
+
+
+def default_template_path() -> Path:
+    project_root = Path(__file__).resolve().parents[3]
+    return project_root / TEMPLATE_FILE_NAME
+
+
+def sidecar_path(template_path: Path) -> Path:
+    return template_path.with_name(template_path.name + ".headers.json")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_template_headers(template_path: Path, sheet: str) -> list[str]:
+    """用 openpyxl 读取模板第一行表头（较慢，只在缓存/预编译文件失效时调用）。"""
+    wb = load_workbook(template_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet in wb.sheetnames else wb.worksheets[0]
+        first_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        return [str(v).strip() for v in first_row if v is not None]
+    finally:
+        wb.close()
+
+
+def write_sidecar(template_path: Path, sheet: str = TEMPLATE_SHEET) -> Path:
+    """预编译表头到 JSON（部署时执行），导出时按模板 sha256 校验后直接使用。"""
+    headers = parse_template_headers(template_path, sheet)
+    payload = {"sheet": sheet, "sha256": file_sha256(template_path), "headers": headers}
+    target = sidecar_path(template_path)
+    target.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    return target
+
+
+def _read_sidecar(template_path: Path, sheet: str) -> Optional[list[str]]:
+    path = sidecar_path(template_path)
+    if not path.is_file():
+        return None
+    try:
+        payload: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("Export template sidecar unreadable: %s", path, exc_info=True)
+        return None
+    if payload.get("sheet") != sheet or payload.get("sha256") != file_sha256(template_path):
+        logger.info("Export template sidecar outdated, reparsing %s", template_path)
+        return None
+    headers = payload.get("headers")
+    if not isinstance(headers, list):
+        return None
+    return [str(h) for h in headers]
+
+
+def get_template_headers(template_path: Path, sheet: str = TEMPLATE_SHEET) -> list[str]:
+    """返回模板表头：进程内按文件 mtime/size 缓存；失效时优先读取预编译 JSON，最后才解析工作簿。"""
+    try:
+        stat = template_path.stat()
+    except FileNotFoundError:
+        raise AppError(code="internal_error", message="导出模板文件不存在", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    key = (str(template_path), sheet)
+    cached = _header_cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return list(cached[2])
+
+    with _cache_lock:
+        cached = _header_cache.get(key)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return list(cached[2])
+        headers = _read_sidecar(template_path, sheet)
+        if headers is None:
+            headers = parse_template_headers(template_path, sheet)
+        if not headers:
+            raise AppError(code="internal_error", message="导出模板表头为空", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        _header_cache[key] = (stat.st_mtime_ns, stat.st_size, tuple(headers))
+        return list(headers)
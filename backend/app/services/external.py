@@ -1,23 +1,141 @@
 from __future__ import annotations
 
 import logging
+import threading
+from functools import lru_cache
 from typing import Any, Dict, Iterable, List, Optional
 
 from fastapi import status
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine import Engine
 
 from app.core.config import Settings, get_settings
 from app.core.errors import AppError
+from app.services.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 
-class ExternalDataAdapter:
+class ExternalEngineRegistry:
+    """进程级 HIS 连接池注册表：每个外部 DSN 在应用生命周期内只创建一个 Engine。"""
+
     def __init__(self, settings: Optional[Settings] = None) -> None:
         self.settings = settings or get_settings()
-        self.sqlserver_engine = self._create_engine(self.settings.external_sqlserver_dsn)
-        self.oracle_engine = self._create_engine(self.settings.external_oracle_dsn)
+        self._lock = threading.Lock()
+        self._engines: dict[str, Engine] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+        self._dsns = {
+            "sqlserver": self.settings.external_sqlserver_dsn,
+            "oracle": self.settings.external_oracle_dsn,
+        }
+
+    def get_engine(self, name: str) -> Optional[Engine]:
+        dsn = self._dsns.get(name)
+        if not dsn:
+            return None
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(name)
+            if engine is None:
+                engine = self._create_engine(name, dsn)
+                self._engines[name] = engine
+        return engine
+
+    def _create_engine(self, name: str, dsn: str) -> Engine:
+        engine = create_engine(
+            dsn,
+            pool_pre_ping=True,
+            pool_size=self.settings.external_pool_size,
+            max_overflow=self.settings.external_max_overflow,
+            pool_recycle=self.settings.external_pool_recycle_seconds,
+            pool_timeout=self.settings.external_pool_timeout_seconds,
+        )
+        counters = {"connects": 0, "checkouts": 0}
+        self._counters[name] = counters
+
+        # 计数器只做粗粒度统计，未加锁（极少量丢失可接受）
+        def _on_connect(*_args: Any) -> None:
+            counters["connects"] += 1
+
+        def _on_checkout(*_args: Any) -> None:
+            counters["checkouts"] += 1
+
+        event.listen(engine, "connect", _on_connect)
+        event.listen(engine, "checkout", _on_checkout)
+        return engine
+
+    def warmup(self) -> None:
+        count = max(0, int(self.settings.external_pool_warmup))
+        if count == 0:
+            return
+        for name in self._dsns:
+            conns = []
+            try:
+                engine = self.get_engine(name)
+                if engine is None:
+                    continue
+                for _ in range(min(count, self.settings.external_pool_size)):
+                    conns.append(engine.connect())
+                logger.info("External pool %s warmed up with %s connection(s)", name, len(conns))
+            except Exception:
+                logger.warning("External pool %s warmup failed", name, exc_info=True)
+            finally:
+                for conn in conns:
+                    conn.close()
+
+    def pool_stats(self) -> list[dict[str, Any]]:
+        stats: list[dict[str, Any]] = []
+        for name, engine in list(self._engines.items()):
+            pool = engine.pool
+            counters = self._counters.get(name, {})
+            stats.append(
+                {
+                    "name": name,
+                    "pool_size": _pool_metric(pool, "size"),
+                    "checked_in": _pool_metric(pool, "checkedin"),
+                    "checked_out": _pool_metric(pool, "checkedout"),
+                    "overflow": _pool_metric(pool, "overflow"),
+                    "connects": int(counters.get("connects", 0)),
+                    "checkouts": int(counters.get("checkouts", 0)),
+                }
+            )
+        return stats
+
+    def dispose(self) -> None:
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+            self._counters.clear()
+
+
+def _pool_metric(pool: Any, attr: str) -> Optional[int]:
+    getter = getattr(pool, attr, None)
+    if getter is None:
+        return None
+    try:
+        return int(getter())
+    except Exception:
+        return None
+
+
+class ExternalDataAdapter:
+    def __init__(self, settings: Optional[Settings] = None, registry: Optional[ExternalEngineRegistry] = None) -> None:
+        self.settings = settings or get_settings()
+        self.registry = registry or get_external_registry()
+        # 同一患者在打开/保存/提交/打印流程中会被反复查询，按 patient_no 缓存结果
+        self.base_info_cache: TTLCache[Dict[str, Any]] = TTLCache(
+            name="base_info",
+            ttl_seconds=self.settings.external_cache_ttl_seconds,
+            max_entries=self.settings.external_cache_max_entries,
+        )
+        self.fee_cache: TTLCache[Dict[str, Any]] = TTLCache(
+            name="patient_fee",
+            ttl_seconds=self.settings.external_cache_ttl_seconds,
+            max_entries=self.settings.external_cache_max_entries,
+        )
         # 基础信息视图使用 JZKH（就诊卡号/病历号），费用视图使用 BLH
         self.base_info_query = text(
             "SELECT * FROM V_EMR_MZ_PAT_MASTER_INDEX WHERE JZKH = :patient_no"
@@ -34,10 +152,13 @@ class ExternalDataAdapter:
             """
         )
 
-    def _create_engine(self, dsn: Optional[str]) -> Optional[Engine]:
-        if not dsn:
-            return None
-        return create_engine(dsn, pool_pre_ping=True)
+    @property
+    def sqlserver_engine(self) -> Optional[Engine]:
+        return self.registry.get_engine("sqlserver")
+
+    @property
+    def oracle_engine(self) -> Optional[Engine]:
+        return self.registry.get_engine("oracle")
 
     def _run_query(self, query, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         engine = self.sqlserver_engine or self.oracle_engine
@@ -63,13 +184,42 @@ class ExternalDataAdapter:
                 detail=detail,
             ) from exc
 
+    def _fetch_first(self, query, patient_no: str) -> Optional[Dict[str, Any]]:
+        rows = self._run_query(query, {"patient_no": patient_no})
+        return dict(rows[0]) if rows else None
+
     def fetch_base_info(self, patient_no: str) -> Optional[Dict[str, Any]]:
-        rows = self._run_query(self.base_info_query, {"patient_no": patient_no})
-        return rows[0] if rows else None
+        row = self.base_info_cache.get_or_load(patient_no, lambda: self._fetch_first(self.base_info_query, patient_no))
+        return dict(row) if row is not None else None
 
     def fetch_patient_fee(self, patient_no: str) -> Optional[Dict[str, Any]]:
-        rows = self._run_query(self.fee_query, {"patient_no": patient_no})
-        return rows[0] if rows else None
+        row = self.fee_cache.get_or_load(patient_no, lambda: self._fetch_first(self.fee_query, patient_no))
+        return dict(row) if row is not None else None
+
+    def invalidate_patient(self, patient_no: Optional[str] = None) -> None:
+        """清除指定患者（或全部）的缓存结果，下次访问重新查询 HIS。"""
+        self.base_info_cache.invalidate(patient_no)
+        self.fee_cache.invalidate(patient_no)
+
+    def cache_stats(self) -> list[dict[str, Any]]:
+        return [self.base_info_cache.stats(), self.fee_cache.stats()]
 
     def fetch_visit_list(self, *, from_dt, to_dt) -> List[Dict[str, Any]]:
         return self._run_query(self.visit_list_query, {"from_dt": from_dt, "to_dt": to_dt})
+
+
+@lru_cache(maxsize=1)
+def get_external_registry() -> ExternalEngineRegistry:
+    return ExternalEngineRegistry(get_settings())
+
+
+@lru_cache(maxsize=1)
+def get_shared_external_adapter() -> ExternalDataAdapter:
+    return ExternalDataAdapter(get_settings(), get_external_registry())
+
+
+def reset_external_cache() -> None:
+    get_shared_external_adapter.cache_clear()
+    if get_external_registry.cache_info().currsize:
+        get_external_registry().dispose()
+    get_external_registry.cache_clear()
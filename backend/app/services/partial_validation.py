@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from fastapi import status
+from sqlalchemy.orm import Session
+
+from app.core.errors import AppError
+from app.schemas.records import MedicationSummaryReadOnly
+from app.schemas.validation import (
+    BaseInfoPatch,
+    FieldError,
+    PartialValidateRequest,
+    PartialValidateResponse,
+    RecordPayloadPatch,
+)
+from app.services.utils import normalize_seq
+from app.services.validation import SECTION_FIELD_PREFIXES, ValidationService, field_matches
+
+
+def _build_record(payload: RecordPayloadPatch, medication: Optional[MedicationSummaryReadOnly]) -> Any:
+    """由片段构造仅供校验的临时记录（普通对象，不进入会话）；明细序号按保存时的规则重新编号。"""
+    base_values: dict[str, Any] = dict.fromkeys(BaseInfoPatch.model_fields)
+    if payload.base_info is not None:
+        base_values.update(payload.base_info.model_dump(exclude_unset=True))
+
+    diagnoses: list[SimpleNamespace] = []
+    grouped: dict[str, list[dict[str, Any]]] = {}
+    for item in payload.diagnoses or []:
+        grouped.setdefault(item.diag_type, []).append(item.model_dump())
+    for group_items in grouped.values():
+        diagnoses.extend(SimpleNamespace(**item) for item in normalize_seq(group_items))
+
+    def _items(items: Optional[list[Any]]) -> list[SimpleNamespace]:
+        return [SimpleNamespace(**item) for item in normalize_seq([i.model_dump() for i in items or []])]
+
+    # 未提供用药标识时以空值代替：用药标识本身的错误不在实时校验范围内，中草药明细规则照常执行
+    med_values = (
+        medication.model_dump() if medication is not None else dict.fromkeys(MedicationSummaryReadOnly.model_fields)
+    )
+    return SimpleNamespace(
+        base_info=SimpleNamespace(**base_values),
+        diagnoses=diagnoses,
+        tcm_operations=_items(payload.tcm_operations),
+        surgeries=_items(payload.surgeries),
+        herb_details=_items(payload.herb_details),
+        medication_summary=SimpleNamespace(**med_values),
+        fee_summary=None,
+    )
+
+
+def _in_scope(error: FieldError, fields: list[str]) -> bool:
+    # 请求路径与错误路径互为前缀均视为相关（如请求 diagnosis.wm_main.1 时也返回 diagnosis.wm_main 的条数错误）
+    return field_matches(error.field, fields) or any(field_matches(f, (error.field,)) for f in fields)
+
+
+class PartialValidationService:
+    """表单实时校验：只执行片段涉及分区的规则，字典查找走进程内快照，不读写记录表。"""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def validate(self, request: PartialValidateRequest) -> PartialValidateResponse:
+        payload = request.payload
+        sections = [name for name in SECTION_FIELD_PREFIXES if getattr(payload, name) is not None]
+        if not sections:
+            raise AppError(
+                code="validation_failed",
+                message="未传入需要校验的内容",
+                http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        fields = [f.strip() for f in request.fields or [] if f and f.strip()]
+        if fields:
+            sections = [
+                name
+                for name in sections
+                if any(field_matches(f, (SECTION_FIELD_PREFIXES[name],)) for f in fields)
+            ]
+
+        record = _build_record(payload, request.medication_summary)
+        errors = ValidationService(self.db).validate_sections(record, sections)
+
+        if fields:
+            errors = [error for error in errors if _in_scope(error, fields)]
+        elif payload.base_info is not None:
+            # 基础信息只返回实际传入字段的错误，未传入的字段按“尚未填写到”处理
+            sent = {f"base_info.{name}" for name in payload.base_info.model_fields_set}
+            errors = [error for error in errors if not error.field.startswith("base_info.") or error.field in sent]
+        return PartialValidateResponse(sections=sections, errors=errors)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+# 汉字 -> 拼音对照表（随代码发布，离线可用）
+_TABLE_PATH = Path(__file__).resolve().parents[1] / "data" / "pinyin_table.txt"
+
+# 多音字在医学、中药名称中的常用读音；转换时按最长词优先匹配，其余汉字取对照表中的常用读音
+_PHRASES: dict[str, tuple[str, ...]] = {
+    "膀胱": ("pang", "guang"),
+    "咯血": ("ka", "xue"),
+    "落枕": ("lao", "zhen"),
+    "着凉": ("zhao", "liang"),
+    "长期": ("chang", "qi"),
+    "重叠": ("chong", "die"),
+    "还原": ("huan", "yuan"),
+    "鼻塞": ("bi", "se"),
+    "栓塞": ("shuan", "se"),
+    "阻塞": ("zu", "se"),
+    "梗塞": ("geng", "se"),
+    "调理": ("tiao", "li"),
+    "调经": ("tiao", "jing"),
+    "失调": ("shi", "tiao"),
+    "丹参": ("dan", "shen"),
+    "人参": ("ren", "shen"),
+    "党参": ("dang", "shen"),
+    "沙参": ("sha", "shen"),
+    "苦参": ("ku", "shen"),
+    "玄参": ("xuan", "shen"),
+    "太子参": ("tai", "zi", "shen"),
+    "西洋参": ("xi", "yang", "shen"),
+    "白术": ("bai", "zhu"),
+    "苍术": ("cang", "zhu"),
+    "厚朴": ("hou", "po"),
+    "枳壳": ("zhi", "qiao"),
+    "薄荷": ("bo", "he"),
+    "藏红花": ("zang", "hong", "hua"),
+    "桔梗": ("jie", "geng"),
+    "蛤蚧": ("ge", "jie"),
+    "莪术": ("e", "zhu"),
+    "卒中": ("cu", "zhong"),
+}
+_PHRASE_MAX_LEN = max(len(phrase) for phrase in _PHRASES)
+
+# 与 dict_item.pinyin / pinyin_abbr 的列宽一致
+PINYIN_MAX_LEN = 255
+PINYIN_ABBR_MAX_LEN = 100
+
+
+@lru_cache(maxsize=1)
+def _char_table() -> dict[str, str]:
+    table: dict[str, str] = {}
+    with _TABLE_PATH.open(encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip() or line.startswith("#"):
+                continue
+            syllable, chars = line.rstrip("\n").split("\t", 1)
+            for char in chars:
+                table.setdefault(char, syllable)
+    return table
+
+
+def _tokens(text: str) -> list[tuple[str, bool]]:
+    """拆分为 (片段, 是否为汉字读音)：汉字逐字取读音，连续的字母/数字整体保留，其余字符忽略。"""
+    table = _char_table()
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens: list[tuple[str, bool]] = []
+    pos, size = 0, len(text)
+    while pos < size:
+        for length in range(min(_PHRASE_MAX_LEN, size - pos), 1, -1):
+            phrase = _PHRASES.get(text[pos : pos + length])
+            if phrase is not None:
+                tokens.extend((syllable, True) for syllable in phrase)
+                pos += length
+                break
+        else:
+            char = text[pos]
+            if char in table:
+                tokens.append((table[char], True))
+                pos += 1
+            elif char.isascii() and char.isalnum():
+                end = pos + 1
+                while end < size and text[end].isascii() and text[end].isalnum():
+                    end += 1
+                tokens.append((text[pos:end], False))
+                pos = end
+            else:
+                pos += 1
+    return tokens
+
+
+def to_pinyin(text: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    """返回 (全拼, 首字母)，小写且无分隔，便于前缀检索（如 "感冒" -> ("ganmao", "gm")）。
+
+    名称中的字母、数字原样保留（"2型糖尿病" -> ("2xingtangniaobing", "2xtnb")）；无可转换内容时返回 (None, None)。
+    """
+    tokens = _tokens(text or "")
+    if not tokens:
+        return None, None
+    full = "".join(token for token, _ in tokens)
+    abbr = "".join(token[0] if is_han else token for token, is_han in tokens)
+    return full[:PINYIN_MAX_LEN], abbr[:PINYIN_ABBR_MAX_LEN]
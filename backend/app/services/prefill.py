@@ -8,13 +8,22 @@ from app.core.errors import AppError
 from app.schemas.prefill import FieldValue, PrefillResponse
 from app.schemas.auth import SessionPayload
 from app.services.auth import VisitAccessContext, validate_patient_access
+from app.services.dict_cache import DictResolver
 from app.services.external import ExternalDataAdapter
 from app.services.utils import clean_value, first_value
+from app.services.validation_rules import BASE_DICT_SETS, MEDICATION_FIELDS
+
+# 预填充字段 -> 字典集（字段名为外部视图的大写列名）
+_FIELD_DICT_SETS = {
+    **{name.upper(): set_code for name, set_code in BASE_DICT_SETS.items()},
+    **{name.upper(): "RC016" for name in MEDICATION_FIELDS},
+}
 
 
 class PrefillService:
-    def __init__(self, adapter: ExternalDataAdapter) -> None:
+    def __init__(self, adapter: ExternalDataAdapter, resolver: Optional[DictResolver] = None) -> None:
         self.adapter = adapter
+        self.resolver = resolver
 
     def prefill(self, patient_no: str, session: SessionPayload) -> PrefillResponse:
         try:
@@ -54,6 +63,8 @@ class PrefillService:
             ) from exc
 
         fields = self._build_fields(base_map, dict(fee_info) if fee_info else None)
+        if self.resolver is not None:
+            self._attach_labels(fields)
         visit_time = first_value(base_map, ["JZSJ", "jzsj"])
 
         return PrefillResponse(
@@ -115,3 +126,13 @@ class PrefillService:
                 fields[out_key] = FieldValue(value=clean_value(value), source="prefill", readonly=True)
 
         return fields
+
+    def _attach_labels(self, fields: Dict[str, FieldValue]) -> None:
+        pairs = {
+            name: (set_code, fields[name].value)
+            for name, set_code in _FIELD_DICT_SETS.items()
+            if name in fields and fields[name].value is not None
+        }
+        names = self.resolver.resolve(pairs.values())
+        for name, (set_code, code) in pairs.items():
+            fields[name].label = names.get((set_code, str(code)))
@@ -6,16 +6,19 @@ from typing import Any, Optional
 
 from fastapi import status
 from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 from app.core.errors import AppError
 from app.models.export_log import ExportLog
 from app.models.record import Record
 from app.schemas.auth import SessionPayload
 from app.services.auth import VisitAccessContext, validate_patient_access
+from app.services.dict_cache import DictResolver
 from app.services.external import ExternalDataAdapter
+from app.services.record_loading import record_load_options
 from app.services.utils import first_value
 from app.services.validation import ValidationService
+from app.services.validation_rules import BASE_DICT_SETS, MEDICATION_FIELDS
 
 
 def _fmt(value: Any) -> str:
@@ -52,7 +55,7 @@ class PrintService:
                     http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 )
 
-            errors = ValidationService(self.db).validate_for_submit(record)
+            errors = ValidationService(self.db).validate_record(record)
             if errors:
                 raise AppError(
                     code="validation_failed",
@@ -81,16 +84,7 @@ class PrintService:
         stmt = (
             select(Record)
             .where(Record.id == record_id)
-            .options(
-                joinedload(Record.org),
-                joinedload(Record.base_info),
-                joinedload(Record.diagnoses),
-                joinedload(Record.tcm_operations),
-                joinedload(Record.surgeries),
-                joinedload(Record.medication_summary),
-                joinedload(Record.herb_details),
-                joinedload(Record.fee_summary),
-            )
+            .options(*record_load_options(include_org=True))
         )
         return self.db.execute(stmt).scalars().first()
 
@@ -147,6 +141,22 @@ class PrintService:
         wm_main = _first_diag("wm_main")
         tcm_syndromes = sorted([d for d in (record.diagnoses or []) if d.diag_type == "tcm_syndrome"], key=lambda d: int(d.seq_no))
         wm_others = sorted([d for d in (record.diagnoses or []) if d.diag_type == "wm_other"], key=lambda d: int(d.seq_no))
+        med = record.medication_summary
+
+        # 字典字段显示为“编码 名称”，名称一次批量解析
+        pairs = [(set_code, getattr(base, field)) for field, set_code in BASE_DICT_SETS.items()]
+        pairs += [("RC016", getattr(med, field, None)) for field in MEDICATION_FIELDS]
+        for surgery in record.surgeries or []:
+            pairs += [("RC013", surgery.anesthesia_method), ("RC029", surgery.surgery_level)]
+        pairs += [("HERB_TYPE", h.herb_type) for h in record.herb_details or []]
+        labels = DictResolver(self.db).resolve(pairs)
+
+        def _dict(set_code: str, value: Any) -> str:
+            name = labels.get((set_code, str(value))) if value is not None else None
+            return f"{_esc(value)} {_esc(name)}" if name else _esc(value)
+
+        def _base(field: str) -> str:
+            return _dict(BASE_DICT_SETS[field], getattr(base, field))
 
         parts: list[str] = []
         parts.append(
@@ -185,23 +195,23 @@ class PrintService:
         parts.append(f"<tr><th>医疗机构名称（JGMC）</th><td>{_esc(org.jgmc)}</td><th>组织机构代码（ZZJGDM）</th><td>{_esc(org.zzjgdm)}</td></tr>")
         parts.append(f"<tr><th>系统登录用户名（USERNAME）</th><td>{_esc(base.username)}</td><th>就诊卡号/病案号（JZKH）</th><td>{_esc(base.jzkh)}</td></tr>")
         parts.append(f"<tr><th>挂号时间（GHSJ）</th><td>{_esc(base.ghsj)}</td><th>报到时间（BDSJ）</th><td>{_esc(base.bdsj)}</td></tr>")
-        parts.append(f"<tr><th>就诊时间（JZSJ）</th><td>{_esc(base.jzsj)}</td><th>就诊类型（JZLX）</th><td>{_esc(base.jzlx)}</td></tr>")
+        parts.append(f"<tr><th>就诊时间（JZSJ）</th><td>{_esc(base.jzsj)}</td><th>就诊类型（JZLX）</th><td>{_base('jzlx')}</td></tr>")
         parts.append(f"<tr><th>就诊科室（JZKS）</th><td>{_esc(base.jzks)}</td><th>就诊科室代码（JZKSDM）</th><td>{_esc(base.jzksdm)}</td></tr>")
-        parts.append(f"<tr><th>接诊医师（JZYS）</th><td>{_esc(base.jzys)}</td><th>接诊医师职称（JZYSZC）</th><td>{_esc(base.jzyszc)}</td></tr>")
-        parts.append(f"<tr><th>急诊患者分级（JZHZFJ）</th><td>{_esc(base.jzhzfj)}</td><th>急诊患者去向（JZHZQX）</th><td>{_esc(base.jzhzqx)}</td></tr>")
+        parts.append(f"<tr><th>接诊医师（JZYS）</th><td>{_esc(base.jzys)}</td><th>接诊医师职称（JZYSZC）</th><td>{_base('jzyszc')}</td></tr>")
+        parts.append(f"<tr><th>急诊患者分级（JZHZFJ）</th><td>{_base('jzhzfj')}</td><th>急诊患者去向（JZHZQX）</th><td>{_base('jzhzqx')}</td></tr>")
         parts.append(f"<tr><th>住院证开具时间（ZYZKJSJ）</th><td colspan='3'>{_esc(base.zyzkjsj)}</td></tr>")
         parts.append("</table>")
 
         parts.append("<h2>患者基本信息</h2>")
         parts.append("<table class='kv'>")
-        parts.append(f"<tr><th>姓名（XM）</th><td>{_esc(base.xm)}</td><th>性别（XB）</th><td>{_esc(base.xb)}</td></tr>")
-        parts.append(f"<tr><th>出生日期（CSRQ）</th><td>{_esc(base.csrq)}</td><th>婚姻（HY）</th><td>{_esc(base.hy)}</td></tr>")
-        parts.append(f"<tr><th>国籍（GJ）</th><td>{_esc(base.gj)}</td><th>民族（MZ）</th><td>{_esc(base.mz)}</td></tr>")
-        parts.append(f"<tr><th>证件类别（ZJLB）</th><td>{_esc(base.zjlb)}</td><th>证件号码（ZJHM）</th><td>{_esc(base.zjhm)}</td></tr>")
+        parts.append(f"<tr><th>姓名（XM）</th><td>{_esc(base.xm)}</td><th>性别（XB）</th><td>{_base('xb')}</td></tr>")
+        parts.append(f"<tr><th>出生日期（CSRQ）</th><td>{_esc(base.csrq)}</td><th>婚姻（HY）</th><td>{_base('hy')}</td></tr>")
+        parts.append(f"<tr><th>国籍（GJ）</th><td>{_base('gj')}</td><th>民族（MZ）</th><td>{_base('mz')}</td></tr>")
+        parts.append(f"<tr><th>证件类别（ZJLB）</th><td>{_base('zjlb')}</td><th>证件号码（ZJHM）</th><td>{_esc(base.zjhm)}</td></tr>")
         parts.append(f"<tr><th>现住址（XZZ）</th><td colspan='3'>{_esc(base.xzz)}</td></tr>")
-        parts.append(f"<tr><th>联系电话（LXDH）</th><td>{_esc(base.lxdh)}</td><th>药物过敏史（YWGMS）</th><td>{_esc(base.ywgms)}</td></tr>")
+        parts.append(f"<tr><th>联系电话（LXDH）</th><td>{_esc(base.lxdh)}</td><th>药物过敏史（YWGMS）</th><td>{_base('ywgms')}</td></tr>")
         parts.append(f"<tr><th>过敏药物（GMYW）</th><td colspan='3'>{_esc(base.gmyw)}</td></tr>")
-        parts.append(f"<tr><th>其他过敏史（QTGMS）</th><td>{_esc(base.qtgms)}</td><th>其他过敏原（QTGMY）</th><td>{_esc(base.qtgmy)}</td></tr>")
+        parts.append(f"<tr><th>其他过敏史（QTGMS）</th><td>{_base('qtgms')}</td><th>其他过敏原（QTGMY）</th><td>{_esc(base.qtgmy)}</td></tr>")
         parts.append("</table>")
 
         parts.append("<h2>主诉</h2>")
@@ -250,9 +260,9 @@ class PrintService:
                 f"<td>{_esc(s.op_code)}</td>"
                 f"<td>{_esc(s.op_time)}</td>"
                 f"<td>{_esc(s.operator_name)}</td>"
-                f"<td>{_esc(s.anesthesia_method)}</td>"
+                f"<td>{_dict('RC013', s.anesthesia_method)}</td>"
                 f"<td>{_esc(s.anesthesia_doctor)}</td>"
-                f"<td>{_esc(s.surgery_level)}</td>"
+                f"<td>{_dict('RC029', s.surgery_level)}</td>"
                 "</tr>"
             )
         if not record.surgeries:
@@ -260,16 +270,15 @@ class PrintService:
         parts.append("</table>")
 
         parts.append("<h2>用药情况</h2>")
-        med = record.medication_summary
         parts.append("<table class='kv'>")
         parts.append(
-            f"<tr><th>是否使用西药（XYSY）</th><td>{_esc(getattr(med, 'xysy', None))}</td><th>是否使用中成药（ZCYSY）</th><td>{_esc(getattr(med, 'zcysy', None))}</td></tr>"
+            f"<tr><th>是否使用西药（XYSY）</th><td>{_dict('RC016', getattr(med, 'xysy', None))}</td><th>是否使用中成药（ZCYSY）</th><td>{_dict('RC016', getattr(med, 'zcysy', None))}</td></tr>"
         )
         parts.append(
-            f"<tr><th>是否使用中药制剂（ZYZJSY）</th><td>{_esc(getattr(med, 'zyzjsy', None))}</td><th>是否使用传统饮片（CTYPSY）</th><td>{_esc(getattr(med, 'ctypsy', None))}</td></tr>"
+            f"<tr><th>是否使用中药制剂（ZYZJSY）</th><td>{_dict('RC016', getattr(med, 'zyzjsy', None))}</td><th>是否使用传统饮片（CTYPSY）</th><td>{_dict('RC016', getattr(med, 'ctypsy', None))}</td></tr>"
         )
         parts.append(
-            f"<tr><th>是否使用配方颗粒（PFKLSY）</th><td colspan='3'>{_esc(getattr(med, 'pfklsy', None))}</td></tr>"
+            f"<tr><th>是否使用配方颗粒（PFKLSY）</th><td colspan='3'>{_dict('RC016', getattr(med, 'pfklsy', None))}</td></tr>"
         )
         parts.append("</table>")
 
@@ -278,7 +287,7 @@ class PrintService:
         parts.append("<tr><th>序号</th><th>类别（ZCYLB）</th><th>途径代码（YYTJDM）</th><th>途径名称（YYTJMC）</th><th>剂数（YYJS）</th></tr>")
         for h in sorted(record.herb_details or [], key=lambda o: int(o.seq_no)):
             parts.append(
-                f"<tr><td>{_esc(h.seq_no)}</td><td>{_esc(h.herb_type)}</td><td>{_esc(h.route_code)}</td><td>{_esc(h.route_name)}</td><td>{_esc(h.dose_count)}</td></tr>"
+                f"<tr><td>{_esc(h.seq_no)}</td><td>{_dict('HERB_TYPE', h.herb_type)}</td><td>{_esc(h.route_code)}</td><td>{_esc(h.route_name)}</td><td>{_esc(h.dose_count)}</td></tr>"
             )
         if not record.herb_details:
             parts.append("<tr><td colspan='5' class='muted'>（无）</td></tr>")
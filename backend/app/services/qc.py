@@ -4,7 +4,7 @@ from typing import Optional
 
 from fastapi import status
 from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 from app.core.errors import AppError
 from app.models.field_audit import FieldAudit
@@ -14,6 +14,7 @@ from app.schemas.qc import FieldAuditOut, RecordQcResponse
 from app.schemas.records import RecordMeta
 from app.services.auth import VisitAccessContext, validate_patient_access
 from app.services.external import ExternalDataAdapter
+from app.services.record_loading import record_load_options
 from app.services.utils import first_value
 from app.services.validation import ValidationService
 
@@ -30,7 +31,7 @@ class QcService:
 
         self._ensure_access(record, session)
 
-        errors = ValidationService(self.db).validate_for_submit(record)
+        errors = ValidationService(self.db).validate_record(record)
         audits = self._load_audits(record_id)
 
         meta = RecordMeta(
@@ -47,15 +48,7 @@ class QcService:
         stmt = (
             select(Record)
             .where(Record.id == record_id)
-            .options(
-                joinedload(Record.base_info),
-                joinedload(Record.diagnoses),
-                joinedload(Record.tcm_operations),
-                joinedload(Record.surgeries),
-                joinedload(Record.herb_details),
-                joinedload(Record.medication_summary),
-                joinedload(Record.fee_summary),
-            )
+            .options(*record_load_options())
         )
         return self.db.execute(stmt).scalars().first()
 
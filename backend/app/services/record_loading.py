@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.models.record import Record
+
+
+def record_load_options(*, include_org: bool = False) -> list[LoaderOption]:
+    """加载完整首页记录（聚合）时使用的统一预加载策略。
+
+    一对一/多对一关系随主查询 JOIN 取回（不会放大行数）；一对多明细（诊断/中医操作/手术/中草药）
+    各自用一条 `IN (...)` 查询加载，避免多个集合 JOIN 在一起产生笛卡尔积。
+    单条记录固定为 1 + 4 条查询；批量加载时 selectinload 会按主键分块，查询数与记录数无关。
+    """
+    options: list[LoaderOption] = [
+        joinedload(Record.base_info),
+        joinedload(Record.medication_summary),
+        joinedload(Record.fee_summary),
+        selectinload(Record.diagnoses),
+        selectinload(Record.tcm_operations),
+        selectinload(Record.surgeries),
+        selectinload(Record.herb_details),
+    ]
+    if include_org:
+        options.insert(0, joinedload(Record.org))
+    return options
@@ -7,7 +7,7 @@ from typing import Any, Dict, Optional
 
 from fastapi import status
 from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 from app.core.errors import AppError
 from app.models.base_info import BaseInfo
@@ -36,7 +36,8 @@ from app.schemas.records import (
 )
 from app.services.auth import VisitAccessContext, validate_patient_access
 from app.services.external import ExternalDataAdapter
-from app.services.utils import as_str, clean_value, first_value
+from app.services.record_loading import record_load_options
+from app.services.utils import as_str, clean_value, first_value, normalize_seq
 from app.services.validation import ValidationService
 
 
@@ -145,17 +146,6 @@ FEE_FIELDS = (
 )
 
 
-def _normalize_seq(items: list[dict[str, Any]], key: str = "seq_no") -> list[dict[str, Any]]:
-    if not items:
-        return []
-    sortable = all(isinstance(item.get(key), int) for item in items)
-    if sortable:
-        items = sorted(items, key=lambda item: int(item[key]))
-    for idx, item in enumerate(items, start=1):
-        item[key] = idx
-    return items
-
-
 class RecordService:
     def __init__(self, db: Session, external: ExternalDataAdapter) -> None:
         self.db = db
@@ -214,7 +204,8 @@ class RecordService:
         self._apply_readonly_from_external(record, fee_row)
         record.prefill_snapshot = {"base_info": _jsonable(base_row), "patient_fee": _jsonable(fee_row)}
 
-        errors = ValidationService(self.db).validate_for_submit(record)
+        validator = ValidationService(self.db)
+        errors = validator.validate_for_submit(record)
         if errors:
             raise AppError(
                 code="validation_failed",
@@ -232,21 +223,15 @@ class RecordService:
         self._write_audits(record, old_snapshot, self._flatten_record(record), operator=session)
         self.db.commit()
         self.db.refresh(record)
+        # 提交内容即刚通过校验的内容，按提交后的版本保存结果，打印/质控/导出可直接复用
+        validator.save_results([record], {record.id: []})
         return self._to_response(record)
 
     def _load_record(self, patient_no: str) -> Optional[Record]:
         stmt = (
             select(Record)
             .where(Record.patient_no == patient_no)
-            .options(
-                joinedload(Record.base_info),
-                joinedload(Record.diagnoses),
-                joinedload(Record.tcm_operations),
-                joinedload(Record.surgeries),
-                joinedload(Record.herb_details),
-                joinedload(Record.medication_summary),
-                joinedload(Record.fee_summary),
-            )
+            .options(*record_load_options())
         )
         return self.db.execute(stmt).scalars().first()
 
@@ -339,7 +324,7 @@ class RecordService:
             grouped.setdefault(item.diag_type, []).append(item.model_dump())
 
         for diag_type, group_items in grouped.items():
-            normalized = _normalize_seq(group_items, key="seq_no")
+            normalized = normalize_seq(group_items, key="seq_no")
             for item in normalized:
                 record.diagnoses.append(
                     Diagnosis(
@@ -354,7 +339,7 @@ class RecordService:
 
     def _replace_tcm_ops(self, record: Record, items: Iterable[TcmOperationItem]) -> None:
         record.tcm_operations.clear()
-        normalized = _normalize_seq([item.model_dump() for item in items], key="seq_no")
+        normalized = normalize_seq([item.model_dump() for item in items], key="seq_no")
         for item in normalized:
             record.tcm_operations.append(
                 TcmOperation(
@@ -370,7 +355,7 @@ class RecordService:
 
     def _replace_surgeries(self, record: Record, items: Iterable[SurgeryItem]) -> None:
         record.surgeries.clear()
-        normalized = _normalize_seq([item.model_dump() for item in items], key="seq_no")
+        normalized = normalize_seq([item.model_dump() for item in items], key="seq_no")
         for item in normalized:
             record.surgeries.append(
                 Surgery(
@@ -389,7 +374,7 @@ class RecordService:
 
     def _replace_herbs(self, record: Record, items: Iterable[HerbDetailItem]) -> None:
         record.herb_details.clear()
-        normalized = _normalize_seq([item.model_dump() for item in items], key="seq_no")
+        normalized = normalize_seq([item.model_dump() for item in items], key="seq_no")
         for item in normalized:
             record.herb_details.append(
                 HerbDetail(
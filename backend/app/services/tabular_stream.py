@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Iterable, Iterator, Sequence
+
+from fastapi import status
+
+from app.core.errors import AppError
+from app.services.xlsx_stream import ChunkSink
+
+
+def iter_csv(
+    *,
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    bom: bool = True,
+    chunk_size: int = 64 * 1024,
+) -> Iterator[bytes]:
+    """逐行生成 UTF-8 CSV；bom=True 时带 BOM，便于 Excel 直接识别中文。"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    if bom:
+        buffer.write("\ufeff")
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise AppError(
+            code="internal_error",
+            message="服务器未安装 pyarrow，暂不支持 Parquet 导出",
+            http_status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        ) from exc
+    return pyarrow
+
+
+def iter_parquet(
+    *,
+    headers: Sequence[str],
+    kinds: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    row_group_size: int = 10000,
+) -> Iterator[bytes]:
+    """按行组生成 Parquet 文件内容；kinds 为每列类型（int/float/str），每写完一个行组产出一段。
+
+    pyarrow 在调用时即检查（而不是迭代时），未安装时在响应开始前返回错误。
+    """
+    pa = _require_pyarrow()
+    return _parquet_chunks(pa, headers=headers, kinds=kinds, rows=rows, row_group_size=row_group_size)
+
+
+def _parquet_chunks(
+    pa: Any,
+    *,
+    headers: Sequence[str],
+    kinds: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    row_group_size: int,
+) -> Iterator[bytes]:
+    type_map = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    schema = pa.schema([pa.field(name, type_map[kind]) for name, kind in zip(headers, kinds)])
+    text_columns = [index for index, kind in enumerate(kinds) if kind == "str"]
+
+    def _table(batch: list[Sequence[Any]]) -> Any:
+        columns = [[row[index] for row in batch] for index in range(len(headers))]
+        # 字符串列中可能混有数值（如未做转换的编码），统一转为文本
+        for index in text_columns:
+            columns[index] = [None if v is None else str(v) for v in columns[index]]
+        return pa.Table.from_arrays(
+            [pa.array(values, type=schema.field(index).type) for index, values in enumerate(columns)],
+            schema=schema,
+        )
+
+    sink = ChunkSink()
+    writer = pa.parquet.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        batch: list[Sequence[Any]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(_table(batch))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_table(_table(batch))
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
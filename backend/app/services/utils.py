@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any, Dict, Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from app.core.config import Settings
 
 
 def clean_value(value: Any) -> Any:
@@ -26,3 +30,19 @@ def as_str(value: Any) -> Optional[str]:
         value = int(value)
     return str(value).strip()
 
+
+def normalize_seq(items: list[dict[str, Any]], key: str = "seq_no") -> list[dict[str, Any]]:
+    # 明细按序号排序后重新编号为 1..n（保存与实时校验共用）
+    if not items:
+        return []
+    sortable = all(isinstance(item.get(key), int) for item in items)
+    if sortable:
+        items = sorted(items, key=lambda item: int(item[key]))
+    for idx, item in enumerate(items, start=1):
+        item[key] = idx
+    return items
+
+
+def local_now(settings: Settings) -> datetime:
+    # 外部视图 JZSJ 及业务库时间字段均为不带时区的本地时间
+    return datetime.now(ZoneInfo(settings.timezone)).replace(tzinfo=None, microsecond=0)
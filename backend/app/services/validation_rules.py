@@ -0,0 +1,1208 @@
+from __future__ import annotations
+
+import hashlib
+import operator
+import re
+import time
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Iterable, Iterator, NamedTuple, Optional, Union
+
+from app.core.config import get_settings
+from app.schemas.validation import FieldError
+from app.services.validation_stats import RuleStats, get_rule_stats
+
+
+def _is_missing(value: object) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        trimmed = value.strip()
+        return trimmed == "" or trimmed == "-"
+    return False
+
+
+def _as_int(value: object) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_ID18_RE = re.compile(r"^\d{17}[\dXx]$")
+_ID15_RE = re.compile(r"^\d{15}$")
+
+
+def _validate_cn_id(value: str) -> bool:
+    value = value.strip()
+    if _ID18_RE.match(value):
+        factors = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
+        checks = "10X98765432"
+        total = sum(int(num) * factor for num, factor in zip(value[:17], factors))
+        return checks[total % 11] == value[-1].upper()
+    if _ID15_RE.match(value):
+        return True
+    return False
+
+
+def _add_error(
+    errors: list[FieldError],
+    *,
+    field: str,
+    message: str,
+    section: str,
+    rule: str = "invalid",
+    seq_no: Optional[int] = None,
+) -> None:
+    errors.append(FieldError(field=field, message=message, section=section, rule=rule, seq_no=seq_no))
+
+
+def _validate_seq_no_continuous(
+    errors: list[FieldError],
+    *,
+    items: list[Any],
+    field_prefix: str,
+    section: str,
+) -> list[Any]:
+    if not items:
+        return []
+
+    seqs: list[int] = []
+    for item in items:
+        seq = _as_int(getattr(item, "seq_no", None))
+        if seq is None:
+            _add_error(errors, field=field_prefix, message="序号不合法", section=section, rule="seq_no")
+            return items
+        seqs.append(seq)
+
+    if any(seq <= 0 for seq in seqs):
+        _add_error(errors, field=field_prefix, message="序号必须从 1 开始", section=section, rule="seq_no")
+
+    if len(set(seqs)) != len(seqs):
+        _add_error(errors, field=field_prefix, message="序号重复", section=section, rule="seq_no")
+
+    expected = list(range(1, len(items) + 1))
+    if sorted(seqs) != expected:
+        _add_error(errors, field=field_prefix, message="序号不连续（禁止跳号空洞）", section=section, rule="seq_no")
+
+    return items
+
+
+def field_matches(field: str, prefixes: Iterable[str]) -> bool:
+    """字段路径等于某个前缀或位于其下（base_info 匹配 base_info.xm，不匹配 base_info_x）。"""
+    return any(field == prefix or field.startswith(prefix + ".") for prefix in prefixes)
+
+
+# ---------------------------------------------------------------------------
+# 规则描述（声明式）。字段规则作用于单个对象（基础信息/费用/明细行），规则 ID 为 "<路径前缀>.<字段>.<类型或 key>"。
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Required:
+    field: str
+    message: str = "必填项缺失"
+    kind: ClassVar[str] = "required"
+
+
+@dataclass(frozen=True)
+class MaxLength:
+    field: str
+    max_len: int
+    kind: ClassVar[str] = "max_length"
+
+
+@dataclass(frozen=True)
+class Conditional:
+    """when 字段取值为 equals 时 field 必填。"""
+
+    field: str
+    when: str
+    equals: str
+    message: str
+    kind: ClassVar[str] = "conditional"
+
+
+@dataclass(frozen=True)
+class Relation:
+    """field 与 others 之和满足 op（ge/le）；缺值时跳过，zero_default 时 others 缺值按 0 计；guard 字段需大于 0 才校验。"""
+
+    field: str
+    op: str
+    others: tuple[str, ...]
+    message: str
+    zero_default: bool = False
+    guard: Optional[str] = None
+    rule: str = "fee_relation"
+    key: str = "relation"
+    kind: ClassVar[str] = "relation"
+
+
+@dataclass(frozen=True)
+class Range:
+    """数值下限（exclusive 时不含）及可选上限字段；default_zero 时缺值按 0 计，required 时缺值报错。"""
+
+    field: str
+    message: str
+    min_value: int = 0
+    exclusive: bool = False
+    max_field: Optional[str] = None
+    required: bool = False
+    default_zero: bool = False
+    rule: str = "range"
+    kind: ClassVar[str] = "range"
+
+
+@dataclass(frozen=True)
+class Format:
+    """字段存在时用 test 校验格式；指定 when/equals 时仅在 when 字段取值与 equals 完全相同（不去空白）时校验。"""
+
+    field: str
+    test: Callable[[str], bool]
+    message: str
+    rule: str
+    when: Optional[str] = None
+    equals: Optional[str] = None
+    kind: ClassVar[str] = "format"
+
+
+@dataclass(frozen=True)
+class RowComplete:
+    """明细行字段需同时填写，不完整时报整行错误并跳过该行其余规则。"""
+
+    fields: tuple[str, ...]
+    message: str
+    kind: ClassVar[str] = "row_complete"
+
+
+@dataclass(frozen=True)
+class DictCode:
+    field: str
+    set_code: str
+    message: str
+    allow_merged: bool = False
+    kind: ClassVar[str] = "dict"
+
+
+@dataclass(frozen=True)
+class DictName:
+    """名称需与 code_field 对应字典项名称一致（字典中存在该编码时）。"""
+
+    field: str
+    code_field: str
+    set_code: str
+    message: str
+    kind: ClassVar[str] = "dict_name"
+
+
+FieldRule = Union[Required, MaxLength, Conditional, Relation, Range, Format, RowComplete, DictCode, DictName]
+
+
+@dataclass(frozen=True)
+class ObjectRules:
+    """记录上单个对象（record.<attr>）的规则；missing_message 为空表示对象缺失时跳过，stop_if_missing 时终止整条校验。"""
+
+    section: str
+    attr: str
+    prefix: str
+    label: str
+    rules: tuple[FieldRule, ...]
+    missing_message: Optional[str] = None
+    stop_if_missing: bool = False
+
+
+@dataclass(frozen=True)
+class CollectionRules:
+    """明细集合（record.<attr>）的条数/序号规则及逐行规则；where 用于按类型拆分同一集合。"""
+
+    section: str
+    attr: str
+    prefix: str
+    label: str
+    rules: tuple[FieldRule, ...]
+    where: Optional[tuple[str, str]] = None
+    min_count: int = 0
+    min_field: str = ""
+    max_count: Optional[int] = None
+    max_message: Optional[str] = None
+    required_when: tuple[tuple[str, str, str], ...] = ()  # (record 属性, 字段, 取值)，任一成立时至少 1 行
+    required_message: str = ""
+    requires: Optional[str] = None  # 该对象缺失时跳过本集合
+    seq_no: bool = True
+
+
+@dataclass(frozen=True)
+class ValueSet:
+    """集合中 field 的取值须在 allowed 内，按取值报错（字段路径 <prefix>.<取值>）。"""
+
+    section: str
+    attr: str
+    field: str
+    allowed: tuple[str, ...]
+    prefix: str
+    label: str
+    message: str
+    rule: str
+
+
+SectionRules = Union[ObjectRules, CollectionRules, ValueSet]
+
+
+# ---------------------------------------------------------------------------
+# 规则定义
+# ---------------------------------------------------------------------------
+
+_BASE_REQUIRED = (
+    "username",  # USERNAME
+    "jzkh",  # JZKH
+    "xm",  # XM
+    "xb",  # XB
+    "csrq",  # CSRQ
+    "hy",  # HY
+    "gj",  # GJ
+    "mz",  # MZ
+    "zjlb",  # ZJLB
+    "zjhm",  # ZJHM
+    "xzz",  # XZZ
+    "lxdh",  # LXDH
+    "ywgms",  # YWGMS
+    "jzsj",  # JZSJ
+    "jzksdm",  # JZKSDM
+    "jzys",  # JZYS
+    "jzyszc",  # JZYSZC
+    "jzlx",  # JZLX
+    "fz",  # FZ
+    "sy",  # SY
+    "mzmtbhz",  # MZMTBHZ
+)
+
+# 长度约束（来自“2...采集接口标准.xlsx”）
+_BASE_MAX_LEN = {
+    "username": 10,
+    "jzkh": 50,
+    "xm": 100,
+    "xb": 1,
+    "hy": 1,
+    "gj": 40,
+    "mz": 2,
+    "zjlb": 1,
+    "zjhm": 18,
+    "xzz": 200,
+    "lxdh": 40,
+    "ywgms": 1,
+    "gmyw": 500,
+    "qtgms": 1,
+    "qtgmy": 200,
+    "jzks": 100,
+    "jzksdm": 50,
+    "jzys": 40,
+    "jzyszc": 40,
+    "jzlx": 1,
+    "fz": 1,
+    "sy": 1,
+    "mzmtbhz": 1,
+    "jzhzfj": 1,
+    "jzhzqx": 1,
+    "hzzs": 1500,
+}
+
+# 基础信息中取值于字典的字段 -> 字典集（打印、预填充解析名称时复用）
+BASE_DICT_SETS = {
+    "xb": "RC001",
+    "hy": "RC002",
+    "mz": "RC035",
+    "zjlb": "RC038",
+    "ywgms": "RC037",
+    "qtgms": "RC037",
+    "jzlx": "RC041",
+    "jzksdm": "RC023",
+    "jzyszc": "RC044",
+    "fz": "RC016",
+    "sy": "RC016",
+    "mzmtbhz": "RC016",
+    "jzhzfj": "RC042",
+    "jzhzqx": "RC045",
+    "gj": "COUNTRY",
+}
+
+MEDICATION_FIELDS = ("xysy", "zcysy", "zyzjsy", "ctypsy", "pfklsy")
+
+# 费用分项：非负且不超过总费用（存在时）
+_FEE_FIELDS = (
+    "ylfwf",
+    "zlczf",
+    "hlf",
+    "qtfy",
+    "blzdf",
+    "zdf",
+    "yxxzdf",
+    "lczdxmf",
+    "fsszlxmf",
+    "zlf",
+    "sszlf",
+    "mzf",
+    "ssf",
+    "kff",
+    "zyl_zyzd",
+    "zyzl",
+    "zywz",
+    "zygs",
+    "zcyjf",
+    "zytnzl",
+    "zygczl",
+    "zytszl",
+    "zyqt",
+    "zytstpjg",
+    "bzss",
+    "xyf",
+    "kjywf",
+    "zcyf",
+    "zyzjf",
+    "zcyf1",
+    "pfklf",
+    "xf",
+    "bdbblzpf",
+    "qdbblzpf",
+    "nxyzlzpf",
+    "xbyzlzpf",
+    "jcyyclf",
+    "yyclf",
+    "ssycxclf",
+    "qtf",
+)
+
+# 总费用与一级分项关系（避免对子项重复计入）
+_FEE_TOP_LEVEL_FIELDS = (
+    "ylfwf",
+    "zlczf",
+    "hlf",
+    "qtfy",
+    "blzdf",
+    "zdf",
+    "yxxzdf",
+    "lczdxmf",
+    "fsszlxmf",
+    "sszlf",
+    "kff",
+    "zyl_zyzd",
+    "zyzl",
+    "zyqt",
+    "xyf",
+    "zcyf",
+    "zcyf1",
+    "xf",
+    "bdbblzpf",
+    "qdbblzpf",
+    "nxyzlzpf",
+    "xbyzlzpf",
+    "jcyyclf",
+    "yyclf",
+    "ssycxclf",
+    "qtf",
+)
+
+# 诊断类型 -> (最少条数, 最多条数, 名称长度, 编码长度, 编码必填, 编码字典集, 是否允许已合并编码)
+_DIAG_SPEC = {
+    "tcm_disease_main": (1, 1, 100, 30, True, "TCM_DISEASE", False),
+    "tcm_syndrome": (1, 2, 100, 30, True, "TCM_SYNDROME", False),
+    "wm_main": (1, 1, 100, 50, False, "ICD10", True),
+    "wm_other": (0, 10, 100, 50, False, "ICD10", True),
+}
+
+
+def _diagnosis_rules(diag_type: str) -> CollectionRules:
+    min_count, max_count, name_max, code_max, code_required, set_code, allow_merged = _DIAG_SPEC[diag_type]
+    return CollectionRules(
+        section="diagnoses",
+        attr="diagnoses",
+        prefix=f"diagnosis.{diag_type}",
+        label="诊断",
+        where=("diag_type", diag_type),
+        min_count=min_count,
+        min_field="diag_name",
+        max_count=max_count,
+        rules=(
+            Required("diag_name"),
+            MaxLength("diag_name", name_max),
+            *((Required("diag_code"),) if code_required else ()),
+            MaxLength("diag_code", code_max),
+            DictCode("diag_code", set_code, f"诊断编码不合法（{set_code}）", allow_merged=allow_merged),
+        ),
+    )
+
+
+RULE_SPECS: tuple[SectionRules, ...] = (
+    ObjectRules(
+        section="base_info",
+        attr="base_info",
+        prefix="base_info",
+        label="基础信息",
+        missing_message="缺少基础信息",
+        stop_if_missing=True,
+        rules=(
+            *(Required(field) for field in _BASE_REQUIRED),
+            *(MaxLength(field, max_len) for field, max_len in _BASE_MAX_LEN.items()),
+            # 时间顺序：JZSJ ≥ BDSJ ≥ GHSJ（存在时校验）
+            Relation("bdsj", "ge", ("ghsj",), "报到时间不得早于挂号时间", rule="time_order", key="after_ghsj"),
+            Relation("jzsj", "ge", ("bdsj",), "就诊时间不得早于报到时间", rule="time_order", key="after_bdsj"),
+            Relation("jzsj", "ge", ("ghsj",), "就诊时间不得早于挂号时间", rule="time_order", key="after_ghsj"),
+            Format("zjhm", _validate_cn_id, "身份证号格式或校验位不正确", rule="idcard", when="zjlb", equals="1"),
+            # 药物/其他过敏史为“有”(RC037=2)、急诊（JZLX=1）、急诊转入院（JZHZQX=7）时的条件必填
+            Conditional("gmyw", "ywgms", "2", "药物过敏史为“有”时，过敏药物必填"),
+            Conditional("qtgmy", "qtgms", "2", "其他过敏史为“有”时，其他过敏原必填"),
+            Conditional("jzhzfj", "jzlx", "1", "急诊就诊类型下，急诊患者分级必填"),
+            Conditional("jzhzqx", "jzlx", "1", "急诊就诊类型下，急诊患者去向必填"),
+            Conditional("zyzkjsj", "jzhzqx", "7", "急诊患者去向为“急诊转入院”时，住院证开具时间必填"),
+            *(DictCode(field, set_code, f"字典值不合法（{set_code}）") for field, set_code in BASE_DICT_SETS.items()),
+        ),
+    ),
+    ValueSet(
+        section="diagnoses",
+        attr="diagnoses",
+        field="diag_type",
+        allowed=tuple(_DIAG_SPEC),
+        prefix="diagnosis",
+        label="诊断",
+        message="不支持的诊断类型",
+        rule="invalid_type",
+    ),
+    *(_diagnosis_rules(diag_type) for diag_type in _DIAG_SPEC),
+    CollectionRules(
+        section="tcm_operations",
+        attr="tcm_operations",
+        prefix="tcm_operation",
+        label="诊疗信息",
+        max_count=10,
+        max_message="中医治疗性操作最多 10 条",
+        rules=(
+            Required("op_name"),
+            MaxLength("op_name", 100),
+            Required("op_code"),
+            MaxLength("op_code", 20),
+            Range("op_times", "操作次数需为非负整数", required=True),
+            Range("op_days", "操作天数需为非负整数"),
+            DictCode("op_code", "ICD9CM3", "操作编码不合法（ICD9CM3）", allow_merged=True),
+        ),
+    ),
+    CollectionRules(
+        section="surgeries",
+        attr="surgeries",
+        prefix="surgery",
+        label="手术/操作",
+        max_count=5,
+        max_message="手术/操作最多 5 条",
+        rules=(
+            Required("op_name", "手术/操作名称必填"),
+            MaxLength("op_name", 100),
+            Required("op_code", "手术/操作编码必填"),
+            MaxLength("op_code", 20),
+            Required("operator_name", "手术操作者必填"),
+            MaxLength("operator_name", 40),
+            Required("anesthesia_method", "麻醉方式必填"),
+            MaxLength("anesthesia_method", 6),
+            Required("anesthesia_doctor", "麻醉医师必填"),
+            MaxLength("anesthesia_doctor", 40),
+            Required("op_time", "手术/操作日期必填"),
+            Required("surgery_level", "手术分级必填"),
+            Range("surgery_level", "手术分级不合法"),
+            DictCode("op_code", "ICD9CM3", "手术/操作编码不合法（ICD9CM3）", allow_merged=True),
+            DictCode("anesthesia_method", "RC013", "麻醉方式编码不合法（RC013）"),
+            DictCode("surgery_level", "RC029", "手术分级编码不合法（RC029）"),
+        ),
+    ),
+    ObjectRules(
+        section="herb_details",
+        attr="medication_summary",
+        prefix="medication_summary",
+        label="用药",
+        missing_message="缺少用药标识（外部数据未返回）",
+        rules=(
+            *(Required(field) for field in MEDICATION_FIELDS),
+            *(DictCode(field, "RC016", "用药标识值不合法（RC016）") for field in MEDICATION_FIELDS),
+        ),
+    ),
+    CollectionRules(
+        section="herb_details",
+        attr="herb_details",
+        prefix="herb_detail",
+        label="用药",
+        requires="medication_summary",
+        max_count=40,
+        max_message="中草药明细最多 40 行",
+        # 使用传统饮片或配方颗粒（RC016=1）=> 至少 1 行
+        required_when=(("medication_summary", "ctypsy", "1"), ("medication_summary", "pfklsy", "1")),
+        required_message="已使用传统饮片/配方颗粒时需至少填写 1 行中草药明细",
+        rules=(
+            RowComplete(("herb_type", "route_code", "route_name"), "中草药明细同一行字段需完整"),
+            MaxLength("herb_type", 1),
+            MaxLength("route_code", 30),
+            MaxLength("route_name", 100),
+            Range("dose_count", "用药剂数需为非负整数", required=True),
+            DictCode("herb_type", "HERB_TYPE", "中草药类别编码不合法（HERB_TYPE）"),
+            DictCode("route_code", "DRUG_ROUTE", "用药途径编码不合法（DRUG_ROUTE）"),
+            DictName("route_name", "route_code", "DRUG_ROUTE", "用药途径名称与代码不一致"),
+        ),
+    ),
+    ObjectRules(
+        section="fee_summary",
+        attr="fee_summary",
+        prefix="fee_summary",
+        label="费用",
+        missing_message="缺少费用信息（外部数据未返回）",
+        rules=(
+            Range("zfy", "总费用需大于 0", exclusive=True, default_zero=True, rule="fee_relation"),
+            Range("zfje", "自付金额需满足 0<=ZFJE<=ZFY", max_field="zfy", default_zero=True, rule="fee_relation"),
+            *(
+                rule
+                for field in _FEE_FIELDS
+                for rule in (
+                    Range(field, "金额不得为负数", rule="fee_relation"),
+                    Relation(field, "le", ("zfy",), "分项费用不得大于总费用", guard="zfy", key="max_total"),
+                )
+            ),
+            Relation("sszlf", "ge", ("mzf", "ssf"), "手术治疗费需满足 SSZLF ≥ MZF + SSF", zero_default=True),
+            Relation("zlf", "le", ("fsszlxmf",), "临床物理治疗费不得大于非手术治疗项目费"),
+            Relation("kjywf", "le", ("xyf",), "抗菌药物费用不得大于西药费"),
+            Relation("zyzjf", "le", ("zcyf",), "医疗机构中药制剂费不得大于中成药费"),
+            Relation("zcyf1", "ge", ("pfklf",), "中草药费需满足 ZCYF1 ≥ PFKLF"),
+            # ZYZL ≥ 中医外治 + 中医骨伤 + 针刺与灸法 + 中医推拿治疗 + 中医肛肠治疗 + 中医特殊治疗
+            Relation(
+                "zyzl",
+                "ge",
+                ("zywz", "zygs", "zcyjf", "zytnzl", "zygczl", "zytszl"),
+                "中医治疗费需满足 ZYZL ≥ 各子项之和",
+                zero_default=True,
+            ),
+            Relation("zytstpjg", "le", ("zyqt",), "中医特殊调配加工费不得大于中医其他费"),
+            Relation("bzss", "le", ("zyqt",), "辨证施膳费不得大于中医其他费"),
+            Relation(
+                "zfy",
+                "ge",
+                _FEE_TOP_LEVEL_FIELDS,
+                "总费用需满足 ZFY ≥ 分项费用之和",
+                zero_default=True,
+                guard="zfy",
+            ),
+        ),
+    ),
+)
+
+# 字典值域校验统一在其他规则之后执行，按以下对象顺序输出（明细按记录中的原始顺序）
+_DICT_ORDER = ("base_info", "medication_summary", "tcm_operations", "surgeries", "herb_details", "diagnoses")
+
+
+# ---------------------------------------------------------------------------
+# 编译：规则描述 -> 闭包。字段规则闭包签名 (obj, 路径, seq_no, errors)，返回 True 表示跳过该行其余规则。
+# ---------------------------------------------------------------------------
+
+FieldCheck = Callable[[Any, str, Optional[int], list[FieldError]], Optional[bool]]
+GroupCheck = Callable[[list[Any], Any, list[FieldError]], bool]
+SectionCheck = Callable[[Any, list[FieldError]], bool]
+
+_OPS = {"ge": operator.ge, "le": operator.le}
+
+
+class DictRef(NamedTuple):
+    set_code: str
+    code: str
+    allow_merged: bool
+    field: str
+    message: str
+    section: str
+    seq_no: Optional[int] = None
+
+
+class CompiledRule(NamedTuple):
+    rule_id: str
+    section: str
+    kind: str
+    check: SectionCheck
+
+
+def _compare_value(value: object) -> Any:
+    if value is None or type(value) is Decimal or isinstance(value, date):
+        return value
+    return Decimal(str(value))
+
+
+def _condition_met(obj: Any, when: Optional[str], equals: Optional[str]) -> bool:
+    return when is None or str(getattr(obj, when, None)).strip() == equals
+
+
+_BLANK_VALUES = frozenset(("", "-"))
+
+
+class _FieldEntry(NamedTuple):
+    name: str
+    required_message: Optional[str]
+    max_len: Optional[int]
+    length_message: str
+
+
+def _compile_field_entries(entries: list[_FieldEntry], label: str) -> FieldCheck:
+    """连续的必填/长度规则合并为一个闭包逐字段检查（减少调用开销，输出顺序与逐条执行一致）。"""
+    fields = tuple(entries)
+
+    def fields_check(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> None:
+        for name, required_message, max_len, length_message in fields:
+            value = getattr(obj, name, None)
+            if value is None or (type(value) is str and value.strip() in _BLANK_VALUES):
+                if required_message is not None:
+                    _add_error(
+                        errors, field=f"{path}.{name}", message=required_message, section=label, rule="required", seq_no=seq_no
+                    )
+            elif max_len is not None and len(str(value)) > max_len:
+                _add_error(
+                    errors, field=f"{path}.{name}", message=length_message, section=label, rule="max_length", seq_no=seq_no
+                )
+
+    return fields_check
+
+
+class _AmountEntry(NamedTuple):
+    name: str
+    negative_message: str
+    negative_rule: str
+    bound_message: str
+    bound_rule: str
+
+
+def _compile_amount_entries(entries: list[_AmountEntry], bound_field: str, label: str) -> FieldCheck:
+    """连续的“非负 + 不大于上限字段（上限大于 0 时）”规则对合并为一个闭包，上限只取一次。"""
+    amounts = tuple(entries)
+
+    def amounts_check(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> None:
+        bound = _compare_value(getattr(obj, bound_field, None))
+        if bound is not None and bound <= 0:
+            bound = None
+        for name, negative_message, negative_rule, bound_message, bound_rule in amounts:
+            value = _compare_value(getattr(obj, name, None))
+            if value is None:
+                continue
+            if value < 0:
+                _add_error(errors, field=f"{path}.{name}", message=negative_message, section=label, rule=negative_rule, seq_no=seq_no)
+            elif bound is not None and value > bound:
+                _add_error(errors, field=f"{path}.{name}", message=bound_message, section=label, rule=bound_rule, seq_no=seq_no)
+
+    return amounts_check
+
+
+def _amount_pair(rule: FieldRule, following: Optional[FieldRule]) -> Optional[str]:
+    """rule/following 为同字段的“非负”与“不大于某字段（该字段需大于 0）”时返回上限字段。"""
+    if not (
+        isinstance(rule, Range)
+        and isinstance(following, Relation)
+        and rule.field == following.field
+        and rule.min_value == 0
+        and not (rule.exclusive or rule.required or rule.default_zero or rule.max_field)
+        and following.op == "le"
+        and len(following.others) == 1
+        and following.guard == following.others[0]
+    ):
+        return None
+    return following.guard
+
+
+def _compile_single_rule(rule: FieldRule, label: str) -> FieldCheck:
+    """单条规则单独编译（统计模式下逐条计时）。"""
+    if isinstance(rule, Required):
+        return _compile_field_entries([_FieldEntry(rule.field, rule.message, None, "")], label)
+    if isinstance(rule, MaxLength):
+        return _compile_field_entries([_FieldEntry(rule.field, None, rule.max_len, f"长度超限（最大 {rule.max_len}）")], label)
+    return _compile_field_rule(rule, label)
+
+
+def _compile_field_rule(rule: FieldRule, label: str) -> FieldCheck:
+    # 必填/长度规则由 _compile_field_entries 合并编译
+    if isinstance(rule, Conditional):
+        name, when, equals, message = rule.field, rule.when, rule.equals, rule.message
+
+        def conditional(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> None:
+            if _condition_met(obj, when, equals) and _is_missing(getattr(obj, name, None)):
+                _add_error(
+                    errors, field=f"{path}.{name}", message=message, section=label, rule="conditional_required", seq_no=seq_no
+                )
+
+        return conditional
+
+    if isinstance(rule, Relation):
+        name, check_op, others, guard = rule.field, _OPS[rule.op], rule.others, rule.guard
+        zero_default, message, rule_name = rule.zero_default, rule.message, rule.rule
+        zero = Decimal("0")
+
+        if len(others) == 1:
+            # 两字段比较（多数关系规则）：guard 与比较字段相同时复用已取得的值
+            other = others[0]
+            guard_is_other = guard == other
+
+            def relation_pair(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> None:
+                left = _compare_value(getattr(obj, name, None))
+                if left is None:
+                    return
+                right = _compare_value(getattr(obj, other, None))
+                if guard is not None:
+                    bound = right if guard_is_other else _compare_value(getattr(obj, guard, None))
+                    if bound is None or bound <= 0:
+                        return
+                if right is None:
+                    if not zero_default:
+                        return
+                    right = zero
+                if not check_op(left, right):
+                    _add_error(errors, field=f"{path}.{name}", message=message, section=label, rule=rule_name, seq_no=seq_no)
+
+            return relation_pair
+
+        def relation(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> None:
+            left = _compare_value(getattr(obj, name, None))
+            if left is None:
+                return
+            if guard is not None:
+                bound = _compare_value(getattr(obj, guard, None))
+                if bound is None or bound <= 0:
+                    return
+            right = zero
+            for other in others:
+                value = _compare_value(getattr(obj, other, None))
+                if value is None:
+                    if not zero_default:
+                        return
+                    continue
+                right += value
+            if not check_op(left, right):
+                _add_error(errors, field=f"{path}.{name}", message=message, section=label, rule=rule_name, seq_no=seq_no)
+
+        return relation
+
+    if isinstance(rule, Range):
+        name, message, rule_name = rule.field, rule.message, rule.rule
+        min_value, exclusive, max_field = Decimal(rule.min_value), rule.exclusive, rule.max_field
+        required, default_zero = rule.required, rule.default_zero
+
+        def range_(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> None:
+            value = _compare_value(getattr(obj, name, None))
+            if value is None:
+                if default_zero:
+                    value = Decimal("0")
+                elif required:
+                    _add_error(errors, field=f"{path}.{name}", message=message, section=label, rule=rule_name, seq_no=seq_no)
+                    return
+                else:
+                    return
+            invalid = value <= min_value if exclusive else value < min_value
+            if not invalid and max_field is not None:
+                bound = _compare_value(getattr(obj, max_field, None))
+                if bound is None and default_zero:
+                    bound = Decimal("0")
+                invalid = bound is not None and value > bound
+            if invalid:
+                _add_error(errors, field=f"{path}.{name}", message=message, section=label, rule=rule_name, seq_no=seq_no)
+
+        return range_
+
+    if isinstance(rule, Format):
+        name, test, message, rule_name = rule.field, rule.test, rule.message, rule.rule
+        when, equals = rule.when, rule.equals
+
+        def format_(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> None:
+            value = getattr(obj, name, None)
+            if _is_missing(value) or (when is not None and getattr(obj, when, None) != equals):
+                return
+            if not test(str(value)):
+                _add_error(errors, field=f"{path}.{name}", message=message, section=label, rule=rule_name, seq_no=seq_no)
+
+        return format_
+
+    if isinstance(rule, RowComplete):
+        names, message = rule.fields, rule.message
+
+        def row_complete(obj: Any, path: str, seq_no: Optional[int], errors: list[FieldError]) -> bool:
+            if any(_is_missing(getattr(obj, name, None)) for name in names):
+                _add_error(errors, field=path, message=message, section=label, rule="row_complete", seq_no=seq_no)
+                return True
+            return False
+
+        return row_complete
+
+    raise TypeError(f"不支持的规则类型：{type(rule).__name__}")
+
+
+def _rule_id(prefix: str, rule: FieldRule) -> str:
+    if isinstance(rule, RowComplete):
+        return f"{prefix}.{rule.kind}"
+    suffix = getattr(rule, "key", rule.kind)
+    return f"{prefix}.{rule.field}.{suffix}"
+
+
+def _is_dict_rule(rule: FieldRule) -> bool:
+    return isinstance(rule, (DictCode, DictName))
+
+
+class _DictSource(NamedTuple):
+    """一个对象/明细集合上的字典规则（编译后，附规则 ID）。"""
+
+    attr: str
+    prefix: str
+    label: str
+    where: Optional[tuple[str, str]]
+    refs: tuple[tuple[str, DictCode], ...]
+    names: tuple[tuple[str, DictName], ...]
+
+
+class RuleMeta(NamedTuple):
+    section: str
+    kind: str
+
+
+class RulePlan:
+    """编译后的校验计划：按规则定义顺序执行的闭包列表，提交/导出/批量/实时校验共用。
+
+    停用的规则在编译时剔除；version 为规则定义与停用清单的哈希，用于使已保存的校验结果失效。
+    传入 stats 时逐条规则计时/计数（不合并规则，开销较大，仅用于排查）。
+    """
+
+    def __init__(
+        self,
+        specs: Iterable[SectionRules],
+        *,
+        disabled: Iterable[str] = (),
+        stats: Optional[RuleStats] = None,
+    ) -> None:
+        self.disabled = tuple(sorted({item for item in disabled if item}))
+        self.stats = stats
+        self.rule_ids: list[str] = []
+        self.rule_meta: dict[str, RuleMeta] = {}
+        self.rules: list[CompiledRule] = []
+        self._dict_sources: list[_DictSource] = []
+        self._stop_attrs: list[str] = []
+        for spec in specs:
+            self._compile_section(spec)
+        self._dict_sources.sort(key=lambda source: _DICT_ORDER.index(source.attr))
+        self._ref_groups: list[tuple[str, list[_DictSource]]] = []
+        for source in self._dict_sources:
+            if self._ref_groups and self._ref_groups[-1][0] == source.attr:
+                self._ref_groups[-1][1].append(source)
+            else:
+                self._ref_groups.append((source.attr, [source]))
+        if len(set(self.rule_ids)) != len(self.rule_ids):
+            raise ValueError("校验规则 ID 重复")
+        self.version = hashlib.sha1(
+            Path(__file__).read_bytes() + b"\0" + ",".join(self.disabled).encode("utf-8")
+        ).hexdigest()
+
+    def enabled(self, rule_id: str) -> bool:
+        return not field_matches(rule_id, self.disabled)
+
+    def _register(self, rule_id: str, section: str, kind: str) -> bool:
+        self.rule_ids.append(rule_id)
+        self.rule_meta[rule_id] = RuleMeta(section, kind)
+        return self.enabled(rule_id)
+
+    def _timed(self, rule_id: str, check: Callable[..., Any]) -> Callable[..., Any]:
+        """统计模式下包装单条规则：记录执行次数、耗时与产生的错误数（errors 为最后一个参数）。"""
+        stats = self.stats
+        if stats is None:
+            return check
+
+        def timed(*args: Any) -> Any:
+            errors = args[-1]
+            before = len(errors)
+            started = time.perf_counter_ns()
+            result = check(*args)
+            stats.add(rule_id, time.perf_counter_ns() - started, len(errors) - before)
+            return result
+
+        return timed
+
+    def _compile_items(self, prefix: str, section: str, label: str, rules: Iterable[FieldRule]) -> list[FieldCheck]:
+        """编译对象/明细行上的字段规则；相邻的同类简单规则合并为一个闭包，执行顺序不变。"""
+        enabled = [
+            (rule_id, rule)
+            for rule in rules
+            for rule_id in (_rule_id(prefix, rule),)
+            if self._register(rule_id, section, rule.kind) and not _is_dict_rule(rule)
+        ]
+        if self.stats is not None:
+            return [self._timed(rule_id, _compile_single_rule(rule, label)) for rule_id, rule in enabled]
+
+        checks: list[FieldCheck] = []
+        entries: list[_FieldEntry] = []
+        amounts: list[_AmountEntry] = []
+        amount_bound: Optional[str] = None
+
+        def flush() -> None:
+            nonlocal entries, amounts
+            if entries:
+                checks.append(_compile_field_entries(entries, label))
+                entries = []
+            if amounts:
+                checks.append(_compile_amount_entries(amounts, amount_bound, label))
+                amounts = []
+
+        index = 0
+        while index < len(enabled):
+            rule = enabled[index][1]
+            following = enabled[index + 1][1] if index + 1 < len(enabled) else None
+            index += 1
+            bound = _amount_pair(rule, following)
+            if bound is not None:
+                if entries or (amounts and bound != amount_bound):
+                    flush()
+                amount_bound = bound
+                amounts.append(_AmountEntry(rule.field, rule.message, rule.rule, following.message, following.rule))
+                index += 1
+                continue
+            if isinstance(rule, (Required, MaxLength)):
+                if amounts:
+                    flush()
+                if isinstance(rule, MaxLength):
+                    entries.append(_FieldEntry(rule.field, None, rule.max_len, f"长度超限（最大 {rule.max_len}）"))
+                    continue
+                # 紧随其后的同字段长度规则并入同一项（缺失时不再检查长度）
+                max_len = None
+                if isinstance(following, MaxLength) and following.field == rule.field:
+                    max_len = following.max_len
+                    index += 1
+                entries.append(_FieldEntry(rule.field, rule.message, max_len, f"长度超限（最大 {max_len}）"))
+                continue
+            flush()
+            checks.append(_compile_field_rule(rule, label))
+        flush()
+        return checks
+
+    def _add_dict_source(self, spec: Union[ObjectRules, CollectionRules], where: Optional[tuple[str, str]]) -> None:
+        rules = [(_rule_id(spec.prefix, rule), rule) for rule in spec.rules]
+        refs = tuple((rule_id, r) for rule_id, r in rules if isinstance(r, DictCode) and self.enabled(rule_id))
+        names = tuple((rule_id, r) for rule_id, r in rules if isinstance(r, DictName) and self.enabled(rule_id))
+        if refs or names:
+            self._dict_sources.append(_DictSource(spec.attr, spec.prefix, spec.label, where, refs, names))
+
+    def _compile_section(self, spec: SectionRules) -> None:
+        if isinstance(spec, ObjectRules):
+            self._compile_object(spec)
+        elif isinstance(spec, CollectionRules):
+            self._compile_collection(spec)
+        else:
+            self._compile_value_set(spec)
+
+    def _compile_object(self, spec: ObjectRules) -> None:
+        attr, prefix, label = spec.attr, spec.prefix, spec.label
+        missing_message, stop = spec.missing_message, spec.stop_if_missing
+        checks = self._compile_items(prefix, spec.section, label, spec.rules)
+        self._add_dict_source(spec, None)
+        if stop:
+            self._stop_attrs.append(attr)
+
+        def run(record: Any, errors: list[FieldError]) -> bool:
+            obj = getattr(record, attr, None)
+            if obj is None:
+                # 对象缺失属于结构性错误，不受规则停用影响
+                if missing_message is not None:
+                    _add_error(errors, field=prefix, message=missing_message, section=label, rule="required")
+                return stop
+            for check in checks:
+                check(obj, prefix, None, errors)
+            return False
+
+        self.rules.append(CompiledRule(prefix, spec.section, "object", run))
+
+    def _compile_collection(self, spec: CollectionRules) -> None:
+        attr, prefix, label, where, section = spec.attr, spec.prefix, spec.label, spec.where, spec.section
+        requires = spec.requires
+        # 集合级规则签名 (rows, record, errors)，返回 True 表示跳过本集合其余规则
+        group_checks: list[GroupCheck] = []
+
+        if spec.min_count and self._register(f"{prefix}.min_count", section, "min_count"):
+            min_count, min_field = spec.min_count, f"{prefix}.1.{spec.min_field}"
+
+            def min_count_check(rows: list[Any], record: Any, errors: list[FieldError]) -> bool:
+                if len(rows) < min_count:
+                    _add_error(errors, field=min_field, message="必填项缺失", section=label, rule="required", seq_no=1)
+                    return True
+                return False
+
+            group_checks.append(self._timed(f"{prefix}.min_count", min_count_check))
+
+        if spec.max_count is not None and self._register(f"{prefix}.max_count", section, "max_count"):
+            max_count = spec.max_count
+            max_message = spec.max_message or f"条数超限（最多 {max_count} 条）"
+
+            def max_count_check(rows: list[Any], record: Any, errors: list[FieldError]) -> bool:
+                if len(rows) > max_count:
+                    _add_error(errors, field=prefix, message=max_message, section=label, rule="max_count")
+                return False
+
+            group_checks.append(self._timed(f"{prefix}.max_count", max_count_check))
+
+        if spec.required_when and self._register(f"{prefix}.conditional", section, "conditional"):
+            required_when, required_message = spec.required_when, spec.required_message
+
+            def conditional_check(rows: list[Any], record: Any, errors: list[FieldError]) -> bool:
+                if not rows and any(
+                    str(getattr(getattr(record, a, None), f, None)).strip() == v for a, f, v in required_when
+                ):
+                    _add_error(errors, field=prefix, message=required_message, section=label, rule="conditional_required")
+                return False
+
+            group_checks.append(self._timed(f"{prefix}.conditional", conditional_check))
+
+        if spec.seq_no and self._register(f"{prefix}.seq_no", section, "seq_no"):
+
+            def seq_no_check(rows: list[Any], record: Any, errors: list[FieldError]) -> bool:
+                _validate_seq_no_continuous(errors, items=rows, field_prefix=prefix, section=label)
+                return False
+
+            group_checks.append(self._timed(f"{prefix}.seq_no", seq_no_check))
+
+        checks = self._compile_items(prefix, section, label, spec.rules)
+        self._add_dict_source(spec, where)
+
+        def run(record: Any, errors: list[FieldError]) -> bool:
+            if requires is not None and getattr(record, requires, None) is None:
+                return False
+            rows = getattr(record, attr, None) or []
+            if where is not None:
+                rows = [row for row in rows if str(getattr(row, where[0], None)) == where[1]]
+            rows = sorted(rows, key=lambda row: int(row.seq_no))
+            for group_check in group_checks:
+                if group_check(rows, record, errors):
+                    return False
+            for row in rows:
+                seq_no = int(row.seq_no)
+                path = f"{prefix}.{seq_no}"
+                for check in checks:
+                    if check(row, path, seq_no, errors):
+                        break
+            return False
+
+        self.rules.append(CompiledRule(prefix, section, "collection", run))
+
+    def _compile_value_set(self, spec: ValueSet) -> None:
+        rule_id = f"{spec.prefix}.{spec.field}.value_set"
+        if not self._register(rule_id, spec.section, "value_set"):
+            return
+        attr, name, allowed = spec.attr, spec.field, frozenset(spec.allowed)
+        prefix, label, message, rule_name = spec.prefix, spec.label, spec.message, spec.rule
+
+        def run(record: Any, errors: list[FieldError]) -> bool:
+            values = {str(getattr(row, name)) for row in getattr(record, attr, None) or []}
+            for value in sorted(values):
+                if value not in allowed:
+                    _add_error(errors, field=f"{prefix}.{value}", message=message, section=label, rule=rule_name)
+            return False
+
+        self.rules.append(CompiledRule(rule_id, spec.section, "value_set", self._timed(rule_id, run)))
+
+    def _dict_objects(self, record: Any, source: _DictSource) -> Iterator[tuple[Any, str, Optional[int]]]:
+        value = getattr(record, source.attr, None)
+        if value is None:
+            return
+        if not isinstance(value, (list, tuple)):
+            yield value, source.prefix, None
+            return
+        where = source.where
+        for row in value:
+            if where is None or str(getattr(row, where[0], None)) == where[1]:
+                yield row, f"{source.prefix}.{row.seq_no}", row.seq_no
+
+    def _dict_targets(
+        self, record: Any, attrs: Optional[set[str]]
+    ) -> Iterator[tuple[_DictSource, Any, str, Optional[int]]]:
+        if any(getattr(record, attr, None) is None for attr in self._stop_attrs):
+            return
+        for attr, sources in self._ref_groups:
+            if attrs is not None and attr not in attrs:
+                continue
+            if len(sources) == 1:
+                source = sources[0]
+                for obj, path, seq_no in self._dict_objects(record, source):
+                    yield source, obj, path, seq_no
+                continue
+            # 同一集合按类型拆分的多组规则（诊断）：按记录中的原始顺序逐行输出
+            for row in getattr(record, attr, None) or []:
+                for source in sources:
+                    if str(getattr(row, source.where[0], None)) == source.where[1]:
+                        yield source, row, f"{source.prefix}.{row.seq_no}", row.seq_no
+
+    def iter_dict_refs(self, record: Any, sections: Optional[Iterable[str]] = None) -> Iterator[DictRef]:
+        """列出记录中需要做值域校验的编码（单条校验与批量预取共用）。"""
+        for source, obj, path, seq_no in self._dict_targets(record, _section_attrs(sections)):
+            for _, rule in source.refs:
+                value = getattr(obj, rule.field, None)
+                if _is_missing(value):
+                    continue
+                yield DictRef(
+                    rule.set_code, str(value), rule.allow_merged, f"{path}.{rule.field}", rule.message, source.label, seq_no
+                )
+
+    def validate(self, record: Any, dicts: Any, *, sections: Optional[Iterable[str]] = None) -> list[FieldError]:
+        """执行校验计划；dicts 需提供 exists()/name()（DictLookup 或 DictSnapshot）。sections 为空时执行全部规则。"""
+        stats = self.stats
+        started = time.perf_counter_ns() if stats is not None else 0
+        errors = self._validate(record, dicts, None if sections is None else set(sections))
+        if stats is not None:
+            stats.add_call(time.perf_counter_ns() - started)
+        return errors
+
+    def _validate(self, record: Any, dicts: Any, selected: Optional[set[str]]) -> list[FieldError]:
+        stats = self.stats
+        errors: list[FieldError] = []
+        for rule in self.rules:
+            if selected is not None and rule.section not in selected:
+                continue
+            if rule.check(record, errors):
+                return errors
+
+        attrs = _section_attrs(selected)
+        exists, name_of = dicts.exists, dicts.name
+        for source, obj, path, seq_no in self._dict_targets(record, attrs):
+            for rule_id, rule in source.refs:
+                value = getattr(obj, rule.field, None)
+                if _is_missing(value):
+                    continue
+                started = time.perf_counter_ns() if stats is not None else 0
+                valid = exists(rule.set_code, str(value), allow_merged=rule.allow_merged)
+                if not valid:
+                    _add_error(
+                        errors, field=f"{path}.{rule.field}", message=rule.message, section=source.label, rule="dict", seq_no=seq_no
+                    )
+                if stats is not None:
+                    stats.add(rule_id, time.perf_counter_ns() - started, 0 if valid else 1)
+            # 名称与编码一致性紧随同一行的编码校验（如中草药用药途径），错误顺序与逐行校验一致
+            for rule_id, rule in source.names:
+                code, name = getattr(obj, rule.code_field, None), getattr(obj, rule.field, None)
+                if _is_missing(code) or _is_missing(name):
+                    continue
+                started = time.perf_counter_ns() if stats is not None else 0
+                expected = name_of(rule.set_code, str(code))
+                failed = expected is not None and str(name).strip() != expected
+                if failed:
+                    _add_error(
+                        errors, field=f"{path}.{rule.field}", message=rule.message, section=source.label, rule="dict", seq_no=seq_no
+                    )
+                if stats is not None:
+                    stats.add(rule_id, time.perf_counter_ns() - started, 1 if failed else 0)
+        return errors
+
+
+def _section_attrs(sections: Optional[Iterable[str]]) -> Optional[set[str]]:
+    if sections is None:
+        return None
+    selected = set(sections)
+    return {spec.attr for spec in RULE_SPECS if spec.section in selected}
+
+
+def parse_rule_ids(value: str) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+@lru_cache(maxsize=1)
+def get_rule_plan() -> RulePlan:
+    settings = get_settings()
+    stats = get_rule_stats() if settings.validation_profile_enabled else None
+    return RulePlan(RULE_SPECS, disabled=parse_rule_ids(settings.validation_disabled_rules), stats=stats)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.record import Record
+from app.models.validation_state import ValidationState
+from app.schemas.validation import FieldError
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1000
+
+
+def version_digest(text: str) -> str:
+    """将版本描述串压缩为定长哈希（库表中按 char(40) 保存）。"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ValidationStateStore:
+    """校验结果持久化：按 (record_id, 记录版本, 规则版本, 字典版本) 命中，任一版本变化即视为失效。
+
+    结果写入使用独立会话并立即提交，不影响调用方事务（调用方回滚或只读请求也能保留校验结果）。
+    """
+
+    def __init__(self, db: Session, *, rules_version: str, dict_version: str) -> None:
+        self.db = db
+        self.rules_version = rules_version
+        self.dict_version = dict_version
+
+    def load(self, records: Iterable[Record]) -> dict[int, list[FieldError]]:
+        """返回仍然有效的校验结果 {record_id: 错误列表}；未命中的记录不在结果中。"""
+        versions = {record.id: int(record.version) for record in records}
+        ids = list(versions)
+        results: dict[int, list[FieldError]] = {}
+        for offset in range(0, len(ids), _CHUNK_SIZE):
+            chunk = ids[offset : offset + _CHUNK_SIZE]
+            stmt = select(
+                ValidationState.record_id,
+                ValidationState.record_version,
+                ValidationState.errors,
+            ).where(
+                ValidationState.record_id.in_(chunk),
+                ValidationState.rules_version == self.rules_version,
+                ValidationState.dict_version == self.dict_version,
+            )
+            for record_id, record_version, errors in self.db.execute(stmt):
+                if versions.get(record_id) == int(record_version):
+                    results[record_id] = [FieldError.model_validate(item) for item in errors or []]
+        return results
+
+    def save(self, records: Iterable[Record], results: dict[int, list[FieldError]]) -> None:
+        rows: list[dict[str, Any]] = []
+        for record in records:
+            errors = results.get(record.id)
+            if errors is None:
+                continue
+            rows.append(
+                {
+                    "record_id": record.id,
+                    "record_version": int(record.version),
+                    "rules_version": self.rules_version,
+                    "dict_version": self.dict_version,
+                    "error_count": len(errors),
+                    "errors": [error.model_dump() for error in errors],
+                }
+            )
+        if not rows:
+            return
+        try:
+            with Session(bind=self.db.get_bind()) as state_db:
+                for offset in range(0, len(rows), _CHUNK_SIZE):
+                    state_db.execute(_upsert_stmt(state_db, rows[offset : offset + _CHUNK_SIZE]))
+                state_db.commit()
+        except Exception:
+            # 结果缓存写入失败不影响本次校验结果，下次重新校验即可
+            logger.warning("Validation state save failed", exc_info=True)
+
+
+def _upsert_stmt(db: Session, rows: list[dict[str, Any]]) -> Any:
+    columns = ("record_version", "rules_version", "dict_version", "error_count", "errors")
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(ValidationState).values(rows)
+        return stmt.on_duplicate_key_update(**{name: stmt.inserted[name] for name in columns})
+    stmt = sqlite_insert(ValidationState).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[ValidationState.record_id],
+        set_={name: stmt.excluded[name] for name in columns},
+    )
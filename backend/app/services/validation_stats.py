@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from typing import Any, Optional
+
+# 统计排序方式 -> 计数项下标
+RULE_STATS_SORTS = {"total": 2, "failures": 1, "evaluations": 0}
+
+
+class RuleStats:
+    """校验规则执行统计：按规则 ID 累计执行次数、产生的错误数与耗时（纳秒），线程安全。
+
+    启用 VALIDATION_PROFILE_ENABLED 时由全局校验计划写入；单条记录剖析使用独立实例。
+    多进程并行导出时子进程内的统计不汇总到本进程。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # rule_id -> [执行次数, 错误数, 总耗时, 最大耗时]
+        self._rules: dict[str, list[int]] = {}
+        self._calls = 0
+        self._call_ns = 0
+
+    def add(self, rule_id: str, elapsed_ns: int, failures: int) -> None:
+        with self._lock:
+            entry = self._rules.get(rule_id)
+            if entry is None:
+                entry = self._rules[rule_id] = [0, 0, 0, 0]
+            entry[0] += 1
+            entry[1] += failures
+            entry[2] += elapsed_ns
+            if elapsed_ns > entry[3]:
+                entry[3] = elapsed_ns
+
+    def add_call(self, elapsed_ns: int) -> None:
+        with self._lock:
+            self._calls += 1
+            self._call_ns += elapsed_ns
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rules.clear()
+            self._calls = 0
+            self._call_ns = 0
+
+    def snapshot(self, *, sort: str = "total", limit: Optional[int] = None) -> dict[str, Any]:
+        """统计快照；sort 为 total（总耗时）/failures（错误数）/evaluations（执行次数）。"""
+        with self._lock:
+            rules = {rule_id: list(entry) for rule_id, entry in self._rules.items()}
+            calls, call_ns = self._calls, self._call_ns
+        sort_index = RULE_STATS_SORTS[sort]
+        ordered = sorted(rules.items(), key=lambda item: (-item[1][sort_index], item[0]))
+        if limit is not None:
+            ordered = ordered[:limit]
+        return {
+            "calls": calls,
+            "total_ms": round(call_ns / 1e6, 3),
+            "rules": [
+                {
+                    "rule_id": rule_id,
+                    "evaluations": count,
+                    "failures": failures,
+                    "total_ms": round(total_ns / 1e6, 3),
+                    "avg_us": round(total_ns / count / 1e3, 3) if count else 0.0,
+                    "max_us": round(max_ns / 1e3, 3),
+                }
+                for rule_id, (count, failures, total_ns, max_ns) in ordered
+            ],
+        }
+
+
+@lru_cache(maxsize=1)
+def get_rule_stats() -> RuleStats:
+    return RuleStats()
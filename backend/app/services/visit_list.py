@@ -2,21 +2,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Optional
 
 from fastapi import status
 from sqlalchemy import and_, func, select
-from sqlalchemy.dialects.mysql import insert as mysql_insert
-from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from app.core.config import Settings, get_settings
 from app.core.errors import AppError
 from app.models.record import Record
 from app.models.visit_index import VisitIndex
 from app.schemas.auth import SessionPayload
 from app.schemas.visits import VisitListItem, VisitListResponse
 from app.services.external import ExternalDataAdapter
-from app.services.utils import as_str, clean_value, first_value
+from app.services.visit_sync import VisitIndexSyncer
 
 
 def _date_range_to_window(from_date: date, to_date: date) -> tuple[datetime, datetime]:
@@ -38,77 +37,6 @@ def _date_range_to_window(from_date: date, to_date: date) -> tuple[datetime, dat
     return from_dt, to_dt
 
 
-def _upsert_visit_rows(db: Session, rows: list[dict[str, Any]]) -> None:
-    if not rows:
-        return
-
-    dialect = db.get_bind().dialect.name
-    stmt_rows: list[dict[str, Any]] = []
-    for row in rows:
-        stmt_rows.append(
-            {
-                "patient_no": row["patient_no"],
-                "visit_time": row["visit_time"],
-                "dept_code": row.get("dept_code"),
-                "doc_code": row.get("doc_code"),
-                "xm": row.get("xm"),
-                "jzks": row.get("jzks"),
-                "jzys": row.get("jzys"),
-            }
-        )
-
-    chunk_size = 1000
-    for offset in range(0, len(stmt_rows), chunk_size):
-        batch = stmt_rows[offset : offset + chunk_size]
-        if dialect == "mysql":
-            stmt = mysql_insert(VisitIndex).values(batch)
-            stmt = stmt.on_duplicate_key_update(
-                visit_time=stmt.inserted.visit_time,
-                dept_code=stmt.inserted.dept_code,
-                doc_code=stmt.inserted.doc_code,
-                xm=stmt.inserted.xm,
-                jzks=stmt.inserted.jzks,
-                jzys=stmt.inserted.jzys,
-            )
-        else:
-            stmt = sqlite_insert(VisitIndex).values(batch)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=[VisitIndex.patient_no],
-                set_={
-                    "visit_time": stmt.excluded.visit_time,
-                    "dept_code": stmt.excluded.dept_code,
-                    "doc_code": stmt.excluded.doc_code,
-                    "xm": stmt.excluded.xm,
-                    "jzks": stmt.excluded.jzks,
-                    "jzys": stmt.excluded.jzys,
-                },
-            )
-        db.execute(stmt)
-
-
-def _normalize_visit_row(row: Dict[str, Any]) -> Optional[dict[str, Any]]:
-    patient_no = as_str(first_value(row, ["JZKH", "jzkh", "BLH", "blh", "PATIENT_NO", "patient_no"]))
-    visit_time = first_value(row, ["JZSJ", "jzsj", "VISIT_TIME", "visit_time"])
-    if not patient_no or not isinstance(visit_time, datetime):
-        return None
-
-    dept_code = as_str(first_value(row, ["JZKSDM", "jzksdm", "DEPT_CODE", "dept_code", "JZKSDMHIS", "jzksdmhis"]))
-    doc_code = as_str(first_value(row, ["JZYSDM", "jzysdm", "JZYS_DM", "jzys_dm", "DOC_CODE", "doc_code"]))
-    xm = as_str(first_value(row, ["XM", "xm"]))
-    jzks = as_str(first_value(row, ["JZKS", "jzks"]))
-    jzys = as_str(first_value(row, ["JZYS", "jzys"]))
-
-    return {
-        "patient_no": patient_no,
-        "visit_time": visit_time,
-        "dept_code": clean_value(dept_code),
-        "doc_code": clean_value(doc_code),
-        "xm": clean_value(xm),
-        "jzks": clean_value(jzks),
-        "jzys": clean_value(jzys),
-    }
-
-
 @dataclass(frozen=True)
 class VisitListQuery:
     from_date: date
@@ -120,15 +48,21 @@ class VisitListQuery:
     status: Optional[str] = None  # draft/submitted/not_created
     page: int = 1
     page_size: int = 20
+    refresh: bool = False  # 忽略同步水位，强制重新拉取所选范围
 
 
 class VisitListService:
-    def __init__(self, db: Session, external: ExternalDataAdapter) -> None:
+    def __init__(self, db: Session, external: ExternalDataAdapter, settings: Optional[Settings] = None) -> None:
         self.db = db
         self.external = external
+        self.settings = settings or get_settings()
+        self.syncer = VisitIndexSyncer(db, external, self.settings)
 
     def list_visits(self, session: SessionPayload, query: VisitListQuery) -> VisitListResponse:
-        self._sync_visit_index(query.from_date, query.to_date)
+        # 强制重新同步会全量读取外部视图并占用全局同步锁，仅医务科/质控可用
+        if query.refresh and not any(role in {"admin", "qc"} for role in session.roles):
+            raise AppError(code="forbidden", message="无权强制重新同步", http_status=status.HTTP_403_FORBIDDEN)
+        self._sync_visit_index(query.from_date, query.to_date, refresh=query.refresh)
 
         effective_dept, effective_doc = self._apply_role_filter(session, query.dept_code, query.doc_code)
 
@@ -201,18 +135,19 @@ class VisitListService:
                 )
             )
 
-        return VisitListResponse(page=query.page, page_size=query.page_size, total=total, items=items)
-
-    def _sync_visit_index(self, from_date: date, to_date: date) -> None:
-        from_dt, to_dt = _date_range_to_window(from_date, to_date)
-        raw_rows = self.external.fetch_visit_list(from_dt=from_dt, to_dt=to_dt)
-        normalized: list[dict[str, Any]] = []
-        for raw in raw_rows:
-            item = _normalize_visit_row(raw)
-            if item:
-                normalized.append(item)
-        _upsert_visit_rows(self.db, normalized)
-        self.db.commit()
+        return VisitListResponse(
+            page=query.page,
+            page_size=query.page_size,
+            total=total,
+            items=items,
+            synced_through=self.syncer.synced_through(query.from_date, query.to_date),
+        )
+
+    def _sync_visit_index(self, from_date: date, to_date: date, *, refresh: bool = False) -> None:
+        _date_range_to_window(from_date, to_date)
+        # 后台同步开启时近期日期已由后台维护，这里只补齐从未同步过的日期（如历史月份）
+        only_missing = self.settings.visit_sync_background and not refresh
+        self.syncer.sync_window(from_date, to_date, refresh=refresh, only_missing=only_missing)
 
     def _apply_role_filter(
         self, session: SessionPayload, dept_code: Optional[str], doc_code: Optional[str]
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, get_settings
+from app.core.db import create_session
+from app.models.visit_index import VisitIndex
+from app.models.visit_sync_state import VisitSyncState
+from app.services.external import ExternalDataAdapter, get_shared_external_adapter
+from app.services.utils import as_str, clean_value, first_value, local_now
+
+logger = logging.getLogger(__name__)
+
+SYNC_LOCK_NAME = "mz_mfp_visit_index_sync"
+
+
+_VISIT_HASH_FIELDS = ("visit_time", "dept_code", "doc_code", "xm", "jzks", "jzys")
+
+
+def _visit_row_hash(row: dict[str, Any]) -> str:
+    parts = []
+    for key in _VISIT_HASH_FIELDS:
+        value = row.get(key)
+        parts.append("" if value is None else (value.isoformat() if isinstance(value, datetime) else str(value)))
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class VisitUpsertStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def add(self, other: "VisitUpsertStats") -> None:
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+
+
+def _upsert_visit_rows(db: Session, rows: list[dict[str, Any]]) -> VisitUpsertStats:
+    stats = VisitUpsertStats()
+    if not rows:
+        return stats
+
+    dialect = db.get_bind().dialect.name
+    # 同一批次内同一 patient_no 以最后一次出现为准
+    by_patient: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        stmt_row = {
+            "patient_no": row["patient_no"],
+            "visit_time": row["visit_time"],
+            "dept_code": row.get("dept_code"),
+            "doc_code": row.get("doc_code"),
+            "xm": row.get("xm"),
+            "jzks": row.get("jzks"),
+            "jzys": row.get("jzys"),
+        }
+        stmt_row["row_hash"] = _visit_row_hash(stmt_row)
+        by_patient[stmt_row["patient_no"]] = stmt_row
+    stmt_rows = list(by_patient.values())
+
+    chunk_size = 1000
+    for offset in range(0, len(stmt_rows), chunk_size):
+        chunk = stmt_rows[offset : offset + chunk_size]
+        # 先按主键批量读取已有内容哈希，只写入新增或内容变化的行
+        existing = dict(
+            db.execute(
+                select(VisitIndex.patient_no, VisitIndex.row_hash).where(
+                    VisitIndex.patient_no.in_([row["patient_no"] for row in chunk])
+                )
+            ).all()
+        )
+        batch: list[dict[str, Any]] = []
+        for row in chunk:
+            if row["patient_no"] not in existing:
+                stats.inserted += 1
+            elif existing[row["patient_no"]] != row["row_hash"]:
+                stats.updated += 1
+            else:
+                stats.unchanged += 1
+                continue
+            batch.append(row)
+        if not batch:
+            continue
+
+        if dialect == "mysql":
+            stmt = mysql_insert(VisitIndex).values(batch)
+            stmt = stmt.on_duplicate_key_update(
+                visit_time=stmt.inserted.visit_time,
+                dept_code=stmt.inserted.dept_code,
+                doc_code=stmt.inserted.doc_code,
+                xm=stmt.inserted.xm,
+                jzks=stmt.inserted.jzks,
+                jzys=stmt.inserted.jzys,
+                row_hash=stmt.inserted.row_hash,
+            )
+        else:
+            stmt = sqlite_insert(VisitIndex).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[VisitIndex.patient_no],
+                set_={
+                    "visit_time": stmt.excluded.visit_time,
+                    "dept_code": stmt.excluded.dept_code,
+                    "doc_code": stmt.excluded.doc_code,
+                    "xm": stmt.excluded.xm,
+                    "jzks": stmt.excluded.jzks,
+                    "jzys": stmt.excluded.jzys,
+                    "row_hash": stmt.excluded.row_hash,
+                },
+            )
+        db.execute(stmt)
+    return stats
+
+
+def _upsert_sync_states(db: Session, rows: list[dict[str, Any]]) -> None:
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(VisitSyncState).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            synced_through=stmt.inserted.synced_through,
+            is_closed=stmt.inserted.is_closed,
+        )
+    else:
+        stmt = sqlite_insert(VisitSyncState).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VisitSyncState.sync_date],
+            set_={
+                "synced_through": stmt.excluded.synced_through,
+                "is_closed": stmt.excluded.is_closed,
+            },
+        )
+    db.execute(stmt)
+
+
+@dataclass(frozen=True)
+class _SyncSlice:
+    sync_date: date
+    start: datetime
+    end: datetime
+
+
+def _plan_sync_slices(
+    *,
+    from_date: date,
+    to_date: date,
+    now: datetime,
+    states: dict[date, VisitSyncState],
+    overlap: timedelta,
+    refresh: bool,
+    only_missing: bool = False,
+) -> list[_SyncSlice]:
+    slices: list[_SyncSlice] = []
+    day = from_date
+    while day <= to_date:
+        day_start = datetime(day.year, day.month, day.day)
+        day_end = day_start + timedelta(days=1)
+        if day_start >= now:
+            break
+
+        state = states.get(day)
+        if state is not None and not refresh and (state.is_closed or only_missing):
+            day += timedelta(days=1)
+            continue
+
+        start = day_start
+        if state is not None and not refresh:
+            start = max(day_start, state.synced_through - overlap)
+        end = min(day_end, now)
+        if start < end:
+            slices.append(_SyncSlice(sync_date=day, start=start, end=end))
+        day += timedelta(days=1)
+    return slices
+
+
+def _merge_slices(slices: list[_SyncSlice]) -> list[tuple[datetime, datetime]]:
+    # 相邻整日合并为一次外部查询，减少往返
+    windows: list[tuple[datetime, datetime]] = []
+    for item in slices:
+        if windows and windows[-1][1] == item.start:
+            windows[-1] = (windows[-1][0], item.end)
+        else:
+            windows.append((item.start, item.end))
+    return windows
+
+
+def _normalize_visit_row(row: Dict[str, Any]) -> Optional[dict[str, Any]]:
+    patient_no = as_str(first_value(row, ["JZKH", "jzkh", "BLH", "blh", "PATIENT_NO", "patient_no"]))
+    visit_time = first_value(row, ["JZSJ", "jzsj", "VISIT_TIME", "visit_time"])
+    if not patient_no or not isinstance(visit_time, datetime):
+        return None
+
+    dept_code = as_str(first_value(row, ["JZKSDM", "jzksdm", "DEPT_CODE", "dept_code", "JZKSDMHIS", "jzksdmhis"]))
+    doc_code = as_str(first_value(row, ["JZYSDM", "jzysdm", "JZYS_DM", "jzys_dm", "DOC_CODE", "doc_code"]))
+    xm = as_str(first_value(row, ["XM", "xm"]))
+    jzks = as_str(first_value(row, ["JZKS", "jzks"]))
+    jzys = as_str(first_value(row, ["JZYS", "jzys"]))
+
+    return {
+        "patient_no": patient_no,
+        "visit_time": visit_time,
+        "dept_code": clean_value(dept_code),
+        "doc_code": clean_value(doc_code),
+        "xm": clean_value(xm),
+        "jzks": clean_value(jzks),
+        "jzys": clean_value(jzys),
+    }
+
+
+class VisitIndexSyncer:
+    """从外部视图增量同步 `mz_mfp_visit_index`；跨进程通过数据库命名锁保证同一时间只有一个同步者。"""
+
+    def __init__(self, db: Session, external: ExternalDataAdapter, settings: Optional[Settings] = None) -> None:
+        self.db = db
+        self.external = external
+        self.settings = settings or get_settings()
+
+    def sync_window(
+        self,
+        from_date: date,
+        to_date: date,
+        *,
+        refresh: bool = False,
+        only_missing: bool = False,
+        lock_timeout: int = 0,
+    ) -> Optional[VisitUpsertStats]:
+        """同步 [from_date, to_date] 并返回写入统计；拿不到锁（其他进程正在同步）时返回 None。"""
+        lock_conn = None
+        if self.db.get_bind().dialect.name == "mysql":
+            lock_conn = self.db.get_bind().connect()
+            acquired = lock_conn.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"), {"name": SYNC_LOCK_NAME, "timeout": lock_timeout}
+            ).scalar()
+            if acquired != 1:
+                lock_conn.close()
+                logger.info("Visit index sync skipped: lock held by another worker")
+                return None
+        try:
+            return self._sync(from_date, to_date, refresh=refresh, only_missing=only_missing)
+        finally:
+            if lock_conn is not None:
+                try:
+                    lock_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": SYNC_LOCK_NAME})
+                finally:
+                    lock_conn.close()
+
+    def _load_states(self, from_date: date, to_date: date) -> dict[date, VisitSyncState]:
+        stmt = select(VisitSyncState).where(VisitSyncState.sync_date >= from_date, VisitSyncState.sync_date <= to_date)
+        return {state.sync_date: state for state in self.db.execute(stmt).scalars()}
+
+    def _sync(self, from_date: date, to_date: date, *, refresh: bool, only_missing: bool) -> VisitUpsertStats:
+        now = local_now(self.settings)
+        slices = _plan_sync_slices(
+            from_date=from_date,
+            to_date=to_date,
+            now=now,
+            states=self._load_states(from_date, to_date),
+            overlap=timedelta(minutes=self.settings.visit_sync_overlap_minutes),
+            refresh=refresh,
+            only_missing=only_missing,
+        )
+        stats = VisitUpsertStats()
+        if not slices:
+            return stats
+
+        for from_dt, to_dt in _merge_slices(slices):
+            raw_rows = self.external.fetch_visit_list(from_dt=from_dt, to_dt=to_dt)
+            normalized: list[dict[str, Any]] = []
+            for raw in raw_rows:
+                item = _normalize_visit_row(raw)
+                if item:
+                    normalized.append(item)
+            stats.add(_upsert_visit_rows(self.db, normalized))
+
+        close_after = timedelta(minutes=self.settings.visit_sync_close_after_minutes)
+        state_rows: list[dict[str, Any]] = []
+        for item in slices:
+            day_end = datetime(item.sync_date.year, item.sync_date.month, item.sync_date.day) + timedelta(days=1)
+            state_rows.append(
+                {
+                    "sync_date": item.sync_date,
+                    "synced_through": item.end,
+                    "is_closed": item.end >= day_end and now >= day_end + close_after,
+                }
+            )
+        _upsert_sync_states(self.db, state_rows)
+        self.db.commit()
+        logger.info(
+            "Visit index synced %s~%s: inserted=%s updated=%s unchanged=%s",
+            from_date,
+            to_date,
+            stats.inserted,
+            stats.updated,
+            stats.unchanged,
+        )
+        return stats
+
+    def synced_through(self, from_date: date, to_date: date) -> Optional[datetime]:
+        """返回范围内本地数据的新鲜度：未关闭日期中最早的同步水位；存在未同步日期时返回 None。"""
+        today = local_now(self.settings).date()
+        last_day = min(to_date, today)
+        if last_day < from_date:
+            return None
+        states = self._load_states(from_date, last_day)
+        if len(states) < (last_day - from_date).days + 1:
+            return None
+        open_marks = [state.synced_through for state in states.values() if not state.is_closed]
+        if open_marks:
+            return min(open_marks)
+        return max(state.synced_through for state in states.values())
+
+
+def sync_recent_days(settings: Optional[Settings] = None) -> Optional[VisitUpsertStats]:
+    """同步“今天 + 最近 N 天”；供后台线程与命令行 worker 共用。"""
+    settings = settings or get_settings()
+    today = local_now(settings).date()
+    from_date = today - timedelta(days=max(0, settings.visit_sync_recent_days))
+    db = create_session()
+    try:
+        return VisitIndexSyncer(db, get_shared_external_adapter(), settings).sync_window(from_date, today)
+    finally:
+        db.close()
+
+
+class VisitSyncScheduler:
+    """应用内后台线程：按固定间隔刷新近期就诊索引。"""
+
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self.settings = settings or get_settings()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="visit-index-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        interval = max(5, int(self.settings.visit_sync_interval_seconds))
+        while not self._stop.is_set():
+            try:
+                sync_recent_days(self.settings)
+            except Exception:
+                logger.exception("Background visit index sync failed")
+            self._stop.wait(interval)
@@ -0,0 +1,38 @@
+"""新增就诊索引同步水位表 mz_mfp_visit_sync_state
+
+Revision ID: 0006_visit_sync_state
+Revises: 0005_export_log_alter
+Create Date: 2026-10-17
+
+说明：
+- 按自然日记录已同步到的时间点，列表查询只增量拉取新时间片。
+- 已关闭（结束且超过宽限期）的日期不再重复查询外部视图，除非显式刷新。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0006_visit_sync_state"
+down_revision = "0005_export_log_alter"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+CREATE TABLE IF NOT EXISTS `mz_mfp_visit_sync_state` (
+  `sync_date` date NOT NULL COMMENT '就诊日期（自然日）',
+  `synced_through` datetime NOT NULL COMMENT '已同步到的时间点（不含）',
+  `is_closed` tinyint(1) NOT NULL DEFAULT 0 COMMENT '1=该日已完成最终同步，不再重复拉取',
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`sync_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS `mz_mfp_visit_sync_state`")
@@ -0,0 +1,32 @@
+"""就诊索引表 mz_mfp_visit_index 增加内容哈希列
+
+Revision ID: 0007_visit_index_row_hash
+Revises: 0006_visit_sync_state
+Create Date: 2026-10-17
+
+说明：
+- row_hash 为外部视图字段（就诊时间/科室/医生/姓名等）的 SHA1，同步时内容未变化的行不再重复写入。
+- 存量数据 row_hash 为空，首次同步时会整体写入一次。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0007_visit_index_row_hash"
+down_revision = "0006_visit_sync_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+ALTER TABLE `mz_mfp_visit_index`
+  ADD COLUMN IF NOT EXISTS `row_hash` char(40) DEFAULT NULL COMMENT '外部视图字段内容哈希（SHA1），用于跳过未变化行' AFTER `jzys`;
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE `mz_mfp_visit_index` DROP COLUMN IF EXISTS `row_hash`")
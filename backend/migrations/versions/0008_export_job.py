@@ -0,0 +1,48 @@
+"""导出日志表 mz_mfp_export_log 支持异步导出任务
+
+Revision ID: 0008_export_job
+Revises: 0007_visit_index_row_hash
+Create Date: 2026-10-17
+
+说明：
+- 异步导出任务复用 mz_mfp_export_log：status 增加 queued/running 两种状态，file_path 指向生成的文件。
+- progress 记录各阶段计数（total/loaded/validated/written）。
+- worker_id/heartbeat_at 用于识别服务重启后中断的任务（心跳超时的任务重新排队或置为失败）。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0008_export_job"
+down_revision = "0007_visit_index_row_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+ALTER TABLE `mz_mfp_export_log`
+  MODIFY COLUMN `status` varchar(20) NOT NULL COMMENT 'queued/running/success/failed',
+  ADD COLUMN IF NOT EXISTS `progress` json DEFAULT NULL COMMENT '异步任务进度（total/loaded/validated/written）' AFTER `detail`,
+  ADD COLUMN IF NOT EXISTS `worker_id` varchar(100) DEFAULT NULL COMMENT '执行任务的进程标识（host:pid）' AFTER `progress`,
+  ADD COLUMN IF NOT EXISTS `started_at` datetime DEFAULT NULL COMMENT '任务开始时间' AFTER `worker_id`,
+  ADD COLUMN IF NOT EXISTS `finished_at` datetime DEFAULT NULL COMMENT '任务结束时间' AFTER `started_at`,
+  ADD COLUMN IF NOT EXISTS `heartbeat_at` datetime DEFAULT NULL COMMENT '任务最近心跳时间' AFTER `finished_at`;
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+ALTER TABLE `mz_mfp_export_log`
+  DROP COLUMN IF EXISTS `heartbeat_at`,
+  DROP COLUMN IF EXISTS `finished_at`,
+  DROP COLUMN IF EXISTS `started_at`,
+  DROP COLUMN IF EXISTS `worker_id`,
+  DROP COLUMN IF EXISTS `progress`,
+  MODIFY COLUMN `status` varchar(20) NOT NULL COMMENT 'success/failed';
+"""
+    )
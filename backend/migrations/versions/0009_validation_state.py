@@ -0,0 +1,43 @@
+"""新增校验结果表 mz_mfp_validation_state
+
+Revision ID: 0009_validation_state
+Revises: 0008_export_job
+Create Date: 2026-10-17
+
+说明：
+- 每条记录保存最近一次提交校验结果（错误数与 FieldError 列表）。
+- 复用条件：记录版本、规则版本（校验规则内容哈希）、字典版本（相关字典集 version/updated_at 的哈希）均未变化；
+  字典重新导入或规则变更后自动失效。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0009_validation_state"
+down_revision = "0008_export_job"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+CREATE TABLE IF NOT EXISTS `mz_mfp_validation_state` (
+  `record_id` bigint unsigned NOT NULL COMMENT '关联mz_mfp_record.id',
+  `record_version` int unsigned NOT NULL COMMENT '校验时的记录版本号',
+  `rules_version` char(40) NOT NULL COMMENT '校验规则版本（内容哈希）',
+  `dict_version` char(40) NOT NULL COMMENT '字典版本（相关字典集 version/updated_at 的哈希）',
+  `error_count` int unsigned NOT NULL COMMENT '错误数',
+  `errors` json DEFAULT NULL COMMENT '校验错误列表（FieldError）',
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`record_id`),
+  CONSTRAINT `fk_validation_state_record` FOREIGN KEY (`record_id`) REFERENCES `mz_mfp_record` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS `mz_mfp_validation_state`")
@@ -0,0 +1,43 @@
+"""字典条目 dict_item 增加拼音首字母列及拼音前缀索引
+
+Revision ID: 0010_dict_item_pinyin
+Revises: 0009_validation_state
+Create Date: 2026-10-17
+
+说明：
+- pinyin 为名称全拼、pinyin_abbr 为名称拼音首字母，均为小写、无分隔，由字典导入脚本根据内置对照表生成。
+- 两列按 (set_code, 列) 建索引，字典检索对拼音使用前缀匹配（LIKE 'q%'）。
+- 存量条目两列为空，重新执行 scripts/import_dicts_direct.py 即按差异补齐。
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0010_dict_item_pinyin"
+down_revision = "0009_validation_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # MySQL 8.0+ 支持 ADD COLUMN/ADD INDEX IF NOT EXISTS，用于避免重复执行报错
+    op.execute(
+        """
+ALTER TABLE `dict_item`
+  ADD COLUMN IF NOT EXISTS `pinyin_abbr` varchar(100) DEFAULT NULL COMMENT '名称拼音首字母（小写、无分隔）' AFTER `pinyin`,
+  ADD INDEX IF NOT EXISTS `idx_set_code_pinyin` (`set_code`, `pinyin`),
+  ADD INDEX IF NOT EXISTS `idx_set_code_pinyin_abbr` (`set_code`, `pinyin_abbr`);
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+ALTER TABLE `dict_item`
+  DROP INDEX IF EXISTS `idx_set_code_pinyin_abbr`,
+  DROP INDEX IF EXISTS `idx_set_code_pinyin`,
+  DROP COLUMN IF EXISTS `pinyin_abbr`;
+"""
+    )
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from fastapi import status
+
+from app.core.errors import AppError
+from app.services.export_rows import (
+    FEE_CODES,
+    ExportColumnPlan,
+    _fee_attr_for_code,
+    _fmt_date,
+    _quote_en,
+)
+from app.services.utils import clean_value
+
+
+def legacy_record_to_row(record: Any, headers: list[str]) -> dict[str, Any]:
+    """改造前的按表头字典逐行构造实现（仅用于对比结果与耗时）。"""
+    base = record.base_info
+    org = record.org
+    if base is None or org is None:
+        raise AppError(code="internal_error", message="记录数据不完整", http_status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    data: dict[str, Any] = {h: None for h in headers}
+
+    # 基础/就诊过程
+    data["JGMC"] = clean_value(org.jgmc)
+    data["ZZJGDM"] = clean_value(org.zzjgdm)
+    data["USERNAME"] = clean_value(base.username)
+    data["JZKH"] = clean_value(base.jzkh)
+    data["XM"] = clean_value(base.xm)
+    data["JZSJ"] = _fmt_date(base.jzsj)
+    data["XB"] = clean_value(base.xb)
+    data["CSRQ"] = _fmt_date(base.csrq)
+    data["HY"] = clean_value(base.hy)
+    data["GJ"] = clean_value(base.gj)
+    data["MZ"] = clean_value(base.mz)
+    data["ZJLB"] = clean_value(base.zjlb)
+    data["ZJHM"] = clean_value(base.zjhm)
+    data["XZZ"] = clean_value(base.xzz)
+    data["LXDH"] = clean_value(base.lxdh)
+    data["YWGMS"] = clean_value(base.ywgms)
+    data["GMYW"] = _quote_en(base.gmyw)
+    data["QTGMS"] = clean_value(base.qtgms)
+    data["QTGMY"] = _quote_en(base.qtgmy)
+    data["GHSJ"] = _fmt_date(base.ghsj)
+    data["BDSJ"] = _fmt_date(base.bdsj)
+    data["JZKS"] = clean_value(base.jzks)
+    data["JZKSDM"] = clean_value(base.jzksdm)
+    data["JZYS"] = clean_value(base.jzys)
+    data["JZYSZC"] = clean_value(base.jzyszc)
+    data["JZLX"] = clean_value(base.jzlx)
+    data["FZ"] = clean_value(base.fz)
+    data["SY"] = clean_value(base.sy)
+    data["MZMTBHZ"] = clean_value(base.mzmtbhz)
+    data["JZHZFJ"] = clean_value(base.jzhzfj)
+    data["JZHZQX"] = clean_value(base.jzhzqx)
+    data["ZYZKJSJ"] = _fmt_date(base.zyzkjsj)
+    data["HZZS"] = _quote_en(base.hzzs)
+
+    # 诊断映射
+    diags = record.diagnoses or []
+    def _diag(diag_type: str) -> list[Any]:
+        return sorted([d for d in diags if d.diag_type == diag_type], key=lambda d: int(d.seq_no))
+
+    tcm_dis = _diag("tcm_disease_main")
+    if tcm_dis:
+        data["MZD_ZB"] = clean_value(tcm_dis[0].diag_name)
+        data["JBDM_ZB"] = clean_value(tcm_dis[0].diag_code)
+
+    tcm_syn = _diag("tcm_syndrome")
+    for idx in range(1, 3):
+        item = tcm_syn[idx - 1] if idx - 1 < len(tcm_syn) else None
+        data[f"MZD_ZZ{idx}"] = clean_value(item.diag_name) if item else None
+        data[f"JBDM_ZZ{idx}"] = clean_value(item.diag_code) if item else None
+
+    wm_main = _diag("wm_main")
+    if wm_main:
+        data["MZZD_ZYZD"] = clean_value(wm_main[0].diag_name)
+        data["MZZD_JBBM"] = clean_value(wm_main[0].diag_code)
+
+    wm_other = _diag("wm_other")
+    for idx in range(1, 11):
+        item = wm_other[idx - 1] if idx - 1 < len(wm_other) else None
+        data[f"MZZD_QTZD{idx}"] = clean_value(item.diag_name) if item else None
+        data[f"MZZD_JBBM{idx}"] = clean_value(item.diag_code) if item else None
+
+    # 中医治疗性操作（≤10）
+    ops = sorted(record.tcm_operations or [], key=lambda o: int(o.seq_no))
+    for idx in range(1, 11):
+        op = ops[idx - 1] if idx - 1 < len(ops) else None
+        data[f"ZYZLCZMC{idx}"] = clean_value(op.op_name) if op else None
+        data[f"ZYZLCZBM{idx}"] = clean_value(op.op_code) if op else None
+        data[f"ZYZLCZCS{idx}"] = int(op.op_times) if op and op.op_times is not None else None
+        data[f"ZYZLCZTS{idx}"] = int(op.op_days) if op and op.op_days is not None else None
+
+    # 手术/操作（≤5）
+    surgeries = sorted(record.surgeries or [], key=lambda s: int(s.seq_no))
+    for idx in range(1, 6):
+        s = surgeries[idx - 1] if idx - 1 < len(surgeries) else None
+        data[f"SSCZMC{idx}"] = clean_value(s.op_name) if s else None
+        data[f"SSCZBM{idx}"] = clean_value(s.op_code) if s else None
+        data[f"SSCZRQ{idx}"] = _fmt_date(s.op_time) if s else None
+        data[f"SSCZZ{idx}"] = clean_value(s.operator_name) if s else None
+        data[f"MZFS{idx}"] = clean_value(s.anesthesia_method) if s else None
+        data[f"MZYS{idx}"] = clean_value(s.anesthesia_doctor) if s else None
+        data[f"SHJB{idx}"] = int(s.surgery_level) if s else None
+
+    # 用药标识
+    med = record.medication_summary
+    data["XYSY"] = clean_value(getattr(med, "xysy", None))
+    data["ZCYSY"] = clean_value(getattr(med, "zcysy", None))
+    data["ZYZJSY"] = clean_value(getattr(med, "zyzjsy", None))
+    data["CTYPSY"] = clean_value(getattr(med, "ctypsy", None))
+    data["PFKLSY"] = clean_value(getattr(med, "pfklsy", None))
+
+    herbs = sorted(record.herb_details or [], key=lambda h: int(h.seq_no))
+    for idx in range(1, 41):
+        h = herbs[idx - 1] if idx - 1 < len(herbs) else None
+        data[f"ZCYLB{idx}"] = clean_value(h.herb_type) if h else None
+        data[f"YYTJDM{idx}"] = clean_value(h.route_code) if h else None
+        data[f"YYTJMC{idx}"] = clean_value(h.route_name) if h else None
+        data[f"YYJS{idx}"] = int(h.dose_count) if h else None
+
+    # 费用
+    fee = record.fee_summary
+    if fee is not None:
+        for code in [
+            "ZFY",
+            "ZFJE",
+            "YLFWF",
+            "ZLCZF",
+            "HLF",
+            "QTFY",
+            "BLZDF",
+            "ZDF",
+            "YXXZDF",
+            "LCZDXMF",
+            "FSSZLXMF",
+            "ZLF",
+            "SSZLF",
+            "MZF",
+            "SSF",
+            "KFF",
+            "ZYL_ZYZD",
+            "ZYZL",
+            "ZYWZ",
+            "ZYGS",
+            "ZCYJF",
+            "ZYTNZL",
+            "ZYGCZL",
+            "ZYTSZL",
+            "ZYQT",
+            "ZYTSTPJG",
+            "BZSS",
+            "XYF",
+            "KJYWF",
+            "ZCYF",
+            "ZYZJF",
+            "ZCYF1",
+            "PFKLF",
+            "XF",
+            "BDBLZPF",
+            "QDBLZPF",
+            "NXYZLZPF",
+            "XBYZLZPF",
+            "JCYYCLF",
+            "YYCLF",
+            "SSYCXCLF",
+            "QTF",
+        ]:
+            attr = _fee_attr_for_code(code)
+            value = getattr(fee, attr, None)
+            if value is None:
+                data[code] = None
+            elif isinstance(value, Decimal):
+                data[code] = float(value)
+            else:
+                data[code] = value
+
+    return data
+
+
+def synthetic_headers() -> list[str]:
+    """与上传模板结构一致的合成表头（含一列未映射的列，验证空列处理）。"""
+    headers = [
+        "JGMC", "ZZJGDM", "USERNAME", "JZKH", "XM", "JZSJ", "XB", "CSRQ", "HY", "GJ", "MZ", "ZJLB", "ZJHM",
+        "XZZ", "LXDH", "YWGMS", "GMYW", "QTGMS", "QTGMY", "GHSJ", "BDSJ", "JZKS", "JZKSDM", "JZYS", "JZYSZC",
+        "JZLX", "FZ", "SY", "MZMTBHZ", "JZHZFJ", "JZHZQX", "ZYZKJSJ", "HZZS", "MZD_ZB", "JBDM_ZB",
+    ]
+    headers += [f"{p}{i}" for i in range(1, 3) for p in ("MZD_ZZ", "JBDM_ZZ")]
+    headers += ["MZZD_ZYZD", "MZZD_JBBM"]
+    headers += [f"{p}{i}" for i in range(1, 11) for p in ("MZZD_QTZD", "MZZD_JBBM")]
+    headers += [f"{p}{i}" for i in range(1, 11) for p in ("ZYZLCZMC", "ZYZLCZBM", "ZYZLCZCS", "ZYZLCZTS")]
+    headers += [f"{p}{i}" for i in range(1, 6) for p in ("SSCZMC", "SSCZBM", "SSCZRQ", "SSCZZ", "MZFS", "MZYS", "SHJB")]
+    headers += ["XYSY", "ZCYSY", "ZYZJSY", "CTYPSY", "PFKLSY"]
+    headers += [f"{p}{i}" for i in range(1, 41) for p in ("ZCYLB", "YYTJDM", "YYTJMC", "YYJS")]
+    headers += list(FEE_CODES)
+    headers.append("BZ")
+    return headers
+
+
+def synthetic_record(rng: random.Random, index: int) -> SimpleNamespace:
+    visit = datetime(2026, 1, 1, 8) + timedelta(minutes=index)
+    base = SimpleNamespace(
+        username=f"u{index}", jzkh=f"P{index:08d}", xm=f"患者{index}", jzsj=visit, xb="1", csrq=date(1980, 1, 1),
+        hy="1", gj="CHN", mz="01", zjlb="01", zjhm="110101198001010000", xzz="地址", lxdh="13800000000",
+        ywgms="1", gmyw='青霉素"A"', qtgms="1", qtgmy=None, ghsj=visit, bdsj=visit, jzks="内科", jzksdm="01",
+        jzys="医生", jzyszc="1", jzlx="1", fz="0", sy="0", mzmtbhz="0", jzhzfj="1", jzhzqx="1", zyzkjsj=visit,
+        hzzs="主诉 ",
+    )
+    diags = [SimpleNamespace(diag_type="tcm_disease_main", seq_no=1, diag_name="中医病", diag_code="A01")]
+    diags += [SimpleNamespace(diag_type="tcm_syndrome", seq_no=i, diag_name=f"证{i}", diag_code=f"B{i}") for i in (2, 1)]
+    diags += [SimpleNamespace(diag_type="wm_main", seq_no=1, diag_name="西医主", diag_code="I10")]
+    diags += [
+        SimpleNamespace(diag_type="wm_other", seq_no=i, diag_name=f"其他{i}", diag_code=f"J{i}")
+        for i in rng.sample(range(1, 11), rng.randint(0, 10))
+    ]
+    ops = [
+        SimpleNamespace(seq_no=i, op_name=f"操作{i}", op_code=f"9{i}", op_times=i, op_days=None if i % 2 else i)
+        for i in range(1, rng.randint(1, 10) + 1)
+    ]
+    surgeries = [
+        SimpleNamespace(
+            seq_no=i, op_name=f"手术{i}", op_code=f"8{i}", op_time=visit, operator_name="术者",
+            anesthesia_method="01", anesthesia_doctor="麻醉", surgery_level=i % 4 + 1,
+        )
+        for i in range(1, rng.randint(0, 5) + 1)
+    ]
+    herbs = [
+        SimpleNamespace(seq_no=i, herb_type="1", route_code="01", route_name="口服", dose_count=7)
+        for i in range(1, rng.randint(0, 40) + 1)
+    ]
+    med = SimpleNamespace(xysy="1", zcysy="0", zyzjsy="0", ctypsy="1", pfklsy="0")
+    fee = SimpleNamespace(**{_fee_attr_for_code(code): Decimal(rng.randint(0, 99999)) / 100 for code in FEE_CODES})
+    return SimpleNamespace(
+        org=SimpleNamespace(jgmc="某中医院", zzjgdm="123456789"),
+        base_info=base,
+        diagnoses=diags,
+        tcm_operations=ops,
+        surgeries=surgeries,
+        herb_details=herbs,
+        medication_summary=med,
+        fee_summary=fee if index % 10 else None,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比导出行构造：旧版按表头字典 vs 预编译列计划")
+    parser.add_argument("--records", type=int, default=10000, help="合成记录数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快一次）")
+    parser.add_argument("--seed", type=int, default=20260101)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    headers = synthetic_headers()
+    records = [synthetic_record(rng, i) for i in range(args.records)]
+
+    plan = ExportColumnPlan(headers)
+    for record in records:
+        expected = legacy_record_to_row(record, headers)
+        if plan.build_row(record) != [expected.get(h) for h in headers]:
+            raise SystemExit(f"结果不一致：{record.base_info.jzkh}")
+
+    def _bench(fn) -> float:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    legacy = _bench(lambda: [[m.get(h) for h in headers] for m in (legacy_record_to_row(r, headers) for r in records)])
+    compiled = _bench(lambda: [plan.build_row(r) for r in records])
+    print(f"记录数 {args.records}，列数 {len(headers)}，结果一致")
+    print(f"旧版（字典+按表头取值）：{legacy:.3f}s")
+    print(f"列计划：{compiled:.3f}s（{legacy / compiled:.1f}x）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services.export_template import TEMPLATE_SHEET, default_template_path, write_sidecar
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="预编译导出模板表头为 JSON（部署时执行，导出时免去解析 xlsx）")
+    parser.add_argument("--xlsx", type=Path, default=None, help="模板文件路径（默认项目根目录下的上传模板）")
+    parser.add_argument("--sheet", default=TEMPLATE_SHEET, help="表头所在工作表名称")
+    args = parser.parse_args()
+
+    template_path = args.xlsx or default_template_path()
+    if not template_path.is_file():
+        raise SystemExit(f"模板文件不存在：{template_path}")
+    target = write_sidecar(template_path, args.sheet)
+    print(f"已生成：{target}")
+
+
+if __name__ == "__main__":
+    main()
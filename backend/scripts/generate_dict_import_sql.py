@@ -2,12 +2,18 @@ from __future__ import annotations
 
 import argparse
 import re
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Iterator, Optional
 
 import openpyxl
 
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services.pinyin import to_pinyin
 
 RC_CODE_RE = re.compile(r"(RC\\d{3})")
 
@@ -157,7 +163,8 @@ def main() -> None:
         upsert_set_sql = (
             "INSERT INTO dict_set(set_code,set_name,version,source) "
             f"VALUES('{_sql_escape(set_code)}','{_sql_escape(set_name)}',NULL,NULL) "
-            "ON DUPLICATE KEY UPDATE set_name=VALUES(set_name), version=VALUES(version), source=VALUES(source);"
+            "ON DUPLICATE KEY UPDATE set_name=VALUES(set_name), version=VALUES(version), source=VALUES(source), "
+            "updated_at=CURRENT_TIMESTAMP;"
         )
         _write_sql(outdir / f"{set_code}__00_upsert_set.sql", upsert_set_sql)
 
@@ -169,13 +176,18 @@ def main() -> None:
             for item in batch:
                 extra = "NULL" if item.extra_code is None else f"'{_sql_escape(item.extra_code)}'"
                 merged = "NULL" if item.merged_code is None else f"'{_sql_escape(item.merged_code)}'"
+                pinyin, pinyin_abbr = to_pinyin(item.name)
+                full = "NULL" if pinyin is None else f"'{_sql_escape(pinyin)}'"
+                abbr = "NULL" if pinyin_abbr is None else f"'{_sql_escape(pinyin_abbr)}'"
                 values_sql.append(
-                    f"('{_sql_escape(set_code)}','{_sql_escape(item.code)}','{_sql_escape(item.name)}',{extra},{merged},1,0)"
+                    f"('{_sql_escape(set_code)}','{_sql_escape(item.code)}','{_sql_escape(item.name)}',"
+                    f"{extra},{merged},{full},{abbr},1,0)"
                 )
             insert_sql = (
-                "INSERT INTO dict_item(set_code,code,name,extra_code,merged_code,status,sort_no) VALUES\\n"
+                "INSERT INTO dict_item(set_code,code,name,extra_code,merged_code,pinyin,pinyin_abbr,status,sort_no) VALUES\\n"
                 + ",\\n".join(values_sql)
-                + "\\nON DUPLICATE KEY UPDATE name=VALUES(name), extra_code=VALUES(extra_code), merged_code=VALUES(merged_code), status=VALUES(status), sort_no=VALUES(sort_no);"
+                + "\\nON DUPLICATE KEY UPDATE name=VALUES(name), extra_code=VALUES(extra_code), merged_code=VALUES(merged_code), "
+                "pinyin=VALUES(pinyin), pinyin_abbr=VALUES(pinyin_abbr), status=VALUES(status), sort_no=VALUES(sort_no);"
             )
             _write_sql(outdir / f"{set_code}__02_items_{idx:04d}.sql", insert_sql)
 
@@ -1,20 +1,22 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import re
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 import openpyxl
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, text
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
 from app.core.config import get_settings
+from app.services.pinyin import to_pinyin
 
 
 RC_CODE_RE = re.compile(r"(RC\\d{3})")
@@ -26,6 +28,9 @@ class DictRow:
     name: str
     extra_code: Optional[str] = None
     merged_code: Optional[str] = None
+    # 由名称生成的全拼 / 首字母（见 app/services/pinyin.py）
+    pinyin: Optional[str] = None
+    pinyin_abbr: Optional[str] = None
 
 
 def _as_str(value: object) -> Optional[str]:
@@ -119,14 +124,162 @@ def _iter_sheet_dicts(wb) -> Iterator[tuple[str, str, Iterator[DictRow]]]:
         yield set_code, set_name, iterator
 
 
+@dataclass
+class DictDiff:
+    inserts: list[DictRow] = field(default_factory=list)
+    # (dict_item.id, 新内容)；包含内容变化的条目与重新启用的条目
+    updates: list[tuple[int, DictRow]] = field(default_factory=list)
+    deactivate_ids: list[int] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deactivate_ids)
+
+
+def _code_key(code: str) -> str:
+    # 与 uk_set_code_code 的 utf8mb4_general_ci 比较语义一致：不区分大小写、忽略尾部空格
+    return code.rstrip(" ").casefold()
+
+
+def _collect_rows(iterator: Iterable[DictRow]) -> dict[str, DictRow]:
+    # 同一 set_code 内重复 code 保留首次出现；保留的条目按名称生成全拼与首字母
+    rows: dict[str, DictRow] = {}
+    for row in iterator:
+        key = _code_key(row.code)
+        if key not in rows:
+            pinyin, pinyin_abbr = to_pinyin(row.name)
+            rows[key] = replace(row, pinyin=pinyin, pinyin_abbr=pinyin_abbr)
+    return rows
+
+
+def content_version(rows: dict[str, DictRow]) -> str:
+    """字典集内容哈希，作为 dict_set.version；内容不变时版本不变，前后端缓存继续有效。
+
+    拼音由名称派生，不参与哈希；仅拼音变化（如补齐历史数据）时版本不变，由 updated_at 通知各进程重载。
+    """
+    digest = hashlib.sha1()
+    for key in sorted(rows):
+        row = rows[key]
+        digest.update("\x1f".join((row.code, row.name, row.extra_code or "", row.merged_code or "")).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:16]
+
+
+def _diff(existing: Iterable[Any], rows: dict[str, DictRow]) -> DictDiff:
+    diff = DictDiff()
+    seen: set[str] = set()
+    for item in existing:
+        key = _code_key(item.code)
+        seen.add(key)
+        row = rows.get(key)
+        if row is None:
+            if item.status == 1:
+                diff.deactivate_ids.append(item.id)
+            continue
+        current = (item.code, item.name, item.extra_code, item.merged_code, item.pinyin, item.pinyin_abbr)
+        expected = (row.code, row.name, row.extra_code, row.merged_code, row.pinyin, row.pinyin_abbr)
+        if current != expected or item.status != 1:
+            diff.updates.append((item.id, row))
+    diff.inserts = [row for key, row in rows.items() if key not in seen]
+    return diff
+
+
+def _chunks(items: list[Any], size: int) -> Iterator[list[Any]]:
+    for offset in range(0, len(items), size):
+        yield items[offset : offset + size]
+
+
+def _apply_diff(conn, set_code: str, diff: DictDiff, batch_size: int) -> None:
+    for batch in _chunks(diff.inserts, batch_size):
+        conn.execute(
+            text(
+                "INSERT INTO dict_item(set_code,code,name,extra_code,merged_code,pinyin,pinyin_abbr,status,sort_no) "
+                "VALUES(:set_code,:code,:name,:extra_code,:merged_code,:pinyin,:pinyin_abbr,1,0)"
+            ),
+            [
+                {
+                    "set_code": set_code,
+                    "code": row.code,
+                    "name": row.name,
+                    "extra_code": row.extra_code,
+                    "merged_code": row.merged_code,
+                    "pinyin": row.pinyin,
+                    "pinyin_abbr": row.pinyin_abbr,
+                }
+                for row in batch
+            ],
+        )
+    for batch in _chunks(diff.updates, batch_size):
+        conn.execute(
+            text(
+                "UPDATE dict_item SET code=:code, name=:name, extra_code=:extra_code, merged_code=:merged_code, "
+                "pinyin=:pinyin, pinyin_abbr=:pinyin_abbr, status=1 WHERE id=:id"
+            ),
+            [
+                {
+                    "id": item_id,
+                    "code": row.code,
+                    "name": row.name,
+                    "extra_code": row.extra_code,
+                    "merged_code": row.merged_code,
+                    "pinyin": row.pinyin,
+                    "pinyin_abbr": row.pinyin_abbr,
+                }
+                for item_id, row in batch
+            ],
+        )
+    # 不再出现在标准中的条目只停用不删除：历史记录仍可能引用这些编码
+    for batch in _chunks(diff.deactivate_ids, batch_size):
+        conn.execute(
+            text("UPDATE dict_item SET status=0 WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": batch},
+        )
+
+
+def import_set(
+    conn, set_code: str, set_name: str, rows: dict[str, DictRow], *, batch_size: int, dry_run: bool
+) -> tuple[DictDiff, bool]:
+    """在调用方事务内对比并写入单个字典集，返回 (差异, 是否更新了 dict_set)。"""
+    version = content_version(rows)
+    current = conn.execute(
+        text("SELECT set_name, version FROM dict_set WHERE set_code=:set_code FOR UPDATE"), {"set_code": set_code}
+    ).first()
+    existing = conn.execute(
+        text(
+            "SELECT id, code, name, extra_code, merged_code, pinyin, pinyin_abbr, status "
+            "FROM dict_item WHERE set_code=:set_code"
+        ),
+        {"set_code": set_code},
+    ).all()
+    diff = _diff(existing, rows)
+    touched = current is None or not diff.is_empty() or (current.set_name, current.version) != (set_name, version)
+    if dry_run or not touched:
+        return diff, touched
+
+    # 先写 dict_set（新字典集需先存在，满足外键），updated_at 变化即通知各进程的字典快照/检索索引重载
+    conn.execute(
+        text(
+            "INSERT INTO dict_set(set_code,set_name,version,source) "
+            "VALUES(:set_code,:set_name,:version,NULL) "
+            "ON DUPLICATE KEY UPDATE set_name=VALUES(set_name), version=VALUES(version), "
+            "updated_at=CURRENT_TIMESTAMP"
+        ),
+        {"set_code": set_code, "set_name": set_name, "version": version},
+    )
+    _apply_diff(conn, set_code, diff, batch_size)
+    return diff, touched
+
+
 def main() -> None:
-    parser = argparse.ArgumentParser(description="直接导入标准字典到 MySQL（会覆盖同 set_code 数据）")
+    parser = argparse.ArgumentParser(
+        description="按差异导入标准字典到 MySQL（按 set_code+code 对比，只写新增/变更/停用，每个字典集一个事务）"
+    )
     parser.add_argument(
         "--xlsx",
         default="2、中医门（急）诊诊疗信息页数据项采集接口标准.xlsx",
         help="标准 Excel 路径（相对于项目根或绝对路径）",
     )
     parser.add_argument("--batch-size", type=int, default=5000, help="每批写入行数（建议 2000-8000）")
+    parser.add_argument("--dry-run", action="store_true", help="只输出差异，不写入数据库")
     args = parser.parse_args()
 
     xlsx_path = Path(args.xlsx)
@@ -137,55 +290,19 @@ def main() -> None:
     engine = create_engine(settings.mysql_dsn, pool_pre_ping=True)
     wb = openpyxl.load_workbook(xlsx_path, data_only=True, read_only=True)
 
-    for set_code, set_name, iterator in _iter_sheet_dicts(wb):
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "INSERT INTO dict_set(set_code,set_name,version,source) "
-                    "VALUES(:set_code,:set_name,NULL,NULL) "
-                    "ON DUPLICATE KEY UPDATE set_name=VALUES(set_name), version=VALUES(version), source=VALUES(source)"
-                ),
-                {"set_code": set_code, "set_name": set_name},
-            )
-            conn.execute(text("DELETE FROM dict_item WHERE set_code=:set_code"), {"set_code": set_code})
-
-            seen_codes: set[str] = set()
-            batch: list[dict] = []
-            total = 0
-            for row in iterator:
-                if row.code in seen_codes:
-                    continue
-                seen_codes.add(row.code)
-                batch.append(
-                    {
-                        "set_code": set_code,
-                        "code": row.code,
-                        "name": row.name,
-                        "extra_code": row.extra_code,
-                        "merged_code": row.merged_code,
-                    }
-                )
-                if len(batch) >= args.batch_size:
-                    conn.execute(
-                        text(
-                            "INSERT INTO dict_item(set_code,code,name,extra_code,merged_code,status,sort_no) "
-                            "VALUES(:set_code,:code,:name,:extra_code,:merged_code,1,0)"
-                        ),
-                        batch,
-                    )
-                    total += len(batch)
-                    batch = []
-            if batch:
-                conn.execute(
-                    text(
-                        "INSERT INTO dict_item(set_code,code,name,extra_code,merged_code,status,sort_no) "
-                        "VALUES(:set_code,:code,:name,:extra_code,:merged_code,1,0)"
-                    ),
-                    batch,
+    try:
+        for set_code, set_name, iterator in _iter_sheet_dicts(wb):
+            rows = _collect_rows(iterator)
+            # 每个字典集在单个事务内完成对比与写入，读取方只会看到导入前或导入后的完整字典；试运行不提交
+            with engine.connect() if args.dry_run else engine.begin() as conn:
+                diff, touched = import_set(
+                    conn, set_code, set_name, rows, batch_size=args.batch_size, dry_run=args.dry_run
                 )
-                total += len(batch)
-
-        print(f"{set_code} {set_name}: {total} 行")
+            summary = f"新增 {len(diff.inserts)}，更新 {len(diff.updates)}，停用 {len(diff.deactivate_ids)}"
+            state = "未变化" if not touched else ("待写入" if args.dry_run else "已写入")
+            print(f"{set_code} {set_name}: {len(rows)} 行（{summary}，{state}）")
+    finally:
+        wb.close()
 
 
 if __name__ == "__main__":
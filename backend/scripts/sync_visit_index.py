@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.config import get_settings
+from app.core.db import create_session
+from app.core.logging import setup_logging
+from app.services.external import get_shared_external_adapter
+from app.services.visit_sync import VisitIndexSyncer, VisitUpsertStats, sync_recent_days
+
+
+def _describe(stats: Optional[VisitUpsertStats]) -> str:
+    if stats is None:
+        return "同步锁被占用，已跳过"
+    return f"新增 {stats.inserted} 行，更新 {stats.updated} 行，未变化 {stats.unchanged} 行"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="同步本地就诊索引 mz_mfp_visit_index（独立 worker，可与应用内后台同步二选一）")
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat, help="开始日期（含），如 2025-12-01")
+    parser.add_argument("--to", dest="to_date", type=date.fromisoformat, help="结束日期（含），缺省为开始日期")
+    parser.add_argument("--refresh", action="store_true", help="忽略同步水位，强制重新拉取指定范围")
+    parser.add_argument("--loop", action="store_true", help="常驻运行，按 VISIT_SYNC_INTERVAL_SECONDS 持续同步近期日期")
+    parser.add_argument("--lock-timeout", type=int, default=30, help="等待其他进程释放同步锁的秒数")
+    args = parser.parse_args()
+
+    setup_logging()
+    settings = get_settings()
+
+    if args.from_date:
+        to_date = args.to_date or args.from_date
+        db = create_session()
+        try:
+            syncer = VisitIndexSyncer(db, get_shared_external_adapter(), settings)
+            stats = syncer.sync_window(args.from_date, to_date, refresh=args.refresh, lock_timeout=args.lock_timeout)
+        finally:
+            db.close()
+        print(f"{args.from_date}~{to_date}: {_describe(stats)}")
+        return
+
+    if not args.loop:
+        print(f"近期就诊索引: {_describe(sync_recent_days(settings))}")
+        return
+
+    interval = max(5, settings.visit_sync_interval_seconds)
+    while True:
+        try:
+            sync_recent_days(settings)
+        except Exception as exc:  # noqa: BLE001
+            print(f"同步失败: {type(exc).__name__}: {exc}", file=sys.stderr)
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    main()
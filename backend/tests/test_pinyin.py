@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services.pinyin import to_pinyin
+
+
+# 医学/中药名称中的多音字：对照表重新生成时不得回退为其他读音
+@pytest.mark.parametrize(
+    ("name", "full", "abbr"),
+    [
+        ("颈椎病", "jingzhuibing", "jzb"),
+        ("腰椎管狭窄", "yaozhuiguanxiazhai", "yzgxz"),
+        ("椎间盘突出", "zhuijianpantuchu", "zjptc"),
+        ("肠粘连", "changnianlian", "cnl"),
+        ("脑卒中", "naocuzhong", "ncz"),
+        ("桔梗", "jiegeng", "jg"),
+        ("蛤蚧", "gejie", "gj"),
+        ("莪术", "ezhu", "ez"),
+        ("白术", "baizhu", "bz"),
+        ("膀胱炎", "pangguangyan", "pgy"),
+        ("牙龈炎", "yayinyan", "yyy"),
+        ("咯血", "kaxue", "kx"),
+    ],
+)
+def test_medical_readings(name: str, full: str, abbr: str) -> None:
+    assert to_pinyin(name) == (full, abbr)
+
+
+def test_letters_and_digits_are_kept() -> None:
+    assert to_pinyin("2型糖尿病") == ("2xingtangniaobing", "2xtnb")
+    assert to_pinyin("COVID-19 感染") == ("covid19ganran", "covid19gr")
+
+
+def test_empty_names() -> None:
+    assert to_pinyin(None) == (None, None)
+    assert to_pinyin(" - ") == (None, None)
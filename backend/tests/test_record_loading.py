@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Base,
+    BaseInfo,
+    Diagnosis,
+    FeeSummary,
+    HerbDetail,
+    MedicationSummary,
+    Org,
+    Record,
+    Surgery,
+    TcmOperation,
+)
+from app.services.record_loading import record_load_options
+
+# 主查询（JOIN 一对一/多对一关系）+ 4 个一对多明细各一条 IN 查询
+EXPECTED_STATEMENTS = 1 + 4
+
+
+@pytest.fixture()
+def engine() -> Iterator[Engine]:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[list[str]]:
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _populate(db: Session, count: int) -> list[int]:
+    org = Org(jgmc="测试机构", zzjgdm="TEST0001", is_active=True)
+    db.add(org)
+    db.flush()
+    visit_time = datetime(2026, 1, 1, 9)
+    ids: list[int] = []
+    for index in range(count):
+        record = Record(
+            org_id=org.id,
+            patient_no=f"P{index}",
+            visit_time=visit_time,
+            dept_code="01",
+            doc_code="D01",
+            status="submitted",
+        )
+        record.base_info = BaseInfo(
+            username="u",
+            jzkh=f"P{index}",
+            xm="张三",
+            xb="1",
+            csrq=date(1990, 1, 1),
+            hy="1",
+            gj="CHN",
+            mz="01",
+            zjlb="1",
+            zjhm="11010519491231002X",
+            xzz="地址",
+            lxdh="13800000000",
+            ywgms="1",
+            jzsj=visit_time,
+            jzksdm="01",
+            jzys="医生",
+            jzyszc="1",
+            jzlx="1",
+            fz="0",
+            sy="0",
+            mzmtbhz="0",
+        )
+        record.medication_summary = MedicationSummary(xysy="1", zcysy="0", zyzjsy="0", ctypsy="1", pfklsy="0")
+        record.fee_summary = FeeSummary(zfy=Decimal("100.00"), zfje=Decimal("10.00"))
+        record.diagnoses = [
+            Diagnosis(diag_type="wm_main", seq_no=1, diag_name="急性上呼吸道感染", diag_code="J06.900"),
+            Diagnosis(diag_type="wm_other", seq_no=1, diag_name="发热", diag_code="R50.900"),
+        ]
+        record.tcm_operations = [TcmOperation(seq_no=seq, op_name="针刺", op_code="99.9200", op_times=1) for seq in (1, 2)]
+        record.surgeries = [
+            Surgery(
+                seq_no=1,
+                op_name="清创术",
+                op_code="86.2200",
+                op_time=visit_time,
+                operator_name="医生",
+                anesthesia_method="1",
+                anesthesia_doctor="医生",
+                surgery_level=1,
+            )
+        ]
+        record.herb_details = [
+            HerbDetail(seq_no=seq, herb_type="1", route_code="1", route_name="口服", dose_count=3) for seq in (1, 2)
+        ]
+        db.add(record)
+        db.flush()
+        ids.append(record.id)
+    db.commit()
+    return ids
+
+
+def _load_and_touch(db: Session, ids: list[int], *, include_org: bool = False) -> list[Record]:
+    records = db.execute(
+        select(Record).where(Record.id.in_(ids)).options(*record_load_options(include_org=include_org))
+    ).unique().scalars().all()
+    # 访问全部关系：预加载生效时不应再触发查询
+    for record in records:
+        assert record.base_info is not None
+        assert record.medication_summary is not None
+        assert record.fee_summary is not None
+        assert len(record.diagnoses) == 2
+        assert len(record.tcm_operations) == 2
+        assert len(record.surgeries) == 1
+        assert len(record.herb_details) == 2
+        if include_org:
+            assert record.org is not None
+    return records
+
+
+def test_single_record_query_count(engine: Engine) -> None:
+    with Session(engine) as db:
+        ids = _populate(db, 1)
+    with Session(engine) as db, count_statements(engine) as statements:
+        records = _load_and_touch(db, ids, include_org=True)
+    assert len(records) == 1
+    assert len(statements) == EXPECTED_STATEMENTS
+
+
+def test_batch_query_count_independent_of_record_count(engine: Engine) -> None:
+    with Session(engine) as db:
+        ids = _populate(db, 25)
+    with Session(engine) as db, count_statements(engine) as statements:
+        records = _load_and_touch(db, ids)
+    assert len(records) == 25
+    assert len(statements) == EXPECTED_STATEMENTS
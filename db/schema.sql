@@ -231,16 +231,24 @@ CREATE TABLE `mz_mfp_field_audit` (
 
 CREATE TABLE `mz_mfp_export_log` (
   `id` bigint unsigned NOT NULL AUTO_INCREMENT COMMENT '主键',
-  `record_id` bigint unsigned NOT NULL COMMENT '关联mz_mfp_record.id',
-  `export_type` varchar(20) NOT NULL COMMENT 'xlsx/print',
+  `record_id` bigint unsigned DEFAULT NULL COMMENT '关联mz_mfp_record.id（打印/单条导出时使用；批量导出可为空）',
+  `export_type` varchar(20) NOT NULL COMMENT 'xlsx/csv/parquet/xlsx_job/print',
   `file_name` varchar(200) DEFAULT NULL COMMENT '文件名（如为xlsx）',
   `file_path` varchar(500) DEFAULT NULL COMMENT '文件路径/对象存储key（如有）',
-  `status` varchar(20) NOT NULL COMMENT 'success/failed',
+  `status` varchar(20) NOT NULL COMMENT 'queued/running/success/failed',
   `error_message` text COMMENT '失败原因（需脱敏）',
+  `detail` json DEFAULT NULL COMMENT '附加信息（JSON，需脱敏）',
+  `progress` json DEFAULT NULL COMMENT '异步任务进度（total/loaded/validated/written）',
+  `worker_id` varchar(100) DEFAULT NULL COMMENT '执行任务的进程标识（host:pid）',
+  `started_at` datetime DEFAULT NULL COMMENT '任务开始时间',
+  `finished_at` datetime DEFAULT NULL COMMENT '任务结束时间',
+  `heartbeat_at` datetime DEFAULT NULL COMMENT '任务最近心跳时间',
   `created_by` varchar(50) NOT NULL COMMENT '操作人',
   `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
   PRIMARY KEY (`id`),
   KEY `idx_record_time` (`record_id`, `created_at`),
+  KEY `idx_type_time` (`export_type`, `created_at`),
+  KEY `idx_status_time` (`status`, `created_at`),
   CONSTRAINT `fk_export_record` FOREIGN KEY (`record_id`) REFERENCES `mz_mfp_record` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
@@ -305,13 +313,16 @@ CREATE TABLE `dict_item` (
   `name` varchar(255) NOT NULL,
   `extra_code` varchar(50) DEFAULT NULL,
   `merged_code` varchar(50) DEFAULT NULL,
-  `pinyin` varchar(255) DEFAULT NULL,
+  `pinyin` varchar(255) DEFAULT NULL COMMENT '名称全拼（小写、无分隔）',
+  `pinyin_abbr` varchar(100) DEFAULT NULL COMMENT '名称拼音首字母（小写、无分隔）',
   `status` tinyint(1) NOT NULL DEFAULT 1 COMMENT '1启用/0停用',
   `sort_no` int NOT NULL DEFAULT 0,
   PRIMARY KEY (`id`),
   UNIQUE KEY `uk_set_code_code` (`set_code`, `code`),
   KEY `idx_set_code_merged` (`set_code`, `merged_code`),
   KEY `idx_set_code_name` (`set_code`, `name`),
+  KEY `idx_set_code_pinyin` (`set_code`, `pinyin`),
+  KEY `idx_set_code_pinyin_abbr` (`set_code`, `pinyin_abbr`),
   CONSTRAINT `fk_dict_item_set` FOREIGN KEY (`set_code`) REFERENCES `dict_set` (`set_code`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
@@ -324,6 +335,7 @@ CREATE TABLE `mz_mfp_visit_index` (
   `xm` varchar(100) DEFAULT NULL COMMENT '姓名（XM）',
   `jzks` varchar(100) DEFAULT NULL COMMENT '就诊科室名称（JZKS）',
   `jzys` varchar(40) DEFAULT NULL COMMENT '接诊医生（JZYS）',
+  `row_hash` char(40) DEFAULT NULL COMMENT '外部视图字段内容哈希（SHA1），用于跳过未变化行',
   `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`patient_no`),
@@ -331,3 +343,26 @@ CREATE TABLE `mz_mfp_visit_index` (
   KEY `idx_dept_visit` (`dept_code`, `visit_time`),
   KEY `idx_doc_visit` (`doc_code`, `visit_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- 就诊索引同步水位（按自然日，增量同步用）
+CREATE TABLE `mz_mfp_visit_sync_state` (
+  `sync_date` date NOT NULL COMMENT '就诊日期（自然日）',
+  `synced_through` datetime NOT NULL COMMENT '已同步到的时间点（不含）',
+  `is_closed` tinyint(1) NOT NULL DEFAULT 0 COMMENT '1=该日已完成最终同步，不再重复拉取',
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`sync_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE `mz_mfp_validation_state` (
+  `record_id` bigint unsigned NOT NULL COMMENT '关联mz_mfp_record.id',
+  `record_version` int unsigned NOT NULL COMMENT '校验时的记录版本号',
+  `rules_version` char(40) NOT NULL COMMENT '校验规则版本（内容哈希）',
+  `dict_version` char(40) NOT NULL COMMENT '字典版本（相关字典集 version/updated_at 的哈希）',
+  `error_count` int unsigned NOT NULL COMMENT '错误数',
+  `errors` json DEFAULT NULL COMMENT '校验错误列表（FieldError）',
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`record_id`),
+  CONSTRAINT `fk_validation_state_record` FOREIGN KEY (`record_id`) REFERENCES `mz_mfp_record` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;